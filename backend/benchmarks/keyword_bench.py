@@ -0,0 +1,137 @@
+"""
+關鍵字比對基準測試 — 逐一子字串判斷 vs keyword_matcher（Aho-Corasick）
+以固定種子產生數千筆仿真標題（板名前綴 + 遊戲名 + 常見詞，部分含關鍵字），比較：
+- sentiment：正負面關鍵字計數（analyze_title 的舊寫法 vs _MATCHER.counts）
+- digest：4Gamers 篩選（噪音 / 評測 / 行銷三份清單）+ 分類，舊寫法每份清單各掃一次，新寫法整個只走訪一次
+兩種寫法的結果逐筆比對，不一致時直接報錯
+
+用法（於 backend/ 目錄）：
+    python -m benchmarks.keyword_bench [--titles 5000] [--repeat 5] [--backend python]
+--backend 指定 keyword_matcher 的實作（預設有裝 pyahocorasick 就用它），sentiment 與 digest 的自動機會以該實作重建
+"""
+import argparse
+import random
+import statistics
+import time
+
+from scrapers import keyword_matcher, sentiment
+from scrapers import weekly_digest_scraper as wd
+
+GAMES = ["原神", "崩壞：星穹鐵道", "艾爾登法環", "Monster Hunter Wilds", "寶可夢", "英雄聯盟", "天堂M", "勝利女神：妮姬"]
+PREFIXES = ["[閒聊]", "[情報]", "[問題]", "[心得]", "[討論]", "[新聞]", "Re: [閒聊]", "【情報】", "【活動】"]
+WORDS = [
+    "新角色", "版本", "實機", "公開", "今天", "玩家", "這次", "是不是", "有人", "官方", "宣布",
+    "上線", "預約", "開始", "終於", "真的", "感覺", "劇情", "角色", "卡池", "伺服器", "維護",
+    "補償", "改版", "聯名", "活動", "推薦", "好玩", "退坑", "炎上", "延期", "好評", "攻略",
+    "更新", "免費", "週年", "PV", "限定", "trailer", "Review", "詐騙", "合作",
+]
+
+
+def make_titles(n: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(PREFIXES)} {rng.choice(GAMES)} " + " ".join(rng.sample(WORDS, rng.randint(2, 5)))
+        for _ in range(n)
+    ]
+
+
+# ── 舊寫法（逐一子字串判斷），作為對照 ──
+
+def naive_sentiment(title: str) -> tuple[int, int]:
+    return (sum(1 for kw in sentiment._POS_KEYWORDS if kw in title),
+            sum(1 for kw in sentiment._NEG_KEYWORDS if kw in title))
+
+
+def naive_digest(title: str, intro: str) -> list[str] | None:
+    combined = f"{title} {intro}".lower()
+    if any(kw in combined for kw in wd.NOISE_KEYWORDS):
+        return None
+    if any(kw in combined for kw in wd.REVIEW_SKIP_WORDS):
+        return None
+    if not any(kw.lower() in combined for kw in wd.EVENT_KEYWORDS + wd.COLLAB_KEYWORDS + wd.AD_KEYWORDS):
+        return None
+    text = f"{title} {intro}".lower()
+    tags = []
+    if any(kw in text for kw in wd.AD_KEYWORDS):
+        tags.append("ad")
+    if any(kw in text for kw in wd.COLLAB_KEYWORDS):
+        tags.append("collab")
+    if any(kw in text for kw in wd.EVENT_KEYWORDS):
+        tags.append("event")
+    return tags or ["news"]
+
+
+# ── 新寫法 ──
+
+def matcher_sentiment(title: str) -> tuple[int, int]:
+    hits = sentiment._MATCHER.counts(title)
+    return hits.get("pos", 0), hits.get("neg", 0)
+
+
+def matcher_digest(title: str, intro: str) -> list[str] | None:
+    hits = wd._4GAMERS_MATCHER.categories(f"{title} {intro}")
+    if "noise" in hits or "skip" in hits or "marketing" not in hits:
+        return None
+    return wd._tags_from_hits(hits)
+
+
+def _rebuild(backend: str):
+    """以指定實作重建 sentiment 與 4Gamers 的自動機"""
+    sentiment._MATCHER = keyword_matcher.KeywordMatcher(
+        {"pos": sentiment._POS_KEYWORDS, "neg": sentiment._NEG_KEYWORDS}, backend=backend,
+    )
+    wd._4GAMERS_MATCHER = keyword_matcher.KeywordMatcher({
+        "noise": wd.NOISE_KEYWORDS, "skip": wd.REVIEW_SKIP_WORDS,
+        "marketing": wd.MARKETING_KEYWORDS, **wd._LOWER_TAG_KEYWORDS,
+    }, ignore_case=True, backend=backend)
+
+
+def _time(func, items, repeat: int) -> float:
+    """每筆平均微秒（取 repeat 次的中位數）"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in items:
+            func(*args)
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs) / len(items) * 1e6
+
+
+def run(n_titles: int = 5000, repeat: int = 5) -> list[dict]:
+    titles = make_titles(n_titles)
+    intros = make_titles(n_titles, seed=7)
+    cases = [
+        ("sentiment", naive_sentiment, matcher_sentiment, [(t,) for t in titles]),
+        ("digest", naive_digest, matcher_digest, list(zip(titles, intros))),
+    ]
+    rows = []
+    for name, naive, fast, items in cases:
+        for args in items:
+            if naive(*args) != fast(*args):
+                raise AssertionError(f"{name} mismatch on {args!r}: {naive(*args)} != {fast(*args)}")
+        naive_us = _time(naive, items, repeat)
+        fast_us = _time(fast, items, repeat)
+        rows.append({
+            "case": name, "items": len(items),
+            "naive_us": round(naive_us, 2), "matcher_us": round(fast_us, 2),
+            "speedup": round(naive_us / fast_us, 2),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="關鍵字比對基準測試")
+    parser.add_argument("--titles", type=int, default=5000, help="標題數")
+    parser.add_argument("--repeat", type=int, default=5, help="計時次數（取中位數）")
+    parser.add_argument("--backend", choices=keyword_matcher.BACKENDS, help="keyword_matcher 實作")
+    opts = parser.parse_args()
+    if opts.backend:
+        _rebuild(opts.backend)
+
+    print(f"{'case':<12}{'items':>7}{'naive µs':>11}{'matcher µs':>12}{'speedup':>9}")
+    for row in run(opts.titles, opts.repeat):
+        print(f"{row['case']:<12}{row['items']:>7}{row['naive_us']:>11}{row['matcher_us']:>12}{row['speedup']:>9}")
+
+
+if __name__ == "__main__":
+    main()
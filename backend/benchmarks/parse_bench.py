@@ -0,0 +1,132 @@
+"""
+HTML 解析 backend 基準測試 — 解析時間與尖峰記憶體
+對 tests/fixtures 的 PTT hotboards、PTT 版面 index、巴哈首頁，比較：
+- html.parser / lxml 整頁解析 vs 以 SoupStrainer 只解析目標子樹（extractor 與正式程式相同）
+- selectolax（有安裝時）：只量 parse + CSS 選取目標元素，供參考，不跑 BeautifulSoup extractor
+每個組合在獨立的 spawn 子程序執行，記憶體數字不受前一個組合影響：
+- py_peak：tracemalloc 追蹤的 Python 物件尖峰（soup 節點都在這裡）
+- rss_delta：解析前後 ru_maxrss 差（含 C 實作的配置，如 lxml / selectolax 的樹）
+
+用法（於 backend/ 目錄）：
+    python -m benchmarks.parse_bench [--repeat 20] [--dir 儲存的頁面目錄]
+--dir 可指向用 curl 存下的正式頁面（檔名需同 fixtures：ptt_hotboards.html、ptt_*_index.html、bahamut_home.html）
+"""
+import argparse
+import gc
+import glob
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from scrapers import discussion_scraper as ds, ptt_crawler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests", "fixtures")
+
+# 檔名 pattern → (extractor, 額外參數, SoupStrainer, selectolax 選擇器)
+CASES = {
+    "ptt_hotboards.html": (ds._extract_ptt_hot_boards, (), ds.PTT_BOARD_ENTRIES, "a.board"),
+    "ptt_*_index.html": (ptt_crawler._extract_index_page, (), ptt_crawler.INDEX_ENTRIES, "div.r-ent"),
+    "bahamut_home.html": (ds._extract_bahamut_home, (), ds.BAHAMUT_LINKS, 'a[href*="bsn="]'),
+}
+
+VARIANTS = [
+    ("html.parser", False),
+    ("html.parser", True),
+    ("lxml", False),
+    ("lxml", True),
+    ("selectolax", False),
+]
+
+
+def _available(backend: str) -> bool:
+    if backend == "html.parser":
+        return True
+    try:
+        __import__(backend)
+        return True
+    except ImportError:
+        return False
+
+
+def _run_once(text, backend, strained, case):
+    extract, args, strainer, selector = case
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return len(LexborHTMLParser(text).css(selector))
+    soup = BeautifulSoup(text, backend, parse_only=strainer if strained else None)
+    return extract(soup, *args)
+
+
+def _measure(path, pattern, backend, strained, repeat, conn):
+    """子程序：量一次記憶體，再跑 repeat 次取時間中位數"""
+    case = CASES[pattern]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    _run_once(text, backend, strained, case)  # 預熱 import 與 regex 快取
+    gc.collect()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    _run_once(text, backend, strained, case)
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_delta = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run_once(text, backend, strained, case)
+        times.append(time.perf_counter() - start)
+    conn.send({"ms": statistics.median(times) * 1000, "py_peak_kb": py_peak / 1024, "rss_delta_kb": rss_delta})
+    conn.close()
+
+
+def _fixtures(directory):
+    for pattern in CASES:
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            yield path, pattern
+
+
+def run(directory=FIXTURE_DIR, repeat=20):
+    """逐一產出每個（頁面, backend）組合的量測結果"""
+    ctx = multiprocessing.get_context("spawn")
+    for path, pattern in _fixtures(directory):
+        size_kb = os.path.getsize(path) / 1024
+        for backend, strained in VARIANTS:
+            if not _available(backend):
+                continue
+            parent, child = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_measure, args=(path, pattern, backend, strained, repeat, child))
+            proc.start()
+            proc.join()
+            if not parent.poll():
+                print(f"[Bench] {backend} failed on {os.path.basename(path)} (exit {proc.exitcode})")
+                continue
+            result = parent.recv()
+            yield {
+                "page": os.path.basename(path),
+                "size_kb": round(size_kb, 1),
+                "backend": backend + (" + strainer" if strained else ""),
+                **{k: round(v, 1) for k, v in result.items()},
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 解析 backend 基準測試")
+    parser.add_argument("--dir", default=FIXTURE_DIR, help="頁面目錄（預設 tests/fixtures）")
+    parser.add_argument("--repeat", type=int, default=20, help="每個組合計時次數（取中位數）")
+    opts = parser.parse_args()
+
+    print(f"{'page':<24}{'KB':>7}  {'backend':<24}{'ms':>8}{'py_peak KB':>12}{'rss_delta KB':>14}")
+    for row in run(opts.dir, opts.repeat):
+        print(f"{row['page']:<24}{row['size_kb']:>7}  {row['backend']:<24}{row['ms']:>8}"
+              f"{row['py_peak_kb']:>12}{row['rss_delta_kb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+標題情緒引擎基準測試 — 關鍵字規則 vs 字元 n-gram naive Bayes（mmap 模型）
+在獨立的 spawn 子程序量測（不受本程序已載入的模組影響）：
+- load_ms：開檔 + mmap + 解析 header 的時間
+- us_per_title：每個標題的判斷時間（不經 LRU memo）
+- rss_delta：載入引擎並判斷所有標題前後的常駐記憶體差（含 import；mmap 只有查到的頁面算進來）
+另列出模型檔大小
+
+用法（於 backend/ 目錄）：
+    python -m benchmarks.sentiment_bench [--titles 5000] [--model models/sentiment_nb.bin]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "sentiment_nb.bin")
+
+
+def _rss_kb() -> int:
+    """目前常駐記憶體（Linux 讀 /proc/self/statm；其他平台退回 ru_maxrss 尖峰值）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(engine: str, model_path: str, titles: list[str], conn):
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    if engine == "nb":
+        from scrapers.sentiment_model import NaiveBayesModel
+        model = NaiveBayesModel.load(model_path)
+        judge = lambda t: model.predict(t)["label"]  # noqa: E731
+    else:
+        from scrapers import sentiment
+        judge = sentiment._keyword_label
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for title in titles:
+        judge(title)
+    elapsed = time.perf_counter() - start
+    conn.send({
+        "load_ms": load_ms,
+        "us_per_title": elapsed / len(titles) * 1e6,
+        "rss_delta_kb": _rss_kb() - rss_before,
+    })
+    conn.close()
+
+
+def run(n_titles: int = 5000, model_path: str = DEFAULT_MODEL) -> list[dict]:
+    # 只在父程序產生標題：子程序 import 本模組時不會連帶載入 scrapers
+    from benchmarks.keyword_bench import make_titles
+    titles = make_titles(n_titles)
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for engine in ("rules", "nb"):
+        parent, child = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_measure, args=(engine, model_path, titles, child))
+        proc.start()
+        proc.join()
+        if not parent.poll():
+            print(f"[Bench] {engine} failed (exit {proc.exitcode})")
+            continue
+        rows.append({"engine": engine, **{k: round(v, 2) for k, v in parent.recv().items()}})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="標題情緒引擎基準測試")
+    parser.add_argument("--titles", type=int, default=5000, help="標題數")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="naive Bayes 模型檔")
+    opts = parser.parse_args()
+
+    if not os.path.exists(opts.model):
+        parser.error(f"model file not found: {opts.model}（先以 python -m scrapers.sentiment_model train 訓練）")
+    print(f"model file: {opts.model} ({os.path.getsize(opts.model) / 1024:.0f} KB)")
+    print(f"{'engine':<8}{'load ms':>9}{'µs/title':>10}{'rss_delta KB':>14}")
+    for row in run(opts.titles, opts.model):
+        print(f"{row['engine']:<8}{row['load_ms']:>9}{row['us_per_title']:>10}{row['rss_delta_kb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
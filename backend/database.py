@@ -1,13 +1,37 @@
 """
 SQLite 歷史數據模組
 記錄 Steam / Twitch 遊戲的歷史人數快照，供趨勢圖使用
+新聞封存：所有抓到的新聞寫入 news_archive，並以 FTS5 建立標題/摘要全文索引
+新聞分群：MinHash 簽章與 LSH 桶（news_cluster / news_lsh），供跨來源近似重複合併
+PTT 增量爬取：每版游標（ptt_cursor）與文章推文數（ptt_article），供滾動 24 小時熱門排行
+討論區共用儲存：巴哈追蹤版面熱門文（bahamut_post）與整站排行頁快照（discussion_page），
+由排程分片刷新寫入，fetch_all_discussions 只從這裡組裝
+討論情緒時間序列：每篇文章記一筆目前判斷（sentiment_item），依版面 / 遊戲 × 小時累加計數（sentiment_hourly）；
+每次組裝只對新文章與判斷改變的文章加減計數，趨勢查詢直接讀彙總桶
+巴哈 BSN 解析表（bsn_resolution）：遊戲名稱 → BSN，含否定紀錄（bsn 為 NULL）；種子紀錄不過期
+每周摘要 item store（digest_item，同一遊戲以 URL 與正規化標題去重）與每個遊戲 × 來源的查詢水位（digest_watermark）；
+摘要指紋 seen-set（digest_seen：標題 / URL 指紋 → 第一次與最近一次看到的時間），保留得比 item store 久，跨週去重
+配額 API 帳本（api_quota：每個 API 每個配額日已用單位）與回應快取（api_response：以 API × 查詢 × 日期視窗為鍵）
+背景工作紀錄（job_run）：手動 / 排程觸發的長時間工作狀態與進度，重啟後仍可查詢
 """
 import aiosqlite
+import json
+import re
 import time
 import os
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "cache", "history.db")
 KEEP_DAYS = 90  # 保留最近 90 天
+LSH_KEEP_DAYS = 30  # LSH 桶與分群簽章只需涵蓋近期新聞，每日清理
+NEWS_ARCHIVE_KEEP_DAYS = 365  # 封存新聞（含全文索引）保留一年
+PTT_KEEP_DAYS = 7  # PTT 文章推文數只用於近期排行
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+BSN_TTL_DAYS = 30           # 搜尋找到的 BSN
+BSN_NEGATIVE_TTL_DAYS = 3   # 確定找不到的名稱，期滿後再搜尋一次
+DIGEST_KEEP_DAYS = 30       # 摘要視窗 14 天，多留一段供回查
+DIGEST_SEEN_KEEP_DAYS = 60  # 指紋最近一次看到後保留的天數（持續被轉載的公告不會重新算成新項目）
+JOB_KEEP_DAYS = 30
+API_QUOTA_KEEP_DAYS = 7
 
 
 async def init_db():
@@ -30,6 +54,196 @@ async def init_db():
         await db.execute(
             "CREATE INDEX IF NOT EXISTS idx_recorded_at ON history (recorded_at)"
         )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS news_archive (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                news_id TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                url TEXT,
+                summary TEXT,
+                source TEXT,
+                published_at TEXT,
+                fetched_at INTEGER NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_news_published ON news_archive (published_at)"
+        )
+        # contentless FTS5：原文存在 news_archive，rowid 對應 news_archive.id
+        await db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS news_fts
+            USING fts5(title, summary, content='', tokenize='unicode61')
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS news_cluster (
+                news_id TEXT PRIMARY KEY,
+                cluster_id TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS news_lsh (
+                band_key INTEGER NOT NULL,
+                news_id TEXT NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_news_lsh_key ON news_lsh (band_key)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS ptt_cursor (
+                board TEXT PRIMARY KEY,
+                last_page INTEGER NOT NULL,
+                last_article_id TEXT,
+                updated_at INTEGER NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS ptt_article (
+                url TEXT PRIMARY KEY,
+                board TEXT NOT NULL,
+                article_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                nrec TEXT NOT NULL,
+                push INTEGER NOT NULL,
+                posted_at INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ptt_article_posted ON ptt_article (posted_at)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS bahamut_post (
+                url TEXT PRIMARY KEY,
+                bsn TEXT NOT NULL,
+                board_name TEXT NOT NULL,
+                title TEXT NOT NULL,
+                gp INTEGER NOT NULL,
+                replies INTEGER NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bahamut_post_seen ON bahamut_post (last_seen)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS ptt_comment (
+                url TEXT PRIMARY KEY,
+                seen_nrec TEXT NOT NULL,
+                push INTEGER NOT NULL,
+                boo INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                comments TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_item (
+                url TEXT PRIMARY KEY,
+                board TEXT NOT NULL,
+                game TEXT,
+                hour INTEGER NOT NULL,
+                label TEXT NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sentiment_item_hour ON sentiment_item (hour)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_hourly (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                positive INTEGER NOT NULL DEFAULT 0,
+                negative INTEGER NOT NULL DEFAULT 0,
+                neutral INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, key, hour)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS bsn_resolution (
+                name TEXT PRIMARY KEY,
+                bsn TEXT,
+                source TEXT NOT NULL,
+                resolved_at INTEGER NOT NULL,
+                expires_at INTEGER
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS digest_item (
+                game TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title_key TEXT NOT NULL,
+                source_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                published_ts INTEGER,
+                first_seen INTEGER NOT NULL,
+                PRIMARY KEY (game, url)
+            )
+        """)
+        await db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_digest_item_title ON digest_item (game, title_key)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS digest_watermark (
+                game TEXT NOT NULL,
+                source TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL,
+                PRIMARY KEY (game, source)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS api_quota (
+                api TEXT NOT NULL,
+                day TEXT NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (api, day)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS api_response (
+                api TEXT NOT NULL,
+                query TEXT NOT NULL,
+                window TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL,
+                expires_at INTEGER NOT NULL,
+                PRIMARY KEY (api, query, window)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS digest_seen (
+                game TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                PRIMARY KEY (game, fingerprint)
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS job_run (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at INTEGER NOT NULL,
+                started_at INTEGER,
+                finished_at INTEGER
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS discussion_page (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at INTEGER NOT NULL
+            )
+        """)
         await db.commit()
     print(f"[DB] Initialized history.db at {DB_PATH}")
 
@@ -50,6 +264,62 @@ async def cleanup_old_data():
     cutoff = int(time.time()) - KEEP_DAYS * 86400
     async with aiosqlite.connect(DB_PATH, timeout=30) as db:
         await db.execute("DELETE FROM history WHERE recorded_at < ?", (cutoff,))
+        lsh_cutoff = int(time.time()) - LSH_KEEP_DAYS * 86400
+        await db.execute(
+            "DELETE FROM news_lsh WHERE news_id IN (SELECT news_id FROM news_cluster WHERE created_at < ?)",
+            (lsh_cutoff,),
+        )
+        await db.execute("DELETE FROM news_cluster WHERE created_at < ?", (lsh_cutoff,))
+        # contentless FTS5 需以原本寫入的內容下 'delete' 指令，再刪封存原文
+        cursor = await db.execute(
+            "SELECT id, title, summary FROM news_archive WHERE fetched_at < ?",
+            (int(time.time()) - NEWS_ARCHIVE_KEEP_DAYS * 86400,),
+        )
+        expired = await cursor.fetchall()
+        await db.executemany(
+            "INSERT INTO news_fts (news_fts, rowid, title, summary) VALUES ('delete', ?, ?, ?)",
+            [(row_id, _fts_text(title), _fts_text(summary or "")) for row_id, title, summary in expired],
+        )
+        await db.executemany("DELETE FROM news_archive WHERE id = ?", [(row[0],) for row in expired])
+        await db.execute(
+            "DELETE FROM ptt_article WHERE posted_at < ?",
+            (int(time.time()) - PTT_KEEP_DAYS * 86400,),
+        )
+        await db.execute(
+            "DELETE FROM bahamut_post WHERE last_seen < ?",
+            (int(time.time()) - PTT_KEEP_DAYS * 86400,),
+        )
+        await db.execute(
+            "DELETE FROM ptt_comment WHERE fetched_at < ?",
+            (int(time.time()) - PTT_KEEP_DAYS * 86400,),
+        )
+        # 文章判斷只需涵蓋可能再被組裝到的期間；彙總桶與快照一樣保留 KEEP_DAYS
+        await db.execute(
+            "DELETE FROM sentiment_item WHERE hour < ?",
+            (int(time.time()) - PTT_KEEP_DAYS * 86400,),
+        )
+        await db.execute("DELETE FROM sentiment_hourly WHERE hour < ?", (cutoff,))
+        await db.execute(
+            "DELETE FROM bsn_resolution WHERE expires_at IS NOT NULL AND expires_at < ?",
+            (int(time.time()),),
+        )
+        await db.execute(
+            "DELETE FROM digest_item WHERE COALESCE(published_ts, first_seen) < ?",
+            (int(time.time()) - DIGEST_KEEP_DAYS * 86400,),
+        )
+        await db.execute(
+            "DELETE FROM digest_seen WHERE last_seen < ?",
+            (int(time.time()) - DIGEST_SEEN_KEEP_DAYS * 86400,),
+        )
+        await db.execute("DELETE FROM api_response WHERE expires_at < ?", (int(time.time()),))
+        await db.execute(
+            "DELETE FROM api_quota WHERE day < ?",
+            (time.strftime("%Y-%m-%d", time.gmtime(time.time() - API_QUOTA_KEEP_DAYS * 86400)),),
+        )
+        await db.execute(
+            "DELETE FROM job_run WHERE created_at < ?",
+            (int(time.time()) - JOB_KEEP_DAYS * 86400,),
+        )
         await db.commit()
     print("[DB] Cleaned up old snapshots")
 
@@ -70,3 +340,758 @@ async def get_history(source: str, game_id: str, days: int = 7):
         )
         rows = await cursor.fetchall()
     return [{"game_name": r["game_name"], "value": r["value"], "recorded_at": r["recorded_at"]} for r in rows]
+
+
+# ============================================================
+# 新聞封存 + 全文搜尋（FTS5）
+# ============================================================
+_CJK_RE = re.compile(r'([\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff])')
+_FTS_BATCH = 500
+
+
+def _fts_text(text: str) -> str:
+    """unicode61 會把連續中文視為單一 token，先在每個中日韓字元兩側補空白（字元級索引）"""
+    return _CJK_RE.sub(r' \1 ', text or "")
+
+
+def _fts_query(query: str) -> str:
+    """使用者關鍵字 → FTS5 查詢：每個詞轉成字元片語，多個詞為 AND"""
+    phrases = []
+    for term in query.split():
+        tokens = _fts_text(term.replace('"', " ")).split()
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " ".join(phrases)
+
+
+async def archive_news(items: list[dict]) -> int:
+    """增量封存新聞：只寫入尚未見過的 news_id，整批一個 transaction；回傳新增筆數"""
+    by_id = {it["id"]: it for it in items if it.get("id") and it.get("title")}
+    if not by_id:
+        return 0
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        existing = set()
+        ids = list(by_id)
+        for i in range(0, len(ids), _FTS_BATCH):
+            chunk = ids[i:i + _FTS_BATCH]
+            cursor = await db.execute(
+                f"SELECT news_id FROM news_archive WHERE news_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            existing.update(row[0] for row in await cursor.fetchall())
+
+        added = 0
+        for news_id, it in by_id.items():
+            if news_id in existing:
+                continue
+            cursor = await db.execute(
+                """
+                INSERT INTO news_archive (news_id, title, url, summary, source, published_at, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (news_id, it["title"], it.get("url", ""), it.get("summary", ""),
+                 it.get("source", ""), it.get("published_at", ""), it.get("fetched_at") or now),
+            )
+            await db.execute(
+                "INSERT INTO news_fts (rowid, title, summary) VALUES (?, ?, ?)",
+                (cursor.lastrowid, _fts_text(it["title"]), _fts_text(it.get("summary", ""))),
+            )
+            added += 1
+        await db.commit()
+    return added
+
+
+async def search_news(query: str, since: str | None = None, until: str | None = None,
+                      limit: int = 20, offset: int = 0) -> dict:
+    """
+    全文搜尋封存新聞，依 bm25 相關度排序（標題權重 2 倍）
+    since / until 為 YYYY-MM-DD（含當日）
+    """
+    match = _fts_query(query)
+    if not match:
+        return {"items": [], "has_more": False}
+
+    where = ["news_fts MATCH ?"]
+    params: list = [match]
+    if since:
+        where.append("a.published_at >= ?")
+        params.append(since)
+    if until:
+        where.append("a.published_at <= ?")
+        params.append(f"{until}T23:59:59Z")
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"""
+            SELECT a.news_id, a.title, a.url, a.summary, a.source, a.published_at,
+                   bm25(news_fts, 2.0, 1.0) AS score
+            FROM news_fts
+            JOIN news_archive a ON a.id = news_fts.rowid
+            WHERE {" AND ".join(where)}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+            """,
+            (*params, limit + 1, offset),
+        )
+        rows = await cursor.fetchall()
+
+    items = [
+        {
+            "id": r["news_id"], "title": r["title"], "url": r["url"], "summary": r["summary"],
+            "source": r["source"], "published_at": r["published_at"],
+            "score": round(-r["score"], 4),
+        }
+        for r in rows[:limit]
+    ]
+    return {"items": items, "has_more": len(rows) > limit}
+
+
+# ============================================================
+# 新聞分群（MinHash + LSH）
+# ============================================================
+
+async def get_news_clusters(news_ids: list[str]) -> dict[str, str]:
+    """已分群過的 news_id → cluster_id"""
+    result = {}
+    if not news_ids:
+        return result
+    async with aiosqlite.connect(DB_PATH) as db:
+        for i in range(0, len(news_ids), _FTS_BATCH):
+            chunk = news_ids[i:i + _FTS_BATCH]
+            cursor = await db.execute(
+                f"SELECT news_id, cluster_id FROM news_cluster WHERE news_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            result.update({row[0]: row[1] for row in await cursor.fetchall()})
+    return result
+
+
+async def find_news_candidates(band_keys, window_days: int) -> list[tuple]:
+    """以 LSH 桶號查出近 window_days 天內的候選：(band_key, news_id, cluster_id, signature)"""
+    keys = list(band_keys)
+    rows = []
+    if not keys:
+        return rows
+    since = int(time.time()) - window_days * 86400
+    async with aiosqlite.connect(DB_PATH) as db:
+        for i in range(0, len(keys), _FTS_BATCH):
+            chunk = keys[i:i + _FTS_BATCH]
+            cursor = await db.execute(
+                f"""
+                SELECT l.band_key, c.news_id, c.cluster_id, c.signature
+                FROM news_lsh l JOIN news_cluster c ON c.news_id = l.news_id
+                WHERE l.band_key IN ({','.join('?' * len(chunk))}) AND c.created_at >= ?
+                """,
+                (*chunk, since),
+            )
+            rows.extend(await cursor.fetchall())
+    return rows
+
+
+async def save_news_clusters(rows: list[tuple]):
+    """寫入新分群結果：(news_id, cluster_id, signature, band_keys)，整批一個 transaction"""
+    if not rows:
+        return
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            "INSERT OR IGNORE INTO news_cluster (news_id, cluster_id, signature, created_at) VALUES (?, ?, ?, ?)",
+            [(news_id, cluster_id, sig, now) for news_id, cluster_id, sig, _ in rows],
+        )
+        await db.executemany(
+            "INSERT INTO news_lsh (band_key, news_id) VALUES (?, ?)",
+            [(key, news_id) for news_id, _, _, keys in rows for key in keys],
+        )
+        await db.commit()
+
+
+# ============================================================
+# PTT 增量爬取：每版游標 + 文章推文數
+# ============================================================
+
+async def get_ptt_cursor(board: str) -> dict | None:
+    """上次爬到的最新頁碼與最新文章 ID"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT last_page, last_article_id, updated_at FROM ptt_cursor WHERE board = ?", (board,)
+        )
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    return {"last_page": row[0], "last_article_id": row[1], "updated_at": row[2]}
+
+
+async def save_ptt_crawl(board: str, last_page: int, last_article_id: str | None, articles: list[dict]):
+    """一個 transaction 內寫入文章推文數（已存在則更新）並推進游標"""
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO ptt_article (url, board, article_id, title, nrec, push, posted_at, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title, nrec = excluded.nrec,
+                push = excluded.push, last_seen = excluded.last_seen
+            """,
+            [
+                (a["url"], board, a["article_id"], a["title"], a["popularity"],
+                 a["popularity_value"], a.get("posted_at") or now, now)
+                for a in articles
+            ],
+        )
+        await db.execute(
+            """
+            INSERT INTO ptt_cursor (board, last_page, last_article_id, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(board) DO UPDATE SET
+                last_page = excluded.last_page,
+                last_article_id = COALESCE(excluded.last_article_id, ptt_cursor.last_article_id),
+                updated_at = excluded.updated_at
+            """,
+            (board, last_page, last_article_id, now),
+        )
+        await db.commit()
+
+
+async def get_ptt_hot_articles(boards: list[str], since: int, limit: int = 20) -> list[dict]:
+    """指定版面中 since（epoch 秒）之後發文、推文數最多的文章"""
+    if not boards:
+        return []
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"""
+            SELECT url, board, title, nrec, push, posted_at
+            FROM ptt_article
+            WHERE board IN ({','.join('?' * len(boards))}) AND posted_at >= ?
+            ORDER BY push DESC, posted_at DESC
+            LIMIT ?
+            """,
+            (*boards, since, limit),
+        )
+        rows = await cursor.fetchall()
+    return [dict(r) for r in rows]
+
+
+async def get_ptt_activity(since: int) -> dict[str, int]:
+    """各版 since 之後的發文數（分片排程依此估計版面活躍度）"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT board, COUNT(*) FROM ptt_article WHERE posted_at >= ? GROUP BY board", (since,)
+        )
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+# ============================================================
+# 討論區共用儲存：巴哈追蹤版面 + 整站排行頁快照
+# ============================================================
+
+async def get_ptt_comment_stats(urls: list[str]) -> dict[str, dict]:
+    """文章推文統計（不含推文內文）→ {url: {"seen_nrec", "push", "boo", "neutral", "fetched_at"}}"""
+    if not urls:
+        return {}
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"""
+            SELECT url, seen_nrec, push, boo, neutral, fetched_at
+            FROM ptt_comment WHERE url IN ({','.join('?' * len(urls))})
+            """,
+            urls,
+        )
+        rows = await cursor.fetchall()
+    return {r["url"]: {k: r[k] for k in r.keys() if k != "url"} for r in rows}
+
+
+async def get_ptt_comments(url: str) -> list[dict]:
+    """單篇文章保存的推文內文"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT comments FROM ptt_comment WHERE url = ?", (url,))
+        row = await cursor.fetchone()
+    return json.loads(row[0]) if row else []
+
+
+async def save_ptt_comments(rows: list[dict]):
+    """寫入文章推文統計與內文；seen_nrec 為抓取當下 index 頁顯示的推文數，下次比對決定是否重抓"""
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO ptt_comment (url, seen_nrec, push, boo, neutral, comments, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                seen_nrec = excluded.seen_nrec, push = excluded.push, boo = excluded.boo,
+                neutral = excluded.neutral, comments = excluded.comments, fetched_at = excluded.fetched_at
+            """,
+            [
+                (r["url"], r["seen_nrec"], r["push"], r["boo"], r["neutral"],
+                 json.dumps(r["comments"], ensure_ascii=False), now)
+                for r in rows
+            ],
+        )
+        await db.commit()
+
+
+async def save_bahamut_posts(bsn: str, board_name: str, posts: list[dict]):
+    """寫入巴哈版面文章（已存在則更新 GP / 回覆數，保留 first_seen）"""
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO bahamut_post (url, bsn, board_name, title, gp, replies, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title, gp = excluded.gp,
+                replies = excluded.replies, last_seen = excluded.last_seen
+            """,
+            [(p["url"], bsn, board_name, p["title"], p["gp"], p["replies"], now, now) for p in posts],
+        )
+        await db.commit()
+
+
+async def get_bahamut_hot_posts(bsns: list[str], since: int, limit: int = 20) -> list[dict]:
+    """指定版面中 since 之後仍出現在版面列表、GP 最高的文章"""
+    if not bsns:
+        return []
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"""
+            SELECT url, bsn, board_name, title, gp, replies
+            FROM bahamut_post
+            WHERE bsn IN ({','.join('?' * len(bsns))}) AND last_seen >= ?
+            ORDER BY gp DESC, replies DESC
+            LIMIT ?
+            """,
+            (*bsns, since, limit),
+        )
+        rows = await cursor.fetchall()
+    return [dict(r) for r in rows]
+
+
+async def get_bahamut_activity(since: int) -> dict[str, int]:
+    """各巴哈版面 since 之後新出現的文章數"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT bsn, COUNT(*) FROM bahamut_post WHERE first_seen >= ? GROUP BY bsn", (since,)
+        )
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+async def save_discussion_page(key: str, data):
+    """整站排行頁（巴哈首頁、PTT hotboards）解析結果快照"""
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.execute(
+            """
+            INSERT INTO discussion_page (key, data, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """,
+            (key, json.dumps(data, ensure_ascii=False), int(time.time())),
+        )
+        await db.commit()
+
+
+async def get_discussion_page(key: str, default=None):
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT data FROM discussion_page WHERE key = ?", (key,))
+        row = await cursor.fetchone()
+    return json.loads(row[0]) if row else default
+
+
+# ============================================================
+# 討論情緒時間序列（版面 / 遊戲 × 小時）
+# ============================================================
+
+def _sentiment_deltas(item: dict, label: str, sign: int, deltas: dict):
+    """文章的一個判斷對 board / game 兩種彙總桶的計數增減"""
+    column = SENTIMENT_LABELS.index(label)
+    keys = [("board", item["board"])]
+    if item.get("game"):
+        keys.append(("game", item["game"]))
+    for scope, key in keys:
+        counts = deltas.setdefault((scope, key, item["hour"]), [0, 0, 0])
+        counts[column] += sign
+
+
+async def record_sentiment(items: list[dict]) -> int:
+    """
+    增量更新情緒彙總桶：items 為 [{"url", "board", "game", "hour", "label"}]（hour 為整點 epoch 秒）
+    新文章計入所屬小時；已記錄過的文章只在 label 改變時從舊 label 移到新 label，重複組裝不會重複計數
+    回傳有變動的文章數
+    """
+    items = [it for it in {it["url"]: it for it in items}.values() if it["label"] in SENTIMENT_LABELS]
+    if not items:
+        return 0
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"SELECT url, board, game, hour, label FROM sentiment_item "
+            f"WHERE url IN ({','.join('?' * len(items))})",
+            [it["url"] for it in items],
+        )
+        known = {r["url"]: dict(r) for r in await cursor.fetchall()}
+
+        deltas, changed = {}, []
+        for it in items:
+            prev = known.get(it["url"])
+            if prev is not None and prev["label"] == it["label"]:
+                continue
+            if prev is not None:
+                # 沿用第一次記錄的版面 / 遊戲 / 小時，只搬移 label
+                _sentiment_deltas(prev, prev["label"], -1, deltas)
+                it = {**prev, "label": it["label"]}
+            _sentiment_deltas(it, it["label"], 1, deltas)
+            changed.append(it)
+
+        if changed:
+            await db.executemany(
+                """
+                INSERT INTO sentiment_item (url, board, game, hour, label) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET label = excluded.label
+                """,
+                [(it["url"], it["board"], it.get("game"), it["hour"], it["label"]) for it in changed],
+            )
+            await db.executemany(
+                """
+                INSERT INTO sentiment_hourly (scope, key, hour, positive, negative, neutral)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(scope, key, hour) DO UPDATE SET
+                    positive = positive + excluded.positive,
+                    negative = negative + excluded.negative,
+                    neutral = neutral + excluded.neutral
+                """,
+                [(scope, key, hour, *counts) for (scope, key, hour), counts in deltas.items()],
+            )
+            await db.commit()
+    return len(changed)
+
+
+async def get_sentiment_buckets(scope: str, key: str, since: int) -> list[dict]:
+    """單一版面 / 遊戲 since 之後的每小時計數，依時間排序"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """
+            SELECT hour, positive, negative, neutral
+            FROM sentiment_hourly
+            WHERE scope = ? AND key = ? AND hour >= ?
+            ORDER BY hour ASC
+            """,
+            (scope, key, since),
+        )
+        rows = await cursor.fetchall()
+    return [dict(r) for r in rows]
+
+
+async def get_sentiment_keys(scope: str, since: int, limit: int = 50) -> list[dict]:
+    """since 之後有資料的版面 / 遊戲，依文章數排序 → [{"key", "positive", "negative", "neutral", "total"}]"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """
+            SELECT key, SUM(positive) AS positive, SUM(negative) AS negative, SUM(neutral) AS neutral,
+                   SUM(positive + negative + neutral) AS total
+            FROM sentiment_hourly
+            WHERE scope = ? AND hour >= ?
+            GROUP BY key
+            ORDER BY total DESC, key ASC
+            LIMIT ?
+            """,
+            (scope, since, limit),
+        )
+        rows = await cursor.fetchall()
+    return [dict(r) for r in rows]
+
+
+# ============================================================
+# 巴哈 BSN 解析表（遊戲名稱 → BSN）
+# ============================================================
+
+async def seed_bsn_resolutions(seeds: dict[str, str]):
+    """寫入種子對照（不過期，覆蓋同名的搜尋結果）；不在目前種子清單中的舊種子一併移除"""
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.execute(
+            f"DELETE FROM bsn_resolution WHERE source = 'seed' "
+            f"AND name NOT IN ({','.join('?' * len(seeds))})",
+            list(seeds),
+        )
+        await db.executemany(
+            """
+            INSERT INTO bsn_resolution (name, bsn, source, resolved_at, expires_at)
+            VALUES (?, ?, 'seed', ?, NULL)
+            ON CONFLICT(name) DO UPDATE SET
+                bsn = excluded.bsn, source = 'seed', resolved_at = excluded.resolved_at, expires_at = NULL
+            WHERE bsn_resolution.source != 'seed' OR bsn_resolution.bsn IS NOT excluded.bsn
+            """,
+            [(name, bsn, now) for name, bsn in seeds.items()],
+        )
+        await db.commit()
+
+
+async def get_bsn_resolutions() -> dict[str, dict]:
+    """未過期的解析紀錄 → {name: {"bsn"（否定紀錄為 None）, "source", "resolved_at", "expires_at"}}"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            """
+            SELECT name, bsn, source, resolved_at, expires_at FROM bsn_resolution
+            WHERE expires_at IS NULL OR expires_at >= ?
+            """,
+            (int(time.time()),),
+        )
+        rows = await cursor.fetchall()
+    return {r["name"]: {k: r[k] for k in r.keys() if k != "name"} for r in rows}
+
+
+async def save_bsn_resolutions(results: dict[str, str | None]):
+    """寫入搜尋結果：找到的 BSN 保留 BSN_TTL_DAYS，找不到（None）保留 BSN_NEGATIVE_TTL_DAYS；不覆蓋種子"""
+    if not results:
+        return
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO bsn_resolution (name, bsn, source, resolved_at, expires_at)
+            VALUES (?, ?, 'search', ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                bsn = excluded.bsn, source = excluded.source,
+                resolved_at = excluded.resolved_at, expires_at = excluded.expires_at
+            WHERE bsn_resolution.source != 'seed'
+            """,
+            [
+                (name, bsn, now, now + (BSN_TTL_DAYS if bsn else BSN_NEGATIVE_TTL_DAYS) * 86400)
+                for name, bsn in results.items()
+            ],
+        )
+        await db.commit()
+
+
+# ============================================================
+# 每周摘要 item store + 來源水位
+# ============================================================
+
+async def save_digest_items(game: str, items: list[dict]) -> int:
+    """
+    寫入摘要項目（items 需含 url / title_key / source_key / published_ts，可附正規化 URL url_key、
+    第一次看到的時間 first_seen，未附時為現在）
+    同一遊戲 URL（有 url_key 時以它比對）或正規化標題已存在就略過（保留第一次看到的版本）；回傳新增筆數
+    """
+    rows = [
+        (game, it.get("url_key") or it["url"], it["title_key"], it["source_key"],
+         json.dumps({k: v for k, v in it.items() if k not in ("title_key", "url_key", "published_ts", "first_seen")},
+                    ensure_ascii=False),
+         it.get("published_ts"), it.get("first_seen"))
+        for it in items if it.get("url") and it.get("title_key")
+    ]
+    if not rows:
+        return 0
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        before = db.total_changes
+        await db.executemany(
+            """
+            INSERT OR IGNORE INTO digest_item (game, url, title_key, source_key, data, published_ts, first_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(*row, first_seen or now) for *row, first_seen in rows],
+        )
+        added = db.total_changes - before
+        await db.commit()
+    return added
+
+
+async def refresh_digest_items(game: str, items: list[dict]) -> list[dict]:
+    """
+    再次看到的項目（指紋已在 seen-set）：以 URL（url_key）或正規化標題對到 item store 既有的列，
+    把視窗 / 清理依據的 published_ts 推進到這次的發佈時間（沒有則為現在），仍在被轉載的項目留在摘要視窗內
+    回傳對不到既有列（已被清理）的項目
+    """
+    now = int(time.time())
+    missing = []
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        for it in items:
+            cursor = await db.execute(
+                """
+                UPDATE digest_item SET published_ts = MAX(COALESCE(published_ts, first_seen), ?)
+                WHERE game = ? AND (url = ? OR title_key = ?)
+                """,
+                (it.get("published_ts") or now, game, it.get("url_key") or it["url"], it["title_key"]),
+            )
+            if cursor.rowcount == 0:
+                missing.append(it)
+        await db.commit()
+    return missing
+
+
+async def get_digest_items(games: list[str], since: int) -> dict[str, list[dict]]:
+    """
+    目標遊戲 since 之後（發佈時間，沒有則用第一次看到的時間）的項目 → {game: [item]}，依寫入先後排序
+    每個項目附 first_seen（第一次寫入的時間）
+    """
+    if not games:
+        return {}
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            f"""
+            SELECT game, data, first_seen FROM digest_item
+            WHERE game IN ({','.join('?' * len(games))}) AND COALESCE(published_ts, first_seen) >= ?
+            ORDER BY first_seen ASC, rowid ASC
+            """,
+            (*games, since),
+        )
+        rows = await cursor.fetchall()
+    result: dict[str, list[dict]] = {}
+    for game, data, first_seen in rows:
+        result.setdefault(game, []).append({**json.loads(data), "first_seen": first_seen})
+    return result
+
+
+async def get_digest_seen(game: str) -> dict[str, int]:
+    """該遊戲 seen-set：{指紋: 第一次看到的時間}"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT fingerprint, first_seen FROM digest_seen WHERE game = ?", (game,))
+        return {row[0]: row[1] for row in await cursor.fetchall()}
+
+
+async def mark_digest_seen(game: str, fingerprints):
+    """本次看到的指紋：新指紋寫入 first_seen，已有的只更新 last_seen"""
+    now = int(time.time())
+    rows = [(game, fp, now, now) for fp in set(fingerprints) if fp]
+    if not rows:
+        return
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO digest_seen (game, fingerprint, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            ON CONFLICT(game, fingerprint) DO UPDATE SET last_seen = excluded.last_seen
+            """,
+            rows,
+        )
+        await db.commit()
+
+
+async def get_digest_watermarks() -> dict[tuple[str, str], int]:
+    """{(game, source): 上次成功查詢的時間}"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT game, source, fetched_at FROM digest_watermark")
+        return {(row[0], row[1]): row[2] for row in await cursor.fetchall()}
+
+
+async def save_digest_watermarks(rows: list[tuple[str, str, int]]):
+    """[(game, source, fetched_at)]：只有查詢成功的來源會前進"""
+    if not rows:
+        return
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.executemany(
+            """
+            INSERT INTO digest_watermark (game, source, fetched_at) VALUES (?, ?, ?)
+            ON CONFLICT(game, source) DO UPDATE SET fetched_at = MAX(fetched_at, excluded.fetched_at)
+            """,
+            rows,
+        )
+        await db.commit()
+
+
+# ============================================================
+# 配額 API 帳本 + 回應快取
+# ============================================================
+
+async def get_api_quota_used(api: str, day: str) -> int:
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute("SELECT used FROM api_quota WHERE api = ? AND day = ?", (api, day))
+        row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+async def add_api_quota_used(api: str, day: str, units: int):
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.execute(
+            """
+            INSERT INTO api_quota (api, day, used) VALUES (?, ?, ?)
+            ON CONFLICT(api, day) DO UPDATE SET used = used + excluded.used
+            """,
+            (api, day, units),
+        )
+        await db.commit()
+
+
+async def get_api_response(api: str, query: str, window: str):
+    """未過期的快取回應（JSON），沒有則回傳 None"""
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(
+            "SELECT data FROM api_response WHERE api = ? AND query = ? AND window = ? AND expires_at >= ?",
+            (api, query, window, int(time.time())),
+        )
+        row = await cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+
+async def save_api_response(api: str, query: str, window: str, data, ttl: int):
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.execute(
+            """
+            INSERT INTO api_response (api, query, window, data, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(api, query, window) DO UPDATE SET
+                data = excluded.data, fetched_at = excluded.fetched_at, expires_at = excluded.expires_at
+            """,
+            (api, query, window, json.dumps(data, ensure_ascii=False), now, now + ttl),
+        )
+        await db.commit()
+
+
+# ============================================================
+# 背景工作紀錄
+# ============================================================
+_JOB_JSON_FIELDS = ("params", "progress", "result")
+
+
+async def save_job(job: dict):
+    """寫入 / 更新工作紀錄（params / progress / result 以 JSON 存）"""
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        await db.execute(
+            """
+            INSERT INTO job_run (id, kind, status, params, progress, result, error,
+                                 created_at, started_at, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                status = excluded.status, progress = excluded.progress, result = excluded.result,
+                error = excluded.error, started_at = excluded.started_at, finished_at = excluded.finished_at
+            """,
+            (
+                job["id"], job["kind"], job["status"],
+                *(json.dumps(job.get(k), ensure_ascii=False) for k in _JOB_JSON_FIELDS),
+                job.get("error"), job["created_at"], job.get("started_at"), job.get("finished_at"),
+            ),
+        )
+        await db.commit()
+
+
+async def get_job(job_id: str) -> dict | None:
+    async with aiosqlite.connect(DB_PATH) as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute("SELECT * FROM job_run WHERE id = ?", (job_id,))
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    for k in _JOB_JSON_FIELDS:
+        job[k] = json.loads(job[k]) if job[k] is not None else None
+    return job
+
+
+async def mark_interrupted_jobs() -> int:
+    """啟動時呼叫：上次程序結束時仍在排隊 / 執行中的工作標記為 interrupted"""
+    async with aiosqlite.connect(DB_PATH, timeout=30) as db:
+        cursor = await db.execute(
+            """
+            UPDATE job_run SET status = 'interrupted', finished_at = ?
+            WHERE status IN ('queued', 'running')
+            """,
+            (int(time.time()),),
+        )
+        await db.commit()
+        return cursor.rowcount
@@ -0,0 +1,140 @@
+"""
+快取更新事件廣播模組（SSE fan-out + long-poll）
+排程 job 寫入新資料後發佈 {source, version, updated_at} 事件，
+每個訂閱者持有自己的有界佇列，publish 只做 put_nowait，不會被慢連線拖住；
+佇列塞滿代表該訂閱者跟不上，直接斷開（client 端 EventSource 會自動重連）
+long-poll 請求則停在該來源的 asyncio.Event 上，版本變動時一次喚醒
+"""
+import asyncio
+import json
+import time
+
+QUEUE_SIZE = 16          # 每個訂閱者最多積壓的事件數
+HEARTBEAT_SECONDS = 25   # 閒置時送註解行，避免 proxy 切斷連線
+
+
+class Subscriber:
+    """單一 SSE 連線的訂閱狀態"""
+
+    def __init__(self, sources: set[str] | None, with_diff: bool, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.sources = sources
+        self.with_diff = with_diff
+        self.dropped = False
+
+    def wants(self, source: str) -> bool:
+        return self.sources is None or source in self.sources
+
+
+class Broadcaster:
+    """維護各來源版本號，並把更新事件扇出給所有訂閱者"""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: set[Subscriber] = set()
+        self._versions: dict[str, int] = {}
+        self._updated_at: dict[str, int] = {}
+        self._changed: dict[str, asyncio.Event] = {}
+        self.dropped_count = 0
+
+    def subscribe(self, sources: set[str] | None = None, with_diff: bool = False) -> Subscriber:
+        sub = Subscriber(sources, with_diff, self._queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+
+    def version(self, source: str) -> int:
+        return self._versions.get(source, 0)
+
+    def snapshot(self) -> dict:
+        """目前所有來源的 {version, updated_at}"""
+        return {
+            src: {"version": v, "updated_at": self._updated_at.get(src, 0)}
+            for src, v in self._versions.items()
+        }
+
+    def publish(self, source: str, updated_at: int | None = None, diff: dict | None = None) -> dict:
+        """遞增來源版本號並推送事件；回傳事件內容"""
+        version = self._versions.get(source, 0) + 1
+        self._versions[source] = version
+        self._updated_at[source] = int(updated_at or time.time())
+        event = {"source": source, "version": version, "updated_at": self._updated_at[source]}
+
+        # 喚醒所有等待此來源的 long-poll，並換上新的 Event 給下一輪
+        waiter = self._changed.pop(source, None)
+        if waiter is not None:
+            waiter.set()
+
+        for sub in list(self._subscribers):
+            if not sub.wants(source):
+                continue
+            messages = [("update", event)]
+            if diff is not None and sub.with_diff:
+                messages.append(("diff", {"source": source, "version": version, **diff}))
+            try:
+                for msg in messages:
+                    sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                self._drop(sub)
+        return event
+
+    async def wait_for_version(self, source: str, since_version: int, timeout: float) -> bool:
+        """
+        等到來源版本不等於 since_version 或逾時
+        回傳 True 表示有新版本（含伺服器重啟後版本號歸零的情況）
+        """
+        while self.version(source) == since_version:
+            waiter = self._changed.setdefault(source, asyncio.Event())
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return self.version(source) != since_version
+        return True
+
+    def _drop(self, sub: Subscriber):
+        """慢消費者：清空佇列後放入結束訊號，讓串流自行關閉"""
+        self._subscribers.discard(sub)
+        sub.dropped = True
+        self.dropped_count += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "dropped": self.dropped_count}
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream(bc: "Broadcaster", sub: Subscriber, heartbeat: float = HEARTBEAT_SECONDS):
+    """SSE 串流產生器：先送目前版本快照，之後逐一轉送事件"""
+    try:
+        yield format_sse("hello", bc.snapshot())
+        while True:
+            try:
+                msg = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if msg is None:
+                break
+            yield format_sse(*msg)
+    finally:
+        bc.unsubscribe(sub)
+
+
+def diff_by_key(old: list[dict], new: list[dict], key: str) -> dict:
+    """比較新舊清單，回傳 {added, removed}（以 key 欄位比對）"""
+    old_keys = {str(it.get(key)) for it in old or [] if it.get(key) is not None}
+    new_keys = [str(it.get(key)) for it in new or [] if it.get(key) is not None]
+    return {
+        "added": [k for k in new_keys if k not in old_keys],
+        "removed": sorted(old_keys - set(new_keys)),
+    }
+
+
+broadcaster = Broadcaster()
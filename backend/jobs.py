@@ -0,0 +1,127 @@
+"""
+背景工作模組 — 長時間工作（如每周摘要重新整理）改為提交後立即回傳 job id，再以狀態端點輪詢
+- 同一種類（kind）同時只會有一個工作排隊 / 執行中；重複提交直接回傳進行中的那一個（deduplicated）
+- 工作紀錄寫入 SQLite（database.job_run），程序重啟後仍可查詢；重啟前未完成的標記為 interrupted
+- 進度以 report(group, name, status, items) 回報（如 遊戲 × 來源），寫入紀錄最多每 PERSIST_INTERVAL 秒一次
+狀態：queued → running → succeeded | failed；重啟時未完成者為 interrupted
+"""
+import asyncio
+import time
+import uuid
+
+import database
+
+PERSIST_INTERVAL = 2.0   # 進度寫回 DB 的最短間隔（秒）
+ACTIVE = ("queued", "running")
+
+
+class JobProgress:
+    """{group: {name: {"status", "items"}}} 與各狀態計數"""
+
+    def __init__(self):
+        self.tasks: dict[str, dict[str, dict]] = {}
+
+    def report(self, group: str, name: str, status: str, items: int | None = None):
+        self.tasks.setdefault(group, {})[name] = {"status": status, "items": items}
+
+    def snapshot(self) -> dict:
+        counts: dict[str, int] = {}
+        for entries in self.tasks.values():
+            for entry in entries.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {"total": sum(counts.values()), "counts": counts, "tasks": self.tasks}
+
+
+class JobManager:
+    def __init__(self, persist_interval: float = PERSIST_INTERVAL):
+        self.persist_interval = persist_interval
+        self._active: dict[str, dict] = {}            # kind → 進行中的工作紀錄
+        self._tasks: dict[str, asyncio.Task] = {}     # job id → asyncio.Task
+
+    async def recover(self) -> int:
+        """啟動時呼叫：把上次未完成的工作標記為 interrupted"""
+        count = await database.mark_interrupted_jobs()
+        if count:
+            print(f"[Jobs] Marked {count} unfinished job(s) as interrupted")
+        return count
+
+    async def submit(self, kind: str, func, params: dict | None = None,
+                     timeout: float | None = None) -> tuple[dict, bool]:
+        """
+        提交工作：func(report=..., **params) 為 coroutine function，回傳值存為 result（需可 JSON 序列化）
+        回傳 (工作紀錄, 是否為重複提交)；同種類已有進行中的工作時不另開新工作
+        """
+        active = self._active.get(kind)
+        if active is not None and active["status"] in ACTIVE:
+            return dict(active), True
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "params": params or {},
+            "progress": JobProgress().snapshot(),
+            "result": None,
+            "error": None,
+            "created_at": int(time.time()),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._active[kind] = job
+        await database.save_job(job)
+        self._tasks[job["id"]] = asyncio.get_running_loop().create_task(self._run(job, func, timeout))
+        return dict(job), False
+
+    async def _run(self, job: dict, func, timeout: float | None):
+        progress = JobProgress()
+        last_persist = 0.0
+        pending_write: asyncio.Task | None = None
+
+        def report(group: str, name: str, status: str, items: int | None = None):
+            nonlocal last_persist, pending_write
+            progress.report(group, name, status, items)
+            job["progress"] = progress.snapshot()
+            now = time.monotonic()
+            if now - last_persist >= self.persist_interval and (pending_write is None or pending_write.done()):
+                last_persist = now
+                pending_write = asyncio.get_running_loop().create_task(database.save_job(job))
+
+        job["status"] = "running"
+        job["started_at"] = int(time.time())
+        await database.save_job(job)
+        try:
+            job["result"] = await asyncio.wait_for(func(report=report, **job["params"]), timeout=timeout)
+            job["status"] = "succeeded"
+        except asyncio.TimeoutError:
+            job["status"] = "failed"
+            job["error"] = f"timeout after {timeout}s"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e) or type(e).__name__
+        finally:
+            job["finished_at"] = int(time.time())
+            job["progress"] = progress.snapshot()
+            if pending_write is not None:
+                await asyncio.gather(pending_write, return_exceptions=True)
+            await database.save_job(job)
+            self._tasks.pop(job["id"], None)
+            print(f"[Jobs] {job['kind']} {job['id']} {job['status']} "
+                  f"in {job['finished_at'] - job['started_at']}s")
+        return job
+
+    async def wait(self, job_id: str) -> dict | None:
+        """等待工作結束並回傳最終紀錄（非本程序的工作直接回傳 DB 紀錄）"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> dict | None:
+        """進行中的工作讀記憶體（進度最新），其餘讀 DB"""
+        for job in self._active.values():
+            if job["id"] == job_id and job["status"] in ACTIVE:
+                return dict(job)
+        return await database.get_job(job_id)
+
+
+manager = JobManager()
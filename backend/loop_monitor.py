@@ -0,0 +1,54 @@
+"""
+事件循環延遲監測 — 週期性 sleep(INTERVAL)，實際醒來時間與預期的差距即為 loop lag
+- 解析、JSON 序列化等同步工作卡住事件循環時，所有進行中的 API 請求都會一起延遲這麼久
+- 保留最近 WINDOW 筆樣本，/api/health 回報 avg / p99 / max
+- 排程任務結束時以 max_since(開始時間) 記錄該任務期間的最大延遲，方便對照 PARSE_MODE=inline 與 pool
+"""
+import asyncio
+import time
+from collections import deque
+
+INTERVAL = 0.5
+WINDOW = 600  # 約 5 分鐘
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = INTERVAL, window: int = WINDOW):
+        self.interval = interval
+        self._samples: deque[tuple[float, float]] = deque(maxlen=window)  # (時間, lag 秒)
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._samples.append((now, max(0.0, now - expected)))
+
+    def max_since(self, since: float) -> float:
+        """since（perf_counter 時間）之後的最大延遲（秒）"""
+        return max((lag for ts, lag in self._samples if ts >= since), default=0.0)
+
+    def stats(self) -> dict:
+        lags = sorted(lag for _, lag in self._samples)
+        if not lags:
+            return {"samples": 0, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        return {
+            "samples": len(lags),
+            "avg_ms": round(sum(lags) / len(lags) * 1000, 1),
+            "p99_ms": round(p99 * 1000, 1),
+            "max_ms": round(lags[-1] * 1000, 1),
+        }
+
+
+monitor = LoopLagMonitor()
@@ -10,7 +10,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
 
@@ -25,9 +25,12 @@ class SourceEnum(str, Enum):
     twitch = "twitch"
 
 
-from scrapers import steam_scraper, twitch_scraper, discussion_scraper, news_scraper, mobile_scraper, weekly_digest_scraper
-from scheduler import start_scheduler, stop_scheduler
+from scrapers import steam_scraper, twitch_scraper, discussion_scraper, board_watch, news_scraper, mobile_scraper, weekly_digest_scraper, parsing, sentiment
+from scheduler import start_scheduler, stop_scheduler, submit_weekly_digest
 import database
+import events
+import jobs
+import loop_monitor
 import predictor
 
 logger = logging.getLogger("gameinfo")
@@ -37,9 +40,13 @@ logger = logging.getLogger("gameinfo")
 async def lifespan(app: FastAPI):
     """啟動/關閉排程器"""
     await database.init_db()
+    await jobs.manager.recover()
     start_scheduler()
+    loop_monitor.monitor.start()
     yield
+    loop_monitor.monitor.stop()
     stop_scheduler()
+    parsing.shutdown()
 
 
 app = FastAPI(
@@ -66,6 +73,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Version"],
 )
 
 
@@ -93,13 +101,39 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+# ============================================================
+# Long-poll：?since_version=N&wait=S（給無法使用 SSE 的 client）
+# ============================================================
+
+async def _wait_for_update(source: str, since_version: int, wait: float, load_data, label: str):
+    """停在來源的版本事件上，直到版本超過 N（回傳快取內容）或逾時（回 304）"""
+    changed = await events.broadcaster.wait_for_version(source, since_version, wait)
+    version = events.broadcaster.version(source)
+    headers = {"X-Data-Version": str(version)}
+    if not changed:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(
+        content={"data": load_data(), "source": label, "version": version},
+        headers=headers,
+    )
+
+
+_SINCE_VERSION = Query(default=None, ge=0, description="已持有的資料版本；提供時改為 long-poll 模式")
+_WAIT = Query(default=30, ge=0, le=60, description="long-poll 最長等待秒數")
+
+
 # ============================================================
 # Phase 1 端點：Steam / Twitch / 討論聲量
 # ============================================================
 
 @app.get("/api/steam/top-games", tags=["Steam"])
-async def get_steam_top_games():
+async def get_steam_top_games(since_version: int | None = _SINCE_VERSION, wait: float = _WAIT):
     """Steam 最熱門遊戲排行 + 同時在線人數"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "steam", since_version, wait,
+            lambda: steam_scraper.load_cache().get("games", []), "Steam Web API",
+        )
     try:
         games = await steam_scraper.fetch_top_games()
         return {"data": games, "source": "Steam Web API"}
@@ -126,8 +160,13 @@ async def get_steam_player_count(appid: int):
 
 
 @app.get("/api/twitch/top-games", tags=["Twitch"])
-async def get_twitch_top_games():
+async def get_twitch_top_games(since_version: int | None = _SINCE_VERSION, wait: float = _WAIT):
     """Twitch 最熱門遊戲直播排行"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "twitch", since_version, wait,
+            lambda: twitch_scraper.load_cache().get("games", []), "Twitch Helix API",
+        )
     try:
         games = await twitch_scraper.fetch_top_games()
         return {"data": games, "source": "Twitch Helix API"}
@@ -140,8 +179,13 @@ async def get_twitch_top_games():
 
 
 @app.get("/api/discussions", tags=["討論聲量"])
-async def get_discussions():
+async def get_discussions(since_version: int | None = _SINCE_VERSION, wait: float = _WAIT):
     """巴哈姆特 + PTT + 遊戲大亂鬥 熱門話題聚合"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "discussions", since_version, wait,
+            discussion_scraper.load_cache, "巴哈姆特/PTT/遊戲大亂鬥",
+        )
     try:
         data = await discussion_scraper.fetch_all_discussions()
         return {"data": data, "source": "巴哈姆特/PTT/遊戲大亂鬥"}
@@ -153,13 +197,56 @@ async def get_discussions():
         )
 
 
+@app.get("/api/discussions/sentiment-trend", tags=["討論聲量"])
+async def get_discussion_sentiment_trend(
+    scope: str = Query(default="game", pattern=r"^(board|game)$", description="board | game"),
+    key: str | None = Query(default=None, max_length=100,
+                            description="遊戲名或版面（ptt:<版名> / bahamut:<bsn>）；不帶時列出有資料的項目"),
+    hours: int = Query(default=168, ge=1, le=720, description="回溯小時數"),
+    step: str = Query(default="hour", pattern=r"^(hour|day)$", description="hour | day"),
+):
+    """版面 / 遊戲的討論情緒趨勢（讀每小時彙總桶，不重新判斷標題）"""
+    try:
+        if key is None:
+            data = await discussion_scraper.sentiment_keys(scope, hours)
+        else:
+            data = await discussion_scraper.sentiment_trend(scope, key, hours, step)
+        return {"data": data, "source": "巴哈姆特/PTT"}
+    except Exception as e:
+        logger.error("[Discussion] sentiment-trend endpoint failed: %s", e)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "database_error", "message": "情緒趨勢資料暫時無法取得"},
+        )
+
+
 # ============================================================
 # Phase 2 端點：即時新聞 / 手遊排行
 # ============================================================
 
 @app.get("/api/news", tags=["即時新聞"])
-async def get_news():
-    """聚合遊戲新聞（巴哈GNN + 4Gamers + UDN 遊戲角落），上限 100 條"""
+async def get_news(
+    since_version: int | None = _SINCE_VERSION,
+    wait: float = _WAIT,
+    cursor: str | None = Query(default=None, description="上一頁回傳的 next_cursor（published_at|id）"),
+    limit: int | None = Query(default=None, ge=1, le=100, description="每頁筆數"),
+    fields: str | None = Query(default=None, description="逗號分隔的欄位投影，如 id,title,url"),
+    source: str | None = Query(default=None, description="只取指定來源，如 巴哈姆特 GNN"),
+):
+    """聚合遊戲新聞（巴哈GNN + 4Gamers + UDN 遊戲角落），上限 100 條
+    帶 cursor/limit/fields/source 任一參數時改由快取索引分頁查詢，不觸發爬取"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "news", since_version, wait, news_scraper.load_cache, "GNN/4Gamer/UDN",
+        )
+    if any(p is not None for p in (cursor, limit, fields, source)):
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        try:
+            data = news_scraper.query_news(cursor=cursor, limit=limit or 20,
+                                           fields=field_list, source=source)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {"data": data, "source": "GNN/4Gamer/UDN"}
     try:
         data = await news_scraper.aggregate_news()
         return {"data": data, "source": "GNN/4Gamer/UDN"}
@@ -171,6 +258,26 @@ async def get_news():
         )
 
 
+@app.get("/api/news/search", tags=["即時新聞"])
+async def search_news(
+    q: str = Query(min_length=1, max_length=100, description="搜尋關鍵字，空白分隔為 AND"),
+    since: str | None = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="起始日期 YYYY-MM-DD"),
+    until: str | None = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="結束日期 YYYY-MM-DD（含）"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=10000),
+):
+    """全文搜尋新聞封存（標題 + 摘要，依相關度排序）"""
+    try:
+        data = await database.search_news(q, since=since, until=until, limit=limit, offset=offset)
+        return {"data": data, "query": q, "source": "news_archive"}
+    except Exception as e:
+        logger.error("[News] search endpoint failed: %s", e)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "database_error", "message": "新聞搜尋暫時無法使用"},
+        )
+
+
 @app.get("/api/mobile/ios", tags=["手遊排行"])
 async def get_mobile_ios():
     """App Store (iOS) 遊戲排行 — 免費 + 暢銷"""
@@ -201,8 +308,12 @@ async def get_mobile_android():
 
 
 @app.get("/api/mobile/all", tags=["手遊排行"])
-async def get_mobile_all():
+async def get_mobile_all(since_version: int | None = _SINCE_VERSION, wait: float = _WAIT):
     """iOS + Android 全部手遊排行"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "mobile", since_version, wait, mobile_scraper.load_cache, "App Store + Google Play",
+        )
     try:
         data = await mobile_scraper.fetch_all_mobile()
         return {"data": data, "source": "App Store + Google Play"}
@@ -246,10 +357,15 @@ async def get_history(
 # ============================================================
 
 @app.get("/api/weekly-digest", tags=["每周摘要"])
-async def get_weekly_digest():
+async def get_weekly_digest(since_version: int | None = _SINCE_VERSION, wait: float = _WAIT):
     """每周遊戲行銷摘要（廣告/活動/聯名），只讀快取（由排程更新）"""
+    if since_version is not None:
+        return await _wait_for_update(
+            "weekly_digest", since_version, wait,
+            weekly_digest_scraper.load_cache, "Google News/4Gamers/YouTube/巴哈板",
+        )
     try:
-        data = weekly_digest_scraper._load_cache()
+        data = weekly_digest_scraper.load_cache()
         return {"data": data, "source": "Google News/4Gamers/YouTube/巴哈板"}
     except Exception as e:
         logger.error("[WeeklyDigest] cache read failed: %s", e)
@@ -262,20 +378,57 @@ async def get_weekly_digest():
 _REFRESH_SECRET = os.getenv("REFRESH_SECRET", "")
 
 
-@app.post("/api/weekly-digest/refresh", tags=["每周摘要"])
-async def refresh_weekly_digest(x_refresh_token: str = Header()):
-    """手動觸發重新生成每周行銷摘要（需 X-Refresh-Token header 認證）"""
+@app.post("/api/weekly-digest/refresh", tags=["每周摘要"], status_code=202)
+async def refresh_weekly_digest(
+    x_refresh_token: str = Header(),
+    full: bool = Query(default=False, description="忽略各來源水位，重查整個 14 天視窗"),
+):
+    """手動觸發重新生成每周行銷摘要（需 X-Refresh-Token header 認證）
+    立即回傳 job id，以 /api/weekly-digest/jobs/{job_id} 查詢進度；已有進行中的更新時回傳該工作"""
     if not _REFRESH_SECRET or x_refresh_token != _REFRESH_SECRET:
         raise HTTPException(status_code=403, detail="Invalid or missing refresh token")
     try:
-        data = await weekly_digest_scraper.fetch_weekly_digest()
-        return {"data": data, "source": "Google News/4Gamers/YouTube/巴哈板"}
+        job, deduplicated = await submit_weekly_digest(full=full)
     except Exception as e:
-        logger.error("[WeeklyDigest] refresh failed: %s", e)
+        logger.error("[WeeklyDigest] refresh submit failed: %s", e)
         return JSONResponse(
             status_code=503,
-            content={"error": "scraper_error", "message": "每周摘要更新失敗，請稍後再試"},
+            content={"error": "job_error", "message": "每周摘要更新工作無法建立，請稍後再試"},
         )
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "deduplicated": deduplicated,
+        "status_url": f"/api/weekly-digest/jobs/{job['id']}",
+    }
+
+
+@app.get("/api/weekly-digest/jobs/{job_id}", tags=["每周摘要"])
+async def get_weekly_digest_job(job_id: str):
+    """每周摘要更新工作狀態：status（queued / running / succeeded / failed / interrupted）與各遊戲 × 來源進度"""
+    job = await jobs.manager.get(job_id)
+    if job is None or job["kind"] != "weekly_digest":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"data": job}
+
+
+# ============================================================
+# 即時推播：快取更新事件（SSE）
+# ============================================================
+
+@app.get("/api/events", tags=["即時推播"])
+async def subscribe_events(
+    sources: str = Query(default="", description="逗號分隔的來源，空白代表全部"),
+    diff: bool = Query(default=False, description="是否在 update 事件後附帶 diff 事件"),
+):
+    """訂閱快取更新事件（text/event-stream），排程寫入新資料時推送 {source, version, updated_at}"""
+    wanted = {s.strip() for s in sources.split(",") if s.strip()} or None
+    sub = events.broadcaster.subscribe(wanted, with_diff=diff)
+    return StreamingResponse(
+        events.stream(events.broadcaster, sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ============================================================
@@ -293,14 +446,25 @@ async def root():
             "steam": "/api/steam/top-games",
             "twitch": "/api/twitch/top-games",
             "discussions": "/api/discussions",
+            "discussion_sentiment_trend": "/api/discussions/sentiment-trend",
             "news": "/api/news",
+            "news_search": "/api/news/search",
             "mobile_ios": "/api/mobile/ios",
             "mobile_android": "/api/mobile/android",
             "weekly_digest": "/api/weekly-digest",
+            "events": "/api/events",
         }
     }
 
 
 @app.get("/api/health", tags=["系統"])
 async def health_check():
-    return {"status": "ok", "message": "GameInfo System is running"}
+    return {
+        "status": "ok",
+        "message": "GameInfo System is running",
+        "events": events.broadcaster.stats(),
+        "loop_lag": loop_monitor.monitor.stats(),
+        "parsing": parsing.stats(),
+        "boards": board_watch.stats(),
+        "sentiment_memo": sentiment.memo_stats(),
+    }
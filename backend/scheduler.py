@@ -3,22 +3,28 @@ APScheduler 定時排程（AsyncIOScheduler）
 共用 FastAPI 的事件循環，避免多執行緒 + asyncio.run() 的問題
 - Steam / 新聞：每 30 分鐘
 - Twitch：每 15 分鐘
-- 巴哈/PTT 討論：每 60 分鐘
+- 巴哈/PTT 討論：整站排行頁每 30 分鐘抓取；追蹤版面依分片週期（board_watch）抓取；
+  熱門文章推文每 10 分鐘（只重抓有新推文的文章）；每 10 分鐘從共用儲存組裝一次（不做即時抓取）；每日 04:00 依觀測活躍度重新分片
 - 手遊排行：每 180 分鐘
-- 每周行銷摘要：每周一 06:00
+- 每周行銷摘要：每日 06:00 增量更新（只查各來源水位之後的新項目，摘要為近 14 天的 item store 查詢）
 - DB 清理：每日 03:00
 """
 import asyncio
+import time
 from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from scrapers import steam_scraper, twitch_scraper, discussion_scraper, news_scraper, mobile_scraper, weekly_digest_scraper
+from scrapers import steam_scraper, twitch_scraper, discussion_scraper, board_watch, ptt_comments, news_scraper, mobile_scraper, weekly_digest_scraper
 import database
+import jobs
+from events import broadcaster, diff_by_key
+from loop_monitor import monitor
 
 scheduler = AsyncIOScheduler()
 
 
 async def _run_with_timeout(coro, timeout, label):
-    """執行 async 任務，加 timeout 保護"""
+    """執行 async 任務，加 timeout 保護；結束時記錄耗時與期間最大 loop lag"""
+    start = time.perf_counter()
     try:
         return await asyncio.wait_for(coro, timeout=timeout)
     except asyncio.TimeoutError:
@@ -27,10 +33,21 @@ async def _run_with_timeout(coro, timeout, label):
     except Exception as e:
         print(f"[Scheduler] {label} error: {e}")
         return None
+    finally:
+        print(
+            f"[Scheduler] {label} took {time.perf_counter() - start:.1f}s, "
+            f"max loop lag {monitor.max_since(start) * 1000:.0f}ms"
+        )
+
+
+def _refreshed(prev: dict, current: dict) -> bool:
+    """快取的 updated_at 有前進才是重新抓到的資料；上游失敗時 scraper 回傳的舊快取 / demo 資料不推播"""
+    return bool(current.get("updated_at")) and current.get("updated_at") != prev.get("updated_at")
 
 
 async def update_steam():
     print("[Scheduler] Updating Steam data...")
+    prev = steam_scraper.load_cache()
     games = await _run_with_timeout(
         steam_scraper.fetch_top_games(), timeout=60, label="Steam"
     )
@@ -39,10 +56,13 @@ async def update_steam():
             await database.save_snapshot(
                 "steam", str(game["appid"]), game["name"], game["current_players"]
             )
+        if _refreshed(prev, steam_scraper.load_cache()):
+            broadcaster.publish("steam")
 
 
 async def update_twitch():
     print("[Scheduler] Updating Twitch data...")
+    prev = twitch_scraper.load_cache()
     games = await _run_with_timeout(
         twitch_scraper.fetch_top_games(), timeout=45, label="Twitch"
     )
@@ -52,34 +72,90 @@ async def update_twitch():
                 await database.save_snapshot(
                     "twitch", str(game["id"]), game["name"], game["viewer_count"]
                 )
+        if _refreshed(prev, twitch_scraper.load_cache()):
+            broadcaster.publish("twitch", diff=diff_by_key(prev.get("games", []), games, "id"))
+
+
+async def update_discussion_pages():
+    print("[Scheduler] Updating discussion pages...")
+    await _run_with_timeout(
+        discussion_scraper.refresh_site_pages(), timeout=60, label="DiscussionPages"
+    )
+
+
+async def update_ptt_comments():
+    print("[Scheduler] Updating PTT comments...")
+    await _run_with_timeout(
+        ptt_comments.refresh_top_comments(), timeout=60, label="PTTComments"
+    )
+
+
+async def reshard_boards():
+    print("[Scheduler] Resharding watched boards...")
+    await _run_with_timeout(
+        board_watch.reschedule(scheduler), timeout=30, label="BoardReshard"
+    )
 
 
 async def update_discussions():
     print("[Scheduler] Updating discussions...")
-    await _run_with_timeout(
-        discussion_scraper.fetch_all_discussions(), timeout=90, label="Discussions"
+    data = await _run_with_timeout(
+        discussion_scraper.fetch_all_discussions(), timeout=30, label="Discussions"
     )
+    if data:
+        broadcaster.publish("discussions", updated_at=data.get("updated_at"))
 
 
 async def update_news():
     print("[Scheduler] Updating news...")
-    await _run_with_timeout(
+    prev = news_scraper.load_cache()
+    data = await _run_with_timeout(
         news_scraper.aggregate_news(), timeout=60, label="News"
     )
+    # 上游沒變動時 aggregate_news 直接回傳舊快取，不需推播
+    if data and data.get("updated_at") != prev.get("updated_at"):
+        broadcaster.publish(
+            "news", updated_at=data.get("updated_at"),
+            diff=diff_by_key(prev.get("news", []), data.get("news", []), "id"),
+        )
 
 
 async def update_mobile():
     print("[Scheduler] Updating mobile rankings...")
-    await _run_with_timeout(
+    prev = mobile_scraper.load_cache()
+    data = await _run_with_timeout(
         mobile_scraper.fetch_all_mobile(), timeout=120, label="Mobile"
     )
+    # 排行沒變動時 fetch_all_mobile 直接回傳舊快取，不需推播
+    if data and data.get("updated_at") != prev.get("updated_at"):
+        broadcaster.publish("mobile", updated_at=data.get("updated_at"))
+
+
+async def _weekly_digest_job(report, full: bool = False) -> dict:
+    """背景工作本體：更新摘要並推播，工作紀錄只存摘要統計"""
+    data = await weekly_digest_scraper.fetch_weekly_digest(full=full, progress=report)
+    if data:
+        broadcaster.publish("weekly_digest", updated_at=data.get("updated_at"))
+    return {
+        "game_count": data.get("game_count", 0),
+        "total_items": data.get("total_items", 0),
+        "updated_at": data.get("updated_at"),
+    }
+
+
+async def submit_weekly_digest(full: bool = False) -> tuple[dict, bool]:
+    """排程與手動觸發共用：同時只會有一個摘要更新工作，重複提交回傳進行中的工作"""
+    return await jobs.manager.submit(
+        "weekly_digest", _weekly_digest_job, params={"full": full}, timeout=300,
+    )
 
 
 async def update_weekly_digest():
     print("[Scheduler] Updating weekly digest...")
-    await _run_with_timeout(
-        weekly_digest_scraper.fetch_weekly_digest(), timeout=300, label="WeeklyDigest"
-    )
+    job, deduplicated = await submit_weekly_digest()
+    if deduplicated:
+        print(f"[Scheduler] Weekly digest job {job['id']} already running, waiting for it")
+    await jobs.manager.wait(job["id"])
 
 
 async def cleanup_db():
@@ -101,6 +177,7 @@ async def _init_weekly_digest():
         await update_mobile()
     if not os.path.exists(disc_cache):
         print("[Scheduler] Init: fetching discussion data first...")
+        await update_discussion_pages()
         await update_discussions()
 
     print("[Scheduler] Init: now fetching weekly digest...")
@@ -118,11 +195,20 @@ def start_scheduler():
                       next_run_time=now + timedelta(minutes=2), replace_existing=True)
     scheduler.add_job(update_news, "interval", minutes=30, id="news",
                       next_run_time=now + timedelta(minutes=4), replace_existing=True)
-    scheduler.add_job(update_discussions, "interval", minutes=60, id="discussions",
+    scheduler.add_job(update_discussion_pages, "interval", minutes=30, id="discussion_pages",
+                      next_run_time=now + timedelta(minutes=5), replace_existing=True)
+    scheduler.add_job(update_discussions, "interval", minutes=10, id="discussions",
                       next_run_time=now + timedelta(minutes=6), replace_existing=True)
+    scheduler.add_job(update_ptt_comments, "interval", minutes=10, id="ptt_comments",
+                      next_run_time=now + timedelta(minutes=8), replace_existing=True)
+    # 追蹤版面分片：啟動時排一次（各分片再自行錯開），之後每日依觀測活躍度重新分片
+    scheduler.add_job(reshard_boards, id="board_reshard_init",
+                      next_run_time=now + timedelta(seconds=30), replace_existing=True)
+    scheduler.add_job(reshard_boards, "cron", hour=4, minute=0,
+                      id="board_reshard", replace_existing=True)
     scheduler.add_job(update_mobile, "interval", minutes=180, id="mobile",
                       next_run_time=now + timedelta(minutes=10), replace_existing=True)
-    scheduler.add_job(update_weekly_digest, "cron", day_of_week="mon", hour=6, minute=0,
+    scheduler.add_job(update_weekly_digest, "cron", hour=6, minute=0,
                       id="weekly_digest", replace_existing=True)
     scheduler.add_job(cleanup_db, "cron", hour=3, minute=0,
                       id="db_cleanup", replace_existing=True)
@@ -146,7 +232,7 @@ def start_scheduler():
                           next_run_time=now + timedelta(minutes=12), replace_existing=True)
         print("[Scheduler] Weekly digest init queued (will run after 12min)")
 
-    print("[Scheduler] Started (AsyncIO) - Steam:10s, Twitch:2min, News:4min, Discussions:6min, Mobile:10min")
+    print("[Scheduler] Started (AsyncIO) - Steam:10s, Twitch:2min, News:4min, DiscussionPages:5min, Discussions:6min, Boards:30s+staggered, Mobile:10min")
 
 
 def stop_scheduler():
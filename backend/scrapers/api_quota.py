@@ -0,0 +1,105 @@
+"""
+配額 API 預算模組 — YouTube Data API / Google Custom Search 的每日配額帳本 + 持久回應快取
+- 帳本：每個 API 每個配額日（太平洋時間，Google 配額於當地午夜重置）已用單位存在 SQLite（database.api_quota），
+  每送出一次查詢就記帳（不論成功與否，Google 同樣計費）
+- 預算：每次執行開始時讀取剩餘配額，依遊戲優先順序（排名高者先）整批配給每個遊戲所需的查詢次數；
+  配不到的遊戲查詢時 raise QuotaExhausted（該來源水位不前進，下次配額重置後再補）
+- 快取：回應以 (API, 查詢字串, 日期視窗) 為鍵存在 SQLite（database.api_response），
+  RESPONSE_TTL 內的重複查詢（含手動重新整理）直接讀快取，不耗配額、也不需要配額
+- 上游回 403 quotaExceeded（帳本與實際用量不同步，如其他程式共用金鑰）時，本次執行停止該 API 的所有查詢
+端點可改指本機替身伺服器（tests/api_standin.py）離線測試
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+import database
+
+QUOTA_TZ = timezone(timedelta(hours=-8))  # 太平洋標準時間（不處理夏令時間，重置時間最多差一小時）
+
+# API → 每日配額與每次查詢成本（YouTube search.list 每次 100 單位；CSE 免費方案每日 100 次）
+API_QUOTAS = {
+    "youtube": {"daily": int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")), "cost": 100},
+    "google_cse": {"daily": int(os.getenv("GOOGLE_CSE_DAILY_QUOTA", "100")), "cost": 1},
+}
+RESPONSE_TTL = int(os.getenv("API_RESPONSE_TTL", str(12 * 3600)))  # 秒
+
+_QUOTA_ERRORS = ("quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded")
+
+
+class QuotaExhausted(Exception):
+    """本次執行沒有配給該遊戲（或該 API 已被上游拒絕）的查詢"""
+
+
+def quota_day(now: float | None = None) -> str:
+    return datetime.fromtimestamp(time.time() if now is None else now, QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class QuotaBudget:
+    """單次執行的配額預算：plan() 依優先順序配給查詢次數，get_json() 先查快取再扣配額查詢"""
+
+    def __init__(self, quotas: dict[str, dict] | None = None):
+        self.quotas = API_QUOTAS if quotas is None else quotas
+        self.day = quota_day()
+        self._allowance: dict[tuple[str, str], int] = {}   # (api, 遊戲) → 剩餘可查詢次數
+        self.stats = {api: {"remaining": 0, "calls": 0, "cached": 0, "skipped": 0} for api in self.quotas}
+
+    async def plan(self, games: list[str], calls: dict[str, int]) -> dict[str, list[str]]:
+        """
+        games 依優先順序排列，calls 為 {api: 每個遊戲需要的查詢次數}
+        剩餘配額足夠時整批配給，不足的遊戲（及其後所有遊戲）本次不查；回傳 {api: 沒配到的遊戲}
+        """
+        unplanned = {}
+        for api, per_game in calls.items():
+            quota = self.quotas[api]
+            used = await database.get_api_quota_used(api, self.day)
+            left = max(0, quota["daily"] - used) // quota["cost"]
+            self.stats[api]["remaining"] = left
+            unplanned[api] = []
+            for game in games:
+                if left >= per_game:
+                    self._allowance[(api, game)] = per_game
+                    left -= per_game
+                else:
+                    left = 0
+                    unplanned[api].append(game)
+        return unplanned
+
+    def _exhaust(self, api: str):
+        for key in self._allowance:
+            if key[0] == api:
+                self._allowance[key] = 0
+
+    async def get_json(self, client: httpx.AsyncClient, api: str, game: str, url: str,
+                       params: dict, query: str, window: str) -> tuple[int, dict | None]:
+        """(狀態碼, JSON)：快取命中回 200；未配給配額時 raise QuotaExhausted；非 200 不快取"""
+        cached = await database.get_api_response(api, query, window)
+        if cached is not None:
+            self.stats[api]["cached"] += 1
+            return 200, cached
+        if self._allowance.get((api, game), 0) <= 0:
+            self.stats[api]["skipped"] += 1
+            raise QuotaExhausted(f"{api} quota not allotted for {game}")
+
+        self._allowance[(api, game)] -= 1
+        self.stats[api]["calls"] += 1
+        await database.add_api_quota_used(api, self.day, self.quotas[api]["cost"])
+        resp = await client.get(url, params=params, timeout=15)
+        if resp.status_code != 200:
+            if resp.status_code == 403 and any(reason in resp.text for reason in _QUOTA_ERRORS):
+                self._exhaust(api)
+            return resp.status_code, None
+        data = resp.json()
+        await database.save_api_response(api, query, window, data, RESPONSE_TTL)
+        return 200, data
+
+
+async def get_json(client: httpx.AsyncClient, budget: QuotaBudget | None, api: str, game: str, url: str,
+                   params: dict, query: str, window: str) -> tuple[int, dict | None]:
+    """有預算時走帳本 + 快取；沒有（單獨呼叫來源函式）時直接查詢"""
+    if budget is not None:
+        return await budget.get_json(client, api, game, url, params, query, window)
+    resp = await client.get(url, params=params, timeout=15)
+    return resp.status_code, (resp.json() if resp.status_code == 200 else None)
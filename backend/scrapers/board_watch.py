@@ -0,0 +1,224 @@
+"""
+PTT / 巴哈版面追蹤清單 — 設定檔驅動 + 分片排程
+- 追蹤清單在 backend/boards.json（可用 BOARDS_FILE 覆寫路徑），每個版面附 activity（預估每小時新文章數）；
+  game 為版面對應的遊戲（情緒趨勢依遊戲彙總用；巴哈預設為版名，PTT 綜合版不填）
+- plan_shards：依活躍度排序後切成每片 shard_size 個版面（boards.json 的 defaults.shard_size，未設定為 SHARD_SIZE），活躍度相近的版面同一片、同一個刷新週期：
+  週期 ≈ 累積約一頁（PAGE_POSTS 篇）新文章所需時間，夾在 MIN_INTERVAL ~ MAX_INTERVAL 分鐘
+- 各分片首次執行時間錯開，分片內的版面也依週期平均間隔抓取，請求在整個小時內均勻分布
+- 有實際資料後，活躍度改用近 24 小時觀測值（PTT 發文數 / 巴哈新文章數），每日重新分片
+- 結果寫入共用儲存（PTT → ptt_article，巴哈 → bahamut_post），fetch_all_discussions 只讀不抓
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from bs4 import SoupStrainer
+
+import database
+from scrapers import parsing, ptt_crawler
+
+WATCHLIST_FILE = os.getenv("BOARDS_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "boards.json",
+)
+
+HEADERS = ptt_crawler.HEADERS
+BAHAMUT_BOARD_URL = "https://forum.gamer.com.tw/B.php?bsn={bsn}"
+
+SHARD_SIZE = 8
+PAGE_POSTS = 20        # 一頁 index 約 20 篇
+MIN_INTERVAL = 10      # 分鐘
+MAX_INTERVAL = 120
+SPREAD = 0.5           # 分片內的請求平均分散在週期的前半段
+
+# 巴哈版面列表：每列含標題連結、GP 與回覆數
+BAHAMUT_ROWS = SoupStrainer("tr", class_=re.compile(r'(^|\s)b-list__row(\s|$)'))
+_NUM_RE = re.compile(r'\d+')
+
+_state = {"shards": [], "last_run": {}}
+
+
+def load_watchlist(path: str | None = None) -> list[dict]:
+    """讀取追蹤清單 → [{"site", "key", "name", "game", "activity"}]"""
+    with open(path or WATCHLIST_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = config.get("defaults", {})
+    default_activity = defaults.get("activity", 1)
+    boards = []
+    for b in config.get("ptt", []):
+        boards.append({"site": "ptt", "key": b["board"], "name": b["board"], "game": b.get("game"),
+                       "activity": b.get("activity", default_activity)})
+    for b in config.get("bahamut", []):
+        boards.append({"site": "bahamut", "key": str(b["bsn"]), "name": b["name"],
+                       "game": b.get("game", b["name"]),
+                       "activity": b.get("activity", default_activity)})
+    return boards
+
+
+def load_shard_size(path: str | None = None) -> int:
+    """追蹤清單 defaults.shard_size（未設定時為 SHARD_SIZE）"""
+    with open(path or WATCHLIST_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return int(config.get("defaults", {}).get("shard_size", SHARD_SIZE))
+
+
+def watched(site: str, path: str | None = None) -> list[dict]:
+    return [b for b in load_watchlist(path) if b["site"] == site]
+
+
+def _interval_for(activity: float) -> int:
+    if activity <= 0:
+        return MAX_INTERVAL
+    return int(min(MAX_INTERVAL, max(MIN_INTERVAL, PAGE_POSTS / activity * 60)))
+
+
+def plan_shards(boards: list[dict], shard_size: int = SHARD_SIZE) -> list[dict]:
+    """
+    依活躍度切分片並決定週期與錯開時間
+    回傳 [{"id", "boards", "interval"（分鐘）, "offset"（首次執行延遲秒數）, "spacing"（版面間隔秒數）}]
+    """
+    ordered = sorted(boards, key=lambda b: b["activity"], reverse=True)
+    shards = []
+    for i in range(0, len(ordered), shard_size):
+        chunk = ordered[i:i + shard_size]
+        avg = sum(b["activity"] for b in chunk) / len(chunk)
+        interval = _interval_for(avg)
+        shards.append({
+            "id": len(shards),
+            "boards": chunk,
+            "interval": interval,
+            "spacing": interval * 60 * SPREAD / len(chunk),
+        })
+    # 同週期的分片在週期內平均錯開；不同週期的分片各自從 0 起算
+    by_interval: dict[int, list[dict]] = {}
+    for shard in shards:
+        by_interval.setdefault(shard["interval"], []).append(shard)
+    for group in by_interval.values():
+        for n, shard in enumerate(group):
+            shard["offset"] = shard["interval"] * 60 * n / len(group)
+    return shards
+
+
+async def observed_activity(boards: list[dict]) -> list[dict]:
+    """以近 24 小時實際發文數（每小時）取代設定檔的預估值；沒有資料的版面沿用預估"""
+    since = int(time.time()) - 86400
+    counts = {
+        "ptt": await database.get_ptt_activity(since),
+        "bahamut": await database.get_bahamut_activity(since),
+    }
+    result = []
+    for b in boards:
+        count = counts[b["site"]].get(b["key"])
+        result.append({**b, "activity": count / 24 if count else b["activity"]})
+    return result
+
+
+# ============================================================
+# 巴哈版面列表
+# ============================================================
+
+def _extract_bahamut_board(soup) -> list[dict]:
+    posts = []
+    for row in soup.select("tr.b-list__row"):
+        link = row.select_one('[href*="C.php?bsn="]')
+        title_el = row.select_one(".b-list__main__title") or link
+        if not link or not title_el:
+            continue
+        title = title_el.get_text(strip=True)
+        if not title:
+            continue
+        href = link.get("href", "")
+        if not href.startswith("http"):
+            href = f"https://forum.gamer.com.tw/{href}"
+        gp_el = row.select_one(".b-list__summary__gp")
+        reply_el = row.select_one(".b-list__count__number span")
+        gp_match = _NUM_RE.search(gp_el.get_text()) if gp_el else None
+        reply_match = _NUM_RE.search(reply_el.get_text()) if reply_el else None
+        posts.append({
+            "title": title,
+            "url": href,
+            "gp": int(gp_match.group()) if gp_match else 0,
+            "replies": int(reply_match.group()) if reply_match else 0,
+        })
+    return posts
+
+
+async def refresh_bahamut_board(client: httpx.AsyncClient, bsn: str, name: str) -> int:
+    resp = await client.get(BAHAMUT_BOARD_URL.format(bsn=bsn), headers=HEADERS, timeout=15)
+    resp.raise_for_status()
+    posts = await parsing.parse_html(resp.text, _extract_bahamut_board, only=BAHAMUT_ROWS)
+    await database.save_bahamut_posts(bsn, name, posts)
+    return len(posts)
+
+
+# ============================================================
+# 分片刷新 + 排程
+# ============================================================
+
+async def refresh_shard(shard: dict, client: httpx.AsyncClient | None = None, spacing: float | None = None) -> dict:
+    """依序刷新分片內每個版面，版面之間間隔 spacing 秒；單一版面失敗不影響其他版"""
+    spacing = shard["spacing"] if spacing is None else spacing
+    ok = 0
+
+    async def _run(http: httpx.AsyncClient):
+        nonlocal ok
+        for n, board in enumerate(shard["boards"]):
+            if n and spacing:
+                await asyncio.sleep(spacing)
+            try:
+                if board["site"] == "ptt":
+                    await ptt_crawler.crawl_board(http, board["key"])
+                else:
+                    await refresh_bahamut_board(http, board["key"], board["name"])
+                ok += 1
+            except Exception as e:
+                print(f"[BoardWatch] {board['site']}:{board['key']} error: {e}")
+
+    if client is not None:
+        await _run(client)
+    else:
+        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as http:
+            await _run(http)
+
+    _state["last_run"][shard["id"]] = int(time.time())
+    return {"shard": shard["id"], "boards": len(shard["boards"]), "ok": ok}
+
+
+async def reschedule(scheduler, boards: list[dict] | None = None, shard_size: int | None = None):
+    """依（觀測）活躍度重新分片，替換排程中的 board_shard_* job；shard_size 未指定時讀追蹤清單設定"""
+    boards = boards if boards is not None else load_watchlist()
+    shard_size = shard_size or load_shard_size()
+    try:
+        boards = await observed_activity(boards)
+    except Exception as e:
+        print(f"[BoardWatch] Activity lookup failed, using configured values: {e}")
+    shards = plan_shards(boards, shard_size)
+
+    for job in scheduler.get_jobs():
+        if job.id.startswith("board_shard_"):
+            job.remove()
+    now = datetime.now()
+    for shard in shards:
+        scheduler.add_job(
+            refresh_shard, "interval", minutes=shard["interval"], args=[shard],
+            id=f"board_shard_{shard['id']}", replace_existing=True,
+            next_run_time=now + timedelta(seconds=60 + shard["offset"]),
+        )
+    _state["shards"] = shards
+    print(f"[BoardWatch] {len(boards)} boards in {len(shards)} shards: "
+          + ", ".join(f"#{s['id']}={len(s['boards'])}@{s['interval']}m" for s in shards))
+    return shards
+
+
+def stats() -> dict:
+    return {
+        "boards": sum(len(s["boards"]) for s in _state["shards"]),
+        "shards": [
+            {"id": s["id"], "boards": len(s["boards"]), "interval_min": s["interval"],
+             "last_run": _state["last_run"].get(s["id"])}
+            for s in _state["shards"]
+        ],
+    }
@@ -3,59 +3,108 @@
 Tab 1: 巴哈姆特 Top 20 熱門討論版
 Tab 2: PTT 全站即時人氣熱門版 (hotboards)
 Tab 3: 巴哈姆特每版當天最熱文章 (含來源版名)
-Tab 4: PTT 遊戲版推文數最多文章
+Tab 4: PTT 遊戲版近 24 小時推文數最多文章（ptt_crawler 增量爬取 + SQLite 滾動視窗）
+       熱門前 20 篇另抓文章頁推文（ptt_comments），推 / 噓行數用於情緒分析
+抓取與組裝分開：refresh_site_pages 刷新整站排行頁、board_watch 分片刷新追蹤版面，都寫入 SQLite 共用儲存；
+fetch_all_discussions 只從共用儲存組裝，不做即時抓取
+巴哈首頁每次只抓一次、解析一次（Tab 1 + Tab 3 共用）
+每次組裝後把 Tab 3 / Tab 4 文章的情緒判斷增量寫入版面 / 遊戲 × 小時彙總桶（database.record_sentiment），
+sentiment_trend 只讀彙總桶，不重新判斷標題
+HTML 解析透過 parsing.parse_html 在 worker pool 執行；_extract_* 為模組層級函式，只回傳純資料
 """
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
 import json
 import os
 import time
 import re
-from scrapers.sentiment import analyze_title, analyze_ptt_article, aggregate_sentiment
+from contextlib import asynccontextmanager
+from bs4 import SoupStrainer
+import database
+from scrapers import board_watch, parsing, ptt_comments, ptt_crawler
+from scrapers.sentiment import analyze_many, analyze_ptt_article, aggregate_sentiment, summarize_counts
 
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
 CACHE_FILE = os.path.join(CACHE_DIR, "discussion_data.json")
 
+TREND_SCOPES = ("board", "game")
+TREND_STEPS = {"hour": 3600, "day": 86400}
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
 }
 
+BAHAMUT_HOME = "https://forum.gamer.com.tw/"
+PTT_COOKIES = {"over18": "1"}
+_BSN_RE = re.compile(r'bsn=(\d+)')
+
+# 只解析 extractor 需要的子樹（class 以 regex 比對，解析階段 class 仍是原始字串）
+BAHAMUT_LINKS = SoupStrainer("a", href=re.compile(r'[BC]\.php\?bsn='))
+PTT_BOARD_ENTRIES = SoupStrainer("a", class_=re.compile(r'(^|\s)board(\s|$)'))
+
+
+@asynccontextmanager
+async def _client_scope(client: httpx.AsyncClient | None, timeout: float):
+    """有傳入 client 就共用（聚合時），否則自行建立（單獨呼叫時）"""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as own:
+        yield own
+
 
 # ============================================================
-# Tab 1: 巴哈姆特 Top 20 熱門討論版
+# Tab 1 + Tab 3: 巴哈姆特首頁（熱門討論版 + 每版最熱文章）
 # ============================================================
-async def fetch_bahamut_top_boards():
-    """從巴哈姆特哈啦區首頁抓取熱門討論版"""
-    url = "https://forum.gamer.com.tw/"
+async def fetch_bahamut_home(client: httpx.AsyncClient | None = None) -> dict:
+    """抓一次巴哈哈啦區首頁，同一棵解析樹產出 Top 20 版面與含來源版名的熱門文章"""
+    empty = {"boards": [], "articles": []}
     try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
+        async with _client_scope(client, timeout=15) as http:
+            resp = await http.get(BAHAMUT_HOME, headers=HEADERS)
             resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        boards = []
-        seen = set()
+        return await parsing.parse_html(resp.text, _extract_bahamut_home, only=BAHAMUT_LINKS)
 
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
-            if "B.php?bsn=" not in href:
-                continue
+    except Exception as e:
+        print(f"[Discussion] Bahamut home error: {e}")
+        return empty
 
-            name = a.get_text(strip=True)
-            if not name or name in seen or len(name) < 2:
-                continue
 
-            bsn_match = re.search(r'bsn=(\d+)', href)
-            if not bsn_match:
+async def fetch_bahamut_top_boards():
+    """從巴哈姆特哈啦區首頁抓取熱門討論版"""
+    return (await fetch_bahamut_home())["boards"]
+
+
+async def fetch_bahamut_hot_articles():
+    """從巴哈首頁取得每個熱門版的最熱文章，含來源版名"""
+    return (await fetch_bahamut_home())["articles"]
+
+
+def _extract_bahamut_home(soup):
+    """單次走訪所有 <a>：B.php 為版面（同時建立 bsn → 版名），C.php 為文章，最後補上來源版名"""
+    boards, articles = [], []
+    seen_boards, seen_titles = set(), set()
+    bsn_to_board = {}
+
+    for a in soup.find_all("a", href=True):
+        href = a.get("href", "")
+
+        if "B.php?bsn=" in href:
+            name = a.get_text(strip=True)
+            bsn_match = _BSN_RE.search(href)
+            if not bsn_match or not name or len(name) < 2:
                 continue
 
             bsn = bsn_match.group(1)
-            seen.add(name)
+            bsn_to_board[bsn] = name
+            if name in seen_boards or len(boards) >= 20:
+                continue
+            seen_boards.add(name)
 
             if not href.startswith("http"):
-                href = f"https://forum.gamer.com.tw/{href}"
+                href = f"{BAHAMUT_HOME}{href}"
 
             boards.append({
                 "name": name,
@@ -64,272 +113,265 @@ async def fetch_bahamut_top_boards():
                 "rank": len(boards) + 1,
             })
 
-            if len(boards) >= 20:
-                break
+        elif "C.php?bsn=" in href and len(articles) < 20:
+            title = a.get_text(strip=True)
+            if not title or title in seen_titles or len(title) < 5:
+                continue
 
-        return boards
+            if not (title.startswith("\u3010") or title.startswith("[")):
+                continue
 
-    except Exception as e:
-        print(f"[Discussion] Bahamut boards error: {e}")
-        return []
+            seen_titles.add(title)
+
+            bsn_match = _BSN_RE.search(href)
+
+            if not href.startswith("http"):
+                href = f"{BAHAMUT_HOME}{href}"
+
+            articles.append({
+                "title": title,
+                "url": href,
+                "bsn": bsn_match.group(1) if bsn_match else "",
+            })
+
+    # 版名映射要等整頁走完才完整（文章可能出現在版面連結之前）
+    for article in articles:
+        article["source"] = bsn_to_board.get(article["bsn"]) or "Bahamut"
+
+    return {"boards": boards, "articles": articles}
 
 
 # ============================================================
 # Tab 2: PTT 全站即時人氣熱門版
 # ============================================================
-async def fetch_ptt_hot_boards():
+async def fetch_ptt_hot_boards(client: httpx.AsyncClient | None = None):
     """PTT hotboards 全站即時人氣排行"""
     url = "https://www.ptt.cc/bbs/hotboards.html"
-    cookies = {"over18": "1"}
     try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS, cookies=cookies)
+        async with _client_scope(client, timeout=15) as http:
+            resp = await http.get(url, headers=HEADERS, cookies=PTT_COOKIES)
             resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        boards = []
+        return await parsing.parse_html(resp.text, _extract_ptt_hot_boards, only=PTT_BOARD_ENTRIES)
 
-        for item in soup.select("a.board"):
-            board_name_el = item.select_one("div.board-name")
-            board_class_el = item.select_one("div.board-class")
-            board_title_el = item.select_one("div.board-title")
+    except Exception as e:
+        print(f"[Discussion] PTT hot boards error: {e}")
 
-            if not board_name_el:
-                continue
+        return []
 
-            name = board_name_el.get_text(strip=True)
-            category = board_class_el.get_text(strip=True) if board_class_el else ""
-            title = board_title_el.get_text(strip=True) if board_title_el else ""
 
-            # 嘗試多種方式取得人氣數字
-            pop_value = 0
-            # 方法 1: div.board-nrec > span
-            nrec_el = item.select_one("div.board-nrec span")
-            if nrec_el:
+def _extract_ptt_hot_boards(soup):
+    boards = []
+
+    for item in soup.select("a.board"):
+        board_name_el = item.select_one("div.board-name")
+        board_class_el = item.select_one("div.board-class")
+        board_title_el = item.select_one("div.board-title")
+
+        if not board_name_el:
+            continue
+
+        name = board_name_el.get_text(strip=True)
+        category = board_class_el.get_text(strip=True) if board_class_el else ""
+        title = board_title_el.get_text(strip=True) if board_title_el else ""
+
+        # 嘗試多種方式取得人氣數字
+        pop_value = 0
+        # 方法 1: div.board-nrec > span
+        nrec_el = item.select_one("div.board-nrec span")
+        if nrec_el:
+            try:
+                pop_value = int(nrec_el.get_text(strip=True))
+            except ValueError:
+                pass
+        # 方法 2: div.board-nrec 直接文字
+        if pop_value == 0:
+            nrec_div = item.select_one("div.board-nrec")
+            if nrec_div:
                 try:
-                    pop_value = int(nrec_el.get_text(strip=True))
+                    pop_value = int(nrec_div.get_text(strip=True))
                 except ValueError:
                     pass
-            # 方法 2: div.board-nrec 直接文字
-            if pop_value == 0:
-                nrec_div = item.select_one("div.board-nrec")
-                if nrec_div:
-                    try:
-                        pop_value = int(nrec_div.get_text(strip=True))
-                    except ValueError:
-                        pass
-            # 方法 3: 從整個元素文字中用 regex 提取數字
-            if pop_value == 0:
-                full_text = item.get_text()
-                # 找 board name 後面跟著的數字
-                nums = re.findall(r'\b(\d{2,5})\b', full_text)
-                if nums:
-                    pop_value = int(nums[0])
-
-            href = item.get("href", "")
-            if href:
-                href = f"https://www.ptt.cc{href}"
+        # 方法 3: 從整個元素文字中用 regex 提取數字
+        if pop_value == 0:
+            full_text = item.get_text()
+            # 找 board name 後面跟著的數字
+            nums = re.findall(r'\b(\d{2,5})\b', full_text)
+            if nums:
+                pop_value = int(nums[0])
 
-            boards.append({
-                "name": name,
-                "url": href,
-                "popularity": pop_value,
-                "category": category,
-                "title": title,
-                "rank": len(boards) + 1,
-            })
+        href = item.get("href", "")
+        if href:
+            href = f"https://www.ptt.cc{href}"
 
-            if len(boards) >= 20:
-                break
+        boards.append({
+            "name": name,
+            "url": href,
+            "popularity": pop_value,
+            "category": category,
+            "title": title,
+            "rank": len(boards) + 1,
+        })
 
-        return boards
+        if len(boards) >= 20:
+            break
 
-    except Exception as e:
-        print(f"[Discussion] PTT hot boards error: {e}")
-
-        return []
+    return boards
 
 
 # ============================================================
-# Tab 3: 巴哈姆特每版最熱文章 (含來源版名)
+# Tab 4: PTT 推文數最多文章（追蹤清單分片排程增量爬取，這裡只讀共用儲存）
 # ============================================================
-async def fetch_bahamut_hot_articles():
-    """從巴哈首頁取得每個熱門版的最熱文章，含來源版名"""
-    url = "https://forum.gamer.com.tw/"
-    try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # 先建立 bsn -> 版面名稱 的映射
-        bsn_to_board = {}
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
-            if "B.php?bsn=" in href:
-                name = a.get_text(strip=True)
-                bsn_match = re.search(r'bsn=(\d+)', href)
-                if bsn_match and name and len(name) >= 2:
-                    bsn_to_board[bsn_match.group(1)] = name
-
-        # 再抓文章
-        articles = []
-        seen_titles = set()
-
-        for a in soup.find_all("a", href=True):
-            href = a.get("href", "")
-            if "C.php?bsn=" not in href:
-                continue
-
-            title = a.get_text(strip=True)
-            if not title or title in seen_titles or len(title) < 5:
-                continue
-
-            if not (title.startswith("\u3010") or title.startswith("[")):
-                continue
-
-            seen_titles.add(title)
-
-            bsn_match = re.search(r'bsn=(\d+)', href)
-            bsn = bsn_match.group(1) if bsn_match else ""
-            board_name = bsn_to_board.get(bsn, "")
-
-            if not href.startswith("http"):
-                href = f"https://forum.gamer.com.tw/{href}"
-
-            articles.append({
-                "title": title,
-                "url": href,
-                "bsn": bsn,
-                "source": board_name if board_name else "Bahamut",
-            })
-
-            if len(articles) >= 20:
-                break
+async def load_ptt_hot_articles(limit: int = 20):
+    """追蹤清單中 PTT 版面近 24 小時推文數最多的文章"""
+    boards = [b["key"] for b in board_watch.watched("ptt")]
+    return await ptt_crawler.hot_articles(boards, limit=limit)
 
-        return articles
 
-    except Exception as e:
-        print(f"[Discussion] Bahamut articles error: {e}")
-        return []
+async def load_bahamut_watched_posts(limit: int = 20):
+    """追蹤清單中巴哈版面近 24 小時 GP 最高的文章（Tab 3 格式）"""
+    bsns = [b["key"] for b in board_watch.watched("bahamut")]
+    rows = await database.get_bahamut_hot_posts(bsns, int(time.time()) - 86400, limit)
+    return [
+        {"title": r["title"], "url": r["url"], "bsn": r["bsn"], "source": r["board_name"]}
+        for r in rows
+    ]
 
 
 # ============================================================
-# Tab 4: PTT 推文數最多文章
+# 整站排行頁（巴哈首頁 + PTT hotboards）→ 共用儲存
 # ============================================================
-async def fetch_ptt_hot_articles():
-    """PTT 遊戲版中推文數最多的文章（5 版面並行爬取）"""
-    boards = ["C_Chat", "Steam", "PlayStation", "NSwitch", "LoL"]
-
-    async def _fetch_one_board(client, board):
-        url = f"https://www.ptt.cc/bbs/{board}/index.html"
-        cookies = {"over18": "1"}
-        articles = []
-        try:
-            resp = await client.get(url, headers=HEADERS, cookies=cookies)
-            if resp.status_code != 200:
-                return articles
-
-            soup = BeautifulSoup(resp.text, "html.parser")
-
-            for item in soup.select("div.r-ent"):
-                title_el = item.select_one("div.title a")
-                nrec_el = item.select_one("div.nrec span")
-
-                if not title_el:
-                    continue
-
-                title = title_el.get_text(strip=True)
-
-                skip_prefixes = ["[公告]", "Fw: [公告]", "[版規]", "[置底]", "[活動]"]
-                if any(title.startswith(p) for p in skip_prefixes):
-                    continue
-                if "(本文已被刪除)" in title:
-                    continue
-
-                href = title_el.get("href", "")
-                pop_text = nrec_el.get_text(strip=True) if nrec_el else "0"
-
-                if pop_text == "\u7206":
-                    pop_value = 100
-                elif pop_text.startswith("X"):
-                    pop_value = -1
-                elif pop_text.isdigit():
-                    pop_value = int(pop_text)
-                else:
-                    pop_value = 0
-
-                if href:
-                    href = f"https://www.ptt.cc{href}"
-
-                articles.append({
-                    "title": title,
-                    "url": href,
-                    "source": f"PTT {board}",
-                    "popularity": pop_text,
-                    "popularity_value": pop_value,
-                })
-        except Exception:
-            pass
-        return articles
-
-    async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
-        results = await asyncio.gather(
-            *[_fetch_one_board(client, board) for board in boards],
-            return_exceptions=True,
+async def refresh_site_pages():
+    """抓巴哈首頁與 PTT hotboards 寫入共用儲存；抓取失敗（空結果）時保留上一份"""
+    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
+        bahamut, ptt_boards = await asyncio.gather(
+            fetch_bahamut_home(client),
+            fetch_ptt_hot_boards(client),
         )
+    if bahamut["boards"] or bahamut["articles"]:
+        await database.save_discussion_page("bahamut_home", bahamut)
+    if ptt_boards:
+        await database.save_discussion_page("ptt_hotboards", ptt_boards)
+    return {"bahamut_home": bool(bahamut["boards"]), "ptt_hotboards": bool(ptt_boards)}
 
-    all_articles = []
-    for r in results:
-        if isinstance(r, list):
-            all_articles.extend(r)
 
-    all_articles.sort(key=lambda x: x["popularity_value"], reverse=True)
-    return all_articles[:20]
+# ============================================================
+# 情緒時間序列（版面 / 遊戲 × 小時彙總桶）
+# ============================================================
+def _hour(ts: int) -> int:
+    return ts - ts % 3600
+
+
+def _sentiment_records(bahamut_articles: list[dict], ptt_articles: list[dict], now: int) -> list[dict]:
+    """已判斷情緒的文章 → record_sentiment 的列；PTT 依發文時間分桶，巴哈以第一次看到的時間分桶"""
+    games = {(b["site"], b["key"]): b.get("game") for b in board_watch.load_watchlist()}
+    records = []
+    for item in bahamut_articles:
+        bsn = item.get("bsn", "")
+        name = item.get("source") or "Bahamut"
+        records.append({
+            "url": item["url"],
+            "board": f"bahamut:{bsn or name}",
+            # 巴哈每個版面就是一款遊戲；追蹤清單有設定時以清單為準
+            "game": games.get(("bahamut", bsn)) or (name if name != "Bahamut" else None),
+            "hour": _hour(now),
+            "label": item["sentiment"]["label"],
+        })
+    for item in ptt_articles:
+        board = item.get("board") or item.get("source", "").removeprefix("PTT ")
+        records.append({
+            "url": item["url"],
+            "board": f"ptt:{board}",
+            "game": games.get(("ptt", board)),
+            "hour": _hour(item.get("posted_at") or now),
+            "label": item["sentiment"]["label"],
+        })
+    return records
+
+
+async def sentiment_trend(scope: str, key: str, hours: int = 168, step: str = "hour") -> dict:
+    """
+    版面 / 遊戲的情緒趨勢：讀每小時彙總桶，依 step（hour | day）合併後逐點計算百分比
+    board 的 key 為 "ptt:<版名>" 或 "bahamut:<bsn>"，game 的 key 為遊戲名
+    """
+    if scope not in TREND_SCOPES:
+        raise ValueError(f"unknown scope: {scope}")
+    if step not in TREND_STEPS:
+        raise ValueError(f"unknown step: {step}")
+    now = int(time.time())
+    since = _hour(now) - (hours - 1) * 3600
+    size = TREND_STEPS[step]
+
+    merged = {}
+    for row in await database.get_sentiment_buckets(scope, key, since):
+        start = row["hour"] - row["hour"] % size
+        counts = merged.setdefault(start, [0, 0, 0])
+        counts[0] += row["positive"]
+        counts[1] += row["negative"]
+        counts[2] += row["neutral"]
+
+    points = [
+        {"time": start, "positive": p, "negative": n, "neutral": u, "total": p + n + u,
+         **summarize_counts(p, n, u)}
+        for start, (p, n, u) in sorted(merged.items())
+    ]
+    totals = [sum(c[i] for c in merged.values()) for i in range(3)]
+    return {
+        "scope": scope, "key": key, "hours": hours, "step": step,
+        "points": points,
+        "summary": {"total": sum(totals), **summarize_counts(*totals)},
+    }
+
+
+async def sentiment_keys(scope: str, hours: int = 168) -> list[dict]:
+    """期間內有情緒資料的版面 / 遊戲（依文章數排序，附整體情緒）"""
+    if scope not in TREND_SCOPES:
+        raise ValueError(f"unknown scope: {scope}")
+    since = _hour(int(time.time())) - (hours - 1) * 3600
+    rows = await database.get_sentiment_keys(scope, since)
+    return [
+        {**r, **summarize_counts(r["positive"], r["negative"], r["neutral"])}
+        for r in rows
+    ]
 
 
 # ============================================================
-# 聚合所有數據
+# 聚合所有數據（只讀共用儲存，不做任何即時抓取）
 # ============================================================
 async def fetch_all_discussions():
-    """聚合四個分頁的討論數據（兩批並行：boards → articles）"""
+    """從共用儲存組裝四個分頁：整站排行頁快照 + 追蹤版面的滾動視窗排行"""
     try:
-        # 第一批：巴哈 boards + PTT boards（不同主機，可並行）
-        bahamut_boards, ptt_boards = await asyncio.gather(
-            fetch_bahamut_top_boards(),
-            fetch_ptt_hot_boards(),
-            return_exceptions=True,
-        )
-        if isinstance(bahamut_boards, Exception):
-            print(f"[Discussion] Bahamut boards error: {bahamut_boards}")
-            bahamut_boards = []
-        if isinstance(ptt_boards, Exception):
-            print(f"[Discussion] PTT boards error: {ptt_boards}")
-            ptt_boards = []
-
-        # 第二批：巴哈 articles + PTT articles（不同主機，可並行）
-        bahamut_articles, ptt_articles = await asyncio.gather(
-            fetch_bahamut_hot_articles(),
-            fetch_ptt_hot_articles(),
-            return_exceptions=True,
-        )
-        if isinstance(bahamut_articles, Exception):
-            print(f"[Discussion] Bahamut articles error: {bahamut_articles}")
-            bahamut_articles = []
-        if isinstance(ptt_articles, Exception):
-            print(f"[Discussion] PTT articles error: {ptt_articles}")
-            ptt_articles = []
+        bahamut = await database.get_discussion_page("bahamut_home", {"boards": [], "articles": []})
+        ptt_boards = await database.get_discussion_page("ptt_hotboards", [])
+        ptt_articles = await load_ptt_hot_articles()
+        bahamut_boards = bahamut["boards"]
+
+        # Tab 3：首頁熱門文在前，不足 20 篇以追蹤版面的高 GP 文補上
+        bahamut_articles = list(bahamut["articles"])
+        seen_urls = {a["url"] for a in bahamut_articles}
+        for post in await load_bahamut_watched_posts():
+            if post["url"] not in seen_urls:
+                seen_urls.add(post["url"])
+                bahamut_articles.append(post)
 
         # 情緒分析：巴哈用關鍵字，PTT 用推噓比 + 關鍵字
-        for item in bahamut_articles:
-            item["sentiment"] = analyze_title(item.get("title", ""))
+        for item, sentiment in zip(bahamut_articles, analyze_many(a.get("title", "") for a in bahamut_articles)):
+            item["sentiment"] = sentiment
+        comment_stats = await ptt_comments.comment_stats([a["url"] for a in ptt_articles])
         for item in ptt_articles:
+            if item["url"] in comment_stats:
+                item["comments"] = comment_stats[item["url"]]
             item["sentiment"] = analyze_ptt_article(
-                item.get("title", ""), item.get("popularity_value", 0)
+                item.get("title", ""), item.get("popularity_value", 0), item.get("comments")
             )
 
         all_articles = bahamut_articles + ptt_articles
+        now = int(time.time())
+        try:
+            await database.record_sentiment(_sentiment_records(bahamut_articles, ptt_articles, now))
+        except Exception as e:
+            # 彙總桶寫入失敗不影響本次組裝
+            print(f"[Discussion] Sentiment buckets error: {e}")
 
         all_discussions = {
             "bahamut_boards": bahamut_boards[:20],
@@ -341,7 +383,7 @@ async def fetch_all_discussions():
                 + len(bahamut_articles) + len(ptt_articles)
             ),
             "sentiment_summary": aggregate_sentiment(all_articles),
-            "updated_at": int(time.time()),
+            "updated_at": now,
         }
 
         _save_cache(all_discussions)
@@ -349,7 +391,7 @@ async def fetch_all_discussions():
 
     except Exception as e:
         print(f"[Discussion] Aggregate error: {e}")
-        return _load_cache()
+        return load_cache()
 
 
 def _save_cache(data):
@@ -358,7 +400,8 @@ def _save_cache(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次成功抓取的快取（沒有快取時為各欄位的空值）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
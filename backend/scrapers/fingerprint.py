@@ -0,0 +1,69 @@
+"""
+摘要項目指紋模組 — 正規化標題指紋 + URL 正規化，供每周摘要跨來源 / 跨週去重
+- 標題：NFKC、去掉開頭的分類 / 來源括號（【情報】、[4Gamers]…）與結尾的網站名稱（" - Facebook"、"｜巴哈姆特"…）、
+  小寫、去掉空白與標點；同一則公告換來源轉載或標點不同仍得到同一指紋
+- URL：統一 https、主機小寫並去掉 www. / m.、去掉追蹤參數（utm_*、fbclid…）與 fragment、其餘參數排序、
+  youtu.be / shorts 改寫為 watch?v=
+指紋為 sha1 前 16 碼（標題與 URL 分別加前綴，互不碰撞），存入 database.digest_seen
+"""
+import hashlib
+import re
+import urllib.parse
+
+from scrapers import sentiment
+
+_PREFIX_RE = re.compile(r'^(?:\s*[【\[〔［(（「][^】\]〕］)）」]{1,16}[】\]〕］)）」])+')
+_SITE_SUFFIX_RE = re.compile(
+    r'\s*[-–—|｜]\s*[^-–—|｜]*(?:facebook|instagram|youtube|4gamers|巴哈姆特|gnn|yahoo|udn|聯合新聞網|ettoday|自由時報)'
+    r'[^-–—|｜]*$',
+    re.IGNORECASE,
+)
+_NOISE_RE = re.compile(r'[\W_]+')
+_TRACKING_PARAMS = re.compile(r'^(?:utm_\w+|fbclid|gclid|igshid|mibextid|si|feature|ref|ref_src)$', re.IGNORECASE)
+_HOST_PREFIXES = ("www.", "m.", "mobile.")
+
+
+def normalize_title(title: str) -> str:
+    """去掉括號前綴與網站名稱結尾後的比對用標題（小寫、無空白標點）"""
+    text = sentiment.normalize_title(title)
+    stripped = _NOISE_RE.sub("", _SITE_SUFFIX_RE.sub("", _PREFIX_RE.sub("", text)).lower())
+    # 整個標題都是括號 / 網站名稱時保留原文
+    return stripped or _NOISE_RE.sub("", text.lower())
+
+
+def canonical_url(url: str) -> str:
+    parts = urllib.parse.urlsplit((url or "").strip())
+    if not parts.netloc:
+        return (url or "").strip()
+    host = (parts.hostname or "").lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = parts.path.rstrip("/") or "/"
+    params = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+              if not _TRACKING_PARAMS.match(k)]
+
+    if host == "youtu.be" and path != "/":
+        host, params = "youtube.com", [("v", path.lstrip("/"))] + params
+        path = "/watch"
+    elif host == "youtube.com" and path.startswith("/shorts/"):
+        params = [("v", path[len("/shorts/"):])] + params
+        path = "/watch"
+
+    query = urllib.parse.urlencode(sorted(params))
+    return f"https://{host}{path}" + (f"?{query}" if query else "")
+
+
+def _digest(kind: str, text: str) -> str:
+    return kind + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def title_fingerprint(title: str) -> str:
+    """正規化後為空（如只有標點）時回傳空字串，不參與去重"""
+    normalized = normalize_title(title)
+    return _digest("t", normalized) if normalized else ""
+
+
+def url_fingerprint(url: str) -> str:
+    return _digest("u", canonical_url(url)) if url else ""
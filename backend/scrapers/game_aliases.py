@@ -0,0 +1,99 @@
+"""
+遊戲別名索引 — 遊戲名稱 → 別名集合，並把所有遊戲的別名編成一個 keyword_matcher 自動機
+- 每個遊戲的比對名稱：遊戲名稱本身 + TAG_ALIASES 中對應群組（正式名稱與別名互為子字串即視為同一群組）
+  + 名稱中的中文核心字（至少 2 字）；一律不分大小寫
+- games_in(text) 走訪文字一次就得到所有命中的遊戲，取代逐一遊戲 × 逐一別名的子字串判斷
+- 每周摘要每次執行以目標遊戲建一次索引；新聞以追蹤清單遊戲 + TAG_ALIASES 正式名稱建索引標記遊戲
+  （新聞用 word_boundary=True：英數別名需前後不接英數字，避免 "RO" 命中 "PRO"）
+"""
+import re
+from functools import lru_cache
+from typing import Iterable
+
+from scrapers.keyword_matcher import KeywordMatcher
+
+# ── 遊戲別名（正式名稱 → 常見簡稱 / 英文名）──
+TAG_ALIASES = {
+    "勝利女神：妮姬": ["NIKKE", "勝利女神"],
+    "崩壞：星穹鐵道": ["星穹鐵道", "崩壞星穹鐵道"],
+    "蔚藍檔案 Blue Archive": ["蔚藍檔案", "Blue Archive"],
+    "Fate/Grand Order": ["FGO", "Fate"],
+    "哈利波特：魔法覺醒": ["哈利波特"],
+    "明日方舟：終末地": ["明日方舟", "Arknights"],
+    "傳說對決": ["AOV", "Arena of Valor"],
+    "天堂W": ["天堂", "Lineage"],
+    "原神": ["Genshin", "Genshin Impact"],
+    "神魔之塔": ["Tower of Saviors"],
+    "天堂M": ["Lineage M", "天堂 Mobile"],
+    "RO仙境傳説": ["仙境傳說", "RO"],
+    "貓咪大戰爭": ["Battle Cats"],
+    "星城Online": ["星城"],
+}
+
+_NON_CJK_RE = re.compile(r'[^\u4e00-\u9fff]')
+_ASCII_WORD_RE = re.compile(r'^[\x00-\x7f]+$')
+
+
+def cjk_base(name: str) -> str:
+    """名稱中的中文字（如「崩壞：星穹鐵道」→「崩壞星穹鐵道」）"""
+    return _NON_CJK_RE.sub('', name)
+
+
+def _alias_group(game: str, groups: dict[str, list[str]]) -> list[str] | None:
+    """第一個與遊戲名稱互為子字串的別名群組（[正式名稱, *別名]）"""
+    lowered = game.lower()
+    for canonical, aliases in groups.items():
+        names = [canonical] + aliases
+        if any(n.lower() in lowered or lowered in n.lower() for n in names):
+            return names
+    return None
+
+
+class GameAliasIndex:
+    def __init__(self, games: Iterable[str], groups: dict[str, list[str]] | None = None):
+        groups = TAG_ALIASES if groups is None else groups
+        self.games: list[str] = list(dict.fromkeys(g for g in games if g))
+        self._variants: dict[str, list[str]] = {}
+        self._names: dict[str, set[str]] = {}
+        for game in self.games:
+            group = _alias_group(game, groups)
+            variants = list(dict.fromkeys(group + [game])) if group else [game]
+            names = {v.lower() for v in variants}
+            base = cjk_base(game)
+            if len(base) >= 2:
+                names.add(base)
+            self._variants[game] = variants
+            self._names[game] = names
+        self._matcher = KeywordMatcher(self._names, ignore_case=True)
+
+    def variants(self, game: str) -> list[str]:
+        """搜尋用名稱變體：正式名稱、別名，最後是原名稱（不在索引中的遊戲只有原名稱）"""
+        return list(self._variants.get(game, [game]))
+
+    def match_names(self, game: str) -> set[str]:
+        """比對用名稱（小寫，含中文核心字）"""
+        return set(self._names.get(game, ()))
+
+    def games_in(self, text: str, word_boundary: bool = False) -> set[str]:
+        """文字中出現的所有遊戲（走訪一次）"""
+        if not word_boundary:
+            return self._matcher.categories(text)
+        lowered = (text or "").lower()
+        found = set()
+        for game, hits in self._matcher.matches(text).items():
+            if any(not _ASCII_WORD_RE.match(kw) or _has_word(lowered, kw) for kw in hits):
+                found.add(game)
+        return found
+
+    def contains(self, text: str, game: str) -> bool:
+        return game in self.games_in(text)
+
+
+def _has_word(text: str, word: str) -> bool:
+    return re.search(rf'(?<![a-z0-9]){re.escape(word)}(?![a-z0-9])', text) is not None
+
+
+@lru_cache(maxsize=256)
+def index_for(games: tuple[str, ...]) -> GameAliasIndex:
+    """同一組遊戲共用同一個索引（不在單次執行範圍內的呼叫，如單一遊戲的比對）"""
+    return GameAliasIndex(games)
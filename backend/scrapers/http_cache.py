@@ -0,0 +1,89 @@
+"""
+上游 feed 條件式請求模組（ETag / Last-Modified + 內容雜湊短路）
+- 記住每個 URL 上次的 ETag / Last-Modified，下次帶 If-None-Match / If-Modified-Since
+- 上游回 304，或回 200 但內容與上次逐位元組相同（sha1 一致），直接沿用上次的解析結果，
+  不再跑 feedparser / json 解析與後續正規化
+驗證資訊與解析結果只存在本 process 記憶體（LRU 上限 MAX_ENTRIES），重啟後第一次會完整抓取
+"""
+import hashlib
+import inspect
+from collections import OrderedDict
+
+import httpx
+
+MAX_ENTRIES = 256
+
+
+class ValidatorStore:
+    """URL → {etag, last_modified, body_hash, value}，超過上限時淘汰最久未用的"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0     # 304 或內容相同而跳過解析的次數
+        self.misses = 0   # 實際解析的次數
+
+    def get(self, url: str) -> dict | None:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def put(self, url: str, entry: dict):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+validators = ValidatorStore()
+
+
+async def conditional_get(client: httpx.AsyncClient, url: str, parse, *, headers: dict | None = None,
+                          store: ValidatorStore | None = None, **kwargs) -> tuple[object, bool]:
+    """
+    條件式 GET：回傳 (解析結果, 是否有變動)
+    parse(resp) 只在內容真的變動時才會被呼叫，可回傳 awaitable（如 parsing.parse_feed）；
+    非 2xx/304 回應會拋 httpx.HTTPStatusError
+    """
+    store = store if store is not None else validators
+    entry = store.get(url)
+    req_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            req_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            req_headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = await client.get(url, headers=req_headers, **kwargs)
+    if resp.status_code == 304 and entry:
+        store.hits += 1
+        return entry["value"], False
+    resp.raise_for_status()
+
+    body_hash = hashlib.sha1(resp.content).hexdigest()
+    etag = resp.headers.get("etag")
+    last_modified = resp.headers.get("last-modified")
+    if entry and entry["body_hash"] == body_hash:
+        store.hits += 1
+        entry.update(etag=etag, last_modified=last_modified)
+        return entry["value"], False
+
+    value = parse(resp)
+    if inspect.isawaitable(value):
+        value = await value
+    store.misses += 1
+    store.put(url, {
+        "etag": etag,
+        "last_modified": last_modified,
+        "body_hash": body_hash,
+        "value": value,
+    })
+    return value, True
@@ -0,0 +1,145 @@
+"""
+多關鍵字比對引擎（Aho-Corasick）— 一組分類關鍵字編譯成一個自動機，走訪文字一次就得到所有分類的命中
+- 取代「for kw in 關鍵字清單: kw in text」：關鍵字越多、分類越多，省下的重複掃描越多
+- 重疊命中都會回報（「糞」與「糞作」同時命中），語意與逐一做子字串判斷相同
+- 同一關鍵字可屬於多個分類
+- ignore_case=True 時關鍵字與文字都轉小寫再比對（等同 kw.lower() in text.lower()）
+- 有安裝 pyahocorasick（C 實作）時用它走訪；沒裝則退回純 Python 自動機，結果相同
+  （數十個短關鍵字、短標題時，純 Python 版與逐一 `in` 判斷相當，C 版約快 1.2～2 倍；見 benchmarks/keyword_bench.py）
+自動機在模組載入時建好，之後只讀不寫，可在多個協程 / thread 共用
+"""
+import re
+from collections import deque
+from typing import Iterable
+
+try:
+    import ahocorasick
+except ImportError:  # 選用依賴
+    ahocorasick = None
+
+BACKENDS = ("pyahocorasick", "python")
+DEFAULT_BACKEND = "pyahocorasick" if ahocorasick is not None else "python"
+
+
+class KeywordMatcher:
+    def __init__(self, categories: dict[str, Iterable[str]], ignore_case: bool = False,
+                 backend: str | None = None):
+        backend = backend or DEFAULT_BACKEND
+        if backend not in BACKENDS or (backend == "pyahocorasick" and ahocorasick is None):
+            raise ValueError(f"keyword matcher backend {backend!r} is not available")
+        self.backend = backend
+        self.ignore_case = ignore_case
+        self.keywords: list[str] = []             # 關鍵字 id → 關鍵字
+        self._categories: list[frozenset] = []    # 關鍵字 id → 所屬分類
+        index: dict[str, int] = {}
+        for category, words in categories.items():
+            for word in words:
+                if ignore_case:
+                    word = word.lower()
+                if not word:
+                    continue
+                if word not in index:
+                    index[word] = len(self.keywords)
+                    self.keywords.append(word)
+                    self._categories.append(frozenset())
+                kid = index[word]
+                self._categories[kid] = self._categories[kid] | {category}
+
+        self._automaton = None
+        self._next_start = None
+        if backend == "pyahocorasick":
+            if self.keywords:
+                self._automaton = ahocorasick.Automaton()
+                for kid, word in enumerate(self.keywords):
+                    self._automaton.add_word(word, kid)
+                self._automaton.make_automaton()
+        else:
+            self._build_trie()
+
+    def _build_trie(self):
+        """純 Python 自動機"""
+        # trie：每個節點一個 dict（字元 → 子節點），_out 為該節點結尾（含 fail 鏈）的關鍵字 id
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[int, ...]] = [()]
+        for kid, word in enumerate(self.keywords):
+            node = 0
+            for ch in word:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (kid,)
+
+        # BFS 建 fail link，並把 fail 節點的輸出併入（查詢時不必再沿 fail 鏈收集）
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+        # 停在 root 時以 regex（C 實作）直接跳到下一個可能開頭的字元，
+        # 標題大多數字元都不是任何關鍵字的開頭，Python 迴圈只走真正在比對中的那幾步
+        starts = "".join(sorted(self._goto[0]))
+        if starts:
+            self._next_start = re.compile(f"[{re.escape(starts)}]").search
+
+    def _scan(self, text: str) -> set[int]:
+        """走訪一次，回傳命中的關鍵字 id"""
+        if self.ignore_case:
+            text = text.lower()
+        if self._automaton is not None:
+            return {kid for _, kid in self._automaton.iter(text)}
+        found: set[int] = set()
+        if self._next_start is None:
+            return found
+        goto, fail, out, next_start = self._goto, self._fail, self._out, self._next_start
+        node, i, n = 0, 0, len(text)
+        while i < n:
+            if node == 0:
+                m = next_start(text, i)
+                if m is None:
+                    break
+                i = m.start()
+            ch = text[i]
+            nxt = goto[node].get(ch)
+            while nxt is None and node:
+                node = fail[node]
+                nxt = goto[node].get(ch)
+            node = nxt or 0
+            if out[node]:
+                found.update(out[node])
+            i += 1
+        return found
+
+    def matches(self, text: str) -> dict[str, set[str]]:
+        """分類 → 命中的關鍵字"""
+        result: dict[str, set[str]] = {}
+        for kid in self._scan(text or ""):
+            for category in self._categories[kid]:
+                result.setdefault(category, set()).add(self.keywords[kid])
+        return result
+
+    def categories(self, text: str) -> set[str]:
+        """有命中的分類"""
+        result: set[str] = set()
+        for kid in self._scan(text or ""):
+            result |= self._categories[kid]
+        return result
+
+    def counts(self, text: str) -> dict[str, int]:
+        """分類 → 命中的不同關鍵字數（未命中的分類不出現）"""
+        result: dict[str, int] = {}
+        for kid in self._scan(text or ""):
+            for category in self._categories[kid]:
+                result[category] = result.get(category, 0) + 1
+        return result
@@ -2,6 +2,7 @@
 手遊排行榜模組 v5
 - App Store (iOS) — iTunes RSS genre=6014 (Games)
 - Google Play (Android) — gplay-scraper 套件 (台灣區遊戲類排行)
+iOS 排行未變動（304 / 內容相同）且 Android 排行與快取相同時，沿用快取（不重寫、updated_at 不變）
 """
 import httpx
 import json
@@ -9,6 +10,7 @@ import os
 import time
 import asyncio
 from gplay_scraper import GPlayScraper
+from scrapers import http_cache
 
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
 CACHE_FILE = os.path.join(CACHE_DIR, "mobile_data.json")
@@ -20,58 +22,66 @@ HEADERS = {
 
 # 建立 GPlayScraper 單例
 _gp = GPlayScraper()
+_ios_unchanged = False  # 最近一次 iOS 抓取是否沿用上次結果
+
+
+def _parse_ios_feed(resp) -> list[dict]:
+    """解析 iTunes RSS JSON 為前端排行格式"""
+    data = resp.json()
+    entries = data.get("feed", {}).get("entry", [])
+    result = []
+
+    for i, entry in enumerate(entries, 1):
+        name = entry.get("im:name", {}).get("label", "")
+        app_id_info = entry.get("id", {})
+        app_id = ""
+        app_url = ""
+
+        # id 可能是 dict 或 string
+        if isinstance(app_id_info, dict):
+            app_url = app_id_info.get("label", "")
+            attrs = app_id_info.get("attributes", {})
+            app_id = attrs.get("im:id", "")
+        else:
+            app_url = str(app_id_info)
+
+        # icon (取最大的)
+        images = entry.get("im:image", [])
+        icon = ""
+        if images and isinstance(images, list):
+            icon = images[-1].get("label", "") if isinstance(images[-1], dict) else str(images[-1])
+
+        # genre
+        genre_info = entry.get("category", {})
+        genre = ""
+        if isinstance(genre_info, dict):
+            attrs = genre_info.get("attributes", {})
+            genre = attrs.get("label", "")
+
+        result.append({
+            "rank": i,
+            "name": name,
+            "id": app_id,
+            "url": app_url,
+            "icon": icon,
+            "genres": genre,
+            "chart": "iOS Free",
+        })
+
+    return result
 
 
 async def fetch_ios_top_free(country="tw", limit=30):
-    """App Store 免費遊戲排行 — 使用 iTunes RSS 的 Games genre (6014)"""
+    """App Store 免費遊戲排行 — 使用 iTunes RSS 的 Games genre (6014)
+    條件式請求：排行未變動（304 / 內容相同）時沿用上次解析結果"""
     # genre=6014 為 Games，直接只回傳遊戲
+    global _ios_unchanged
+    _ios_unchanged = False
     url = f"https://itunes.apple.com/{country}/rss/topfreeapplications/limit={limit}/genre=6014/json"
     try:
         async with httpx.AsyncClient(timeout=20, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-            data = resp.json()
-
-        entries = data.get("feed", {}).get("entry", [])
-        result = []
-
-        for i, entry in enumerate(entries, 1):
-            name = entry.get("im:name", {}).get("label", "")
-            app_id_info = entry.get("id", {})
-            app_id = ""
-            app_url = ""
-
-            # id 可能是 dict 或 string
-            if isinstance(app_id_info, dict):
-                app_url = app_id_info.get("label", "")
-                attrs = app_id_info.get("attributes", {})
-                app_id = attrs.get("im:id", "")
-            else:
-                app_url = str(app_id_info)
-
-            # icon (取最大的)
-            images = entry.get("im:image", [])
-            icon = ""
-            if images and isinstance(images, list):
-                icon = images[-1].get("label", "") if isinstance(images[-1], dict) else str(images[-1])
-
-            # genre
-            genre_info = entry.get("category", {})
-            genre = ""
-            if isinstance(genre_info, dict):
-                attrs = genre_info.get("attributes", {})
-                genre = attrs.get("label", "")
-
-            result.append({
-                "rank": i,
-                "name": name,
-                "id": app_id,
-                "url": app_url,
-                "icon": icon,
-                "genres": genre,
-                "chart": "iOS Free",
-            })
-
+            result, changed = await http_cache.conditional_get(client, url, _parse_ios_feed, headers=HEADERS)
+        _ios_unchanged = not changed
         return result
 
     except Exception as e:
@@ -137,7 +147,7 @@ async def fetch_android_top_games(count=30):
     except Exception as e:
         print(f"[Mobile] Android top games error: {e}")
         # 嘗試從快取讀取 Android 部分
-        cached = _load_cache()
+        cached = load_cache()
         return cached.get("android", {"free": [], "grossing": []})
 
 
@@ -155,10 +165,18 @@ async def fetch_all_mobile():
             ios_free = []
         if isinstance(android_data, Exception):
             print(f"[Mobile] Android gather error: {android_data}")
-            android_data = _load_cache().get("android", {"free": [], "grossing": []})
+            android_data = load_cache().get("android", {"free": [], "grossing": []})
 
         ios_grossing = await fetch_ios_top_grossing()  # 直接回傳空列表
 
+        # iOS 沿用上次結果且 Android 排行沒變：整份快取不變，不重寫
+        cached = load_cache()
+        if (_ios_unchanged and cached.get("updated_at") and isinstance(android_data, dict)
+                and android_data.get("free", []) == cached["android"].get("free")
+                and android_data.get("grossing", []) == cached["android"].get("grossing")):
+            print("[Mobile] Rankings unchanged, keeping cache")
+            return cached
+
         result = {
             "ios": {
                 "free": ios_free if isinstance(ios_free, list) else [],
@@ -176,7 +194,7 @@ async def fetch_all_mobile():
 
     except Exception as e:
         print(f"[Mobile] Aggregate error: {e}")
-        return _load_cache()
+        return load_cache()
 
 
 def _save_cache(data):
@@ -185,7 +203,8 @@ def _save_cache(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次成功抓取的快取 {"ios", "android", "updated_at"}（沒有快取時為空排行）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
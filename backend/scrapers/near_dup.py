@@ -0,0 +1,151 @@
+"""
+新聞近似重複偵測模組 — MinHash + LSH banding
+同一則新聞被 GNN / 4Gamers / UDN 各自改寫標題後，_news_hash 會視為不同新聞；
+這裡以標題 + 摘要的 shingle 計算 MinHash 簽章，經 LSH 分桶後只比對同桶候選，
+新項目與封存中近期項目比對的成本與封存總量無關（不做 O(n²) 兩兩比較）
+"""
+import hashlib
+import random
+import re
+from array import array
+
+import database
+
+NUM_PERM = 32             # MinHash 簽章長度
+BANDS = 16                # LSH band 數（每 band 2 列）→ 約 Jaccard 0.25 以上才會成為候選
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.5           # 候選的簽章相似度需達此門檻才算同一則新聞
+WINDOW_DAYS = 7           # 只和近 7 天封存比對（舊新聞不會再被改寫轉載）
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20260404)  # 固定種子：簽章需跨 process 穩定
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+_NOISE_RE = re.compile(r'[\s\W_]+')
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]')
+
+
+def _tokens(text: str) -> list[str]:
+    """中日韓文字逐字切，英數字保留完整單字；標點與空白一律視為分隔"""
+    tokens = []
+    for chunk in _NOISE_RE.split((text or "").lower()):
+        buf = ""
+        for ch in chunk:
+            if _CJK_RE.match(ch):
+                if buf:
+                    tokens.append(buf)
+                    buf = ""
+                tokens.append(ch)
+            else:
+                buf += ch
+        if buf:
+            tokens.append(buf)
+    return tokens
+
+
+def shingles(text: str) -> set[str]:
+    """相鄰 token 組成的 bigram 集合（只有一個 token 時取 token 本身）"""
+    tokens = _tokens(text)
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def _shingle_hash(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+
+
+def minhash(grams: set[str]) -> array:
+    """計算 MinHash 簽章（每個值截為 32 bit，方便以 BLOB 存入 SQLite）"""
+    sig = array("I", [0xFFFFFFFF] * NUM_PERM)
+    if not grams:
+        return sig
+    hashes = [_shingle_hash(g) for g in grams]
+    for i, (a, b) in enumerate(_PERMS):
+        sig[i] = min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFFFFFF
+    return sig
+
+
+def band_keys(sig: array) -> list[int]:
+    """每個 band 的列值雜湊成一個 int64 桶號（含 band 編號，避免跨 band 碰撞）"""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(a: array, b: array) -> float:
+    """兩簽章相同位置相等的比例 ≈ Jaccard 相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+async def assign_clusters(items: list[dict]) -> dict[str, str]:
+    """
+    為每則新聞指定 cluster_id（該群第一則新聞的 id）
+    已分群過的 id 直接沿用；新 id 透過 LSH 桶找候選，相似度達門檻就併入候選的群
+    """
+    ids = [it["id"] for it in items if it.get("id")]
+    clusters = await database.get_news_clusters(ids)
+
+    pending = []
+    for it in items:
+        news_id = it.get("id")
+        if not news_id or news_id in clusters:
+            continue
+        grams = shingles(f"{it.get('title', '')} {it.get('summary', '')}")
+        sig = minhash(grams)
+        # 沒有可比對內容的項目自成一群，也不放進 LSH 桶
+        pending.append((news_id, sig, band_keys(sig) if grams else []))
+    if not pending:
+        return clusters
+
+    all_keys = {k for _, _, keys in pending for k in keys}
+    buckets: dict[int, list[tuple[str, array]]] = {}
+    for key, cand_id, cluster_id, blob in await database.find_news_candidates(all_keys, WINDOW_DAYS):
+        sig = array("I")
+        sig.frombytes(blob)
+        clusters.setdefault(cand_id, cluster_id)
+        buckets.setdefault(key, []).append((cand_id, sig))
+
+    rows = []
+    for news_id, sig, keys in pending:
+        best_id, best_sim = None, THRESHOLD
+        for key in keys:
+            for cand_id, cand_sig in buckets.get(key, []):
+                sim = similarity(sig, cand_sig)
+                if sim >= best_sim:
+                    best_id, best_sim = cand_id, sim
+        cluster_id = clusters[best_id] if best_id else news_id
+        clusters[news_id] = cluster_id
+        rows.append((news_id, cluster_id, sig.tobytes(), keys))
+        # 同批次後續項目也能比對到這則
+        for key in keys:
+            buckets.setdefault(key, []).append((news_id, sig))
+
+    await database.save_news_clusters(rows)
+    return clusters
+
+
+def group_clusters(items: list[dict], clusters: dict[str, str]) -> list[dict]:
+    """
+    依 cluster_id 合併：每群保留順序上的第一則為代表，
+    其餘來源以 related 列出（含 source / title / url）
+    """
+    heads: dict[str, dict] = {}
+    grouped = []
+    for item in items:
+        cluster_id = clusters.get(item.get("id"), item.get("id"))
+        head = heads.get(cluster_id)
+        if head is None:
+            head = dict(item, cluster_id=cluster_id, related=[])
+            heads[cluster_id] = head
+            grouped.append(head)
+        else:
+            head["related"].append({
+                "source": item.get("source", ""),
+                "title": item.get("title", ""),
+                "url": item.get("url", ""),
+            })
+    return grouped
@@ -1,157 +1,88 @@
 """
 即時新聞爬取模組
-- 巴哈姆特 GNN RSS
-- 4Gamers TW 網頁爬蟲
-- UDN 遊戲角落 網頁爬蟲
+- 來源由 news_sources.json 註冊表設定（預設：巴哈姆特 GNN RSS、4Gamers TW JSON API、UDN 遊戲角落 RSS）
+- 所有來源以每主機並行上限 + 每來源 deadline 並行抓取，依完成順序合併
+- 上游以 ETag / Last-Modified / 內容雜湊判斷未變動時，整輪聚合直接沿用快取
+每次聚合抓到的所有新聞（含超出 MAX_NEWS 的部分）都會增量寫入 SQLite 封存供全文搜尋
+跨來源同一則新聞以 MinHash/LSH 分群合併，代表項目附帶其他來源連結（related）
+每則新聞附標題情緒（sentiment.analyze_many，與討論區共用 LRU memo）
+每則新聞以遊戲別名索引標記提到的遊戲（games；追蹤清單遊戲 + TAG_ALIASES 正式名稱）
 """
-import asyncio
-import feedparser
+import bisect
 import httpx
 import json
 import os
 import time
-import hashlib
-from email.utils import parsedate_to_datetime
+import database
+from scrapers import board_watch, game_aliases, near_dup, news_sources, sentiment
 
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
 CACHE_FILE = os.path.join(CACHE_DIR, "news_data.json")
 MAX_NEWS = 100
-PER_SOURCE = 35  # 每來源最多抓取數量，3 來源 × 35 = 105，去重後可達 100
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8",
-}
+_news_hash = news_sources.news_hash
+_registry: list[news_sources.SourceAdapter] | None = None
+_game_index: game_aliases.GameAliasIndex | None = None
 
 
-def _news_hash(title, source):
-    return hashlib.md5(f"{title}:{source}".encode()).hexdigest()
+def _get_registry() -> list[news_sources.SourceAdapter]:
+    """延遲載入來源註冊表（process 內只讀一次設定檔）"""
+    global _registry
+    if _registry is None:
+        _registry = news_sources.load_registry()
+    return _registry
 
 
-async def fetch_gnn_rss():
-    """巴哈姆特 GNN 遊戲新聞 RSS"""
-    url = "https://gnn.gamer.com.tw/rss.xml"
+def _get_game_index() -> game_aliases.GameAliasIndex:
+    """延遲建立新聞用遊戲別名索引（追蹤清單讀不到時只用 TAG_ALIASES）"""
+    global _game_index
+    if _game_index is None:
+        try:
+            games = [b["game"] for b in board_watch.load_watchlist() if b.get("game")]
+        except (OSError, ValueError) as e:
+            print(f"[News] Watchlist error: {e}")
+            games = []
+        _game_index = game_aliases.GameAliasIndex(games + list(game_aliases.TAG_ALIASES))
+    return _game_index
+
+
+async def _fetch_source(key: str) -> list[dict]:
+    """單獨抓取註冊表中的某個來源（錯誤時回傳空列表）"""
+    adapter = next((a for a in _get_registry() if a.key == key), None)
+    if adapter is None:
+        return []
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-        feed = feedparser.parse(resp.text)
-        news = []
-        for entry in feed.entries[:PER_SOURCE]:
-            # 將 RSS 日期格式轉為 ISO 8601
-            pub_raw = entry.get("published", "")
-            pub_iso = ""
-            if pub_raw:
-                try:
-                    from datetime import timezone
-                    dt = parsedate_to_datetime(pub_raw)
-                    pub_iso = dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-                except Exception:
-                    pub_iso = pub_raw
-            news.append({
-                "id": _news_hash(entry.get("title", ""), "GNN"),
-                "title": entry.get("title", ""),
-                "url": entry.get("link", ""),
-                "summary": entry.get("summary", "")[:100],
-                "source": "巴哈姆特 GNN",
-                "source_icon": "🎮",
-                "published_at": pub_iso,
-                "fetched_at": int(time.time()),
-            })
-        return news
+        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
+            return await adapter.fetch(client)
     except Exception as e:
-        print(f"[News] GNN RSS error: {e}")
+        print(f"[News] {adapter.name} error: {e}")
         return []
 
 
+async def fetch_gnn_rss():
+    """巴哈姆特 GNN 遊戲新聞 RSS"""
+    return await _fetch_source("gnn")
+
+
 async def fetch_4gamers_tw():
     """4Gamers TW 台灣遊戲新聞（JSON API）"""
-    url = f"https://www.4gamers.com.tw/site/api/news/latest?pageSize={PER_SOURCE}"
-    try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-        data = resp.json()
-        results = data.get("data", {}).get("results", [])
-        news = []
-        for item in results:
-            title = item.get("title", "")
-            if not title or len(title) < 5:
-                continue
-            published_at = ""
-            ts = item.get("createPublishedAt")
-            if ts:
-                published_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts / 1000))
-            news.append({
-                "id": _news_hash(title, "4Gamers TW"),
-                "title": title,
-                "url": item.get("canonicalUrl", ""),
-                "summary": (item.get("intro") or "")[:100],
-                "source": "4Gamers TW",
-                "source_icon": "🕹️",
-                "published_at": published_at,
-                "fetched_at": int(time.time()),
-            })
-        return news
-    except Exception as e:
-        print(f"[News] 4Gamers TW error: {e}")
-        return []
+    return await _fetch_source("4gamers")
 
 
 async def fetch_udn_game():
     """UDN 遊戲角落 RSS"""
-    url = "https://game.udn.com/game/rssfeed"
-    try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url, headers=HEADERS)
-            resp.raise_for_status()
-        feed = feedparser.parse(resp.text)
-        news = []
-        for entry in feed.entries[:PER_SOURCE]:
-            title = entry.get("title", "")
-            if not title or len(title) < 5:
-                continue
-            pub_raw = entry.get("published", "")
-            pub_iso = ""
-            if pub_raw:
-                try:
-                    from datetime import timezone
-                    dt = parsedate_to_datetime(pub_raw)
-                    pub_iso = dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-                except Exception:
-                    pub_iso = pub_raw
-            news.append({
-                "id": _news_hash(title, "UDN"),
-                "title": title,
-                "url": entry.get("link", ""),
-                "summary": (entry.get("summary", "") or "")[:100],
-                "source": "UDN 遊戲角落",
-                "source_icon": "📰",
-                "published_at": pub_iso,
-                "fetched_at": int(time.time()),
-            })
-        return news
-    except Exception as e:
-        print(f"[News] UDN error: {e}")
-        return []
+    return await _fetch_source("udn")
 
 
 async def aggregate_news():
-    """聚合所有新聞來源（三來源並行）"""
-    results = await asyncio.gather(
-        fetch_gnn_rss(),
-        fetch_4gamers_tw(),
-        fetch_udn_game(),
-        return_exceptions=True,
-    )
-
-    all_news = []
-    source_names = ["GNN", "4Gamers", "UDN"]
-    for i, r in enumerate(results):
-        if isinstance(r, Exception):
-            print(f"[News] {source_names[i]} gather error: {r}")
-        elif isinstance(r, list):
-            all_news.extend(r)
+    """聚合註冊表中所有新聞來源（每主機限流 + 每來源 deadline，依完成順序合併）"""
+    registry = _get_registry()
+    all_news = await news_sources.fetch_all(registry)
+
+    # 所有來源都沒變動（304 / 內容相同）：跳過封存、分群與寫快取
+    if registry and all(a.unchanged for a in registry) and os.path.exists(CACHE_FILE):
+        print("[News] All sources unchanged, keeping cache")
+        return load_cache()
 
     seen_ids = set()
     unique_news = []
@@ -160,9 +91,34 @@ async def aggregate_news():
             seen_ids.add(item["id"])
             unique_news.append(item)
 
+    # 截斷前先封存全部抓到的新聞（只寫入新 id）
+    try:
+        added = await database.archive_news(unique_news)
+        if added:
+            print(f"[News] Archived {added} new items")
+    except Exception as e:
+        print(f"[News] Archive error: {e}")
+
     unique_news.sort(key=lambda x: x.get("published_at") or "", reverse=True)
+
+    # 跨來源近似重複分群：同一則新聞只佔一個名額
+    try:
+        clusters = await near_dup.assign_clusters(unique_news)
+        unique_news = near_dup.group_clusters(unique_news, clusters)
+    except Exception as e:
+        print(f"[News] Clustering error: {e}")
+
     unique_news = unique_news[:MAX_NEWS]
 
+    # 標題情緒（LRU memo：上次刷新看過的標題不重新比對）
+    for item, label in zip(unique_news, sentiment.analyze_many(n.get("title", "") for n in unique_news)):
+        item["sentiment"] = label
+
+    # 遊戲標記（別名索引走訪標題一次；英數別名需完整單字）
+    index = _get_game_index()
+    for item in unique_news:
+        item["games"] = sorted(index.games_in(item.get("title", ""), word_boundary=True))
+
     source_counts = {}
     for item in unique_news:
         src = item.get("source", "unknown")
@@ -184,9 +140,97 @@ def _save_cache(data):
     os.makedirs(CACHE_DIR, exist_ok=True)
     with open(CACHE_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    _build_index(data, _cache_mtime())
+
+
+# ============================================================
+# 查詢索引：與快取並存，供 cursor 分頁 / 欄位投影 / 來源篩選
+# ============================================================
+# 來源轉接器產生的欄位 + aggregate_news 後續附加的欄位（分群代表 / 情緒 / 遊戲標記）
+NEWS_FIELDS = {
+    "id", "title", "url", "summary", "source", "source_icon", "published_at", "fetched_at",
+    "cluster_id", "related", "sentiment", "games",
+}
+
+# keys 依 (published_at, id) 升冪排序，分頁時用 bisect 找到 cursor 位置往前取
+_index = {"mtime": None, "updated_at": 0, "all": ([], []), "by_source": {}}
+
+
+def _cache_mtime():
+    try:
+        return os.path.getmtime(CACHE_FILE)
+    except OSError:
+        return None
+
+
+def _sort_key(item):
+    return (item.get("published_at") or "", item.get("id") or "")
+
+
+def _build_index(data, mtime):
+    items = sorted(data.get("news", []), key=_sort_key)
+    by_source = {}
+    for item in items:
+        by_source.setdefault(item.get("source", ""), []).append(item)
+    _index["mtime"] = mtime
+    _index["updated_at"] = data.get("updated_at", 0)
+    _index["all"] = ([_sort_key(it) for it in items], items)
+    _index["by_source"] = {
+        src: ([_sort_key(it) for it in its], its) for src, its in by_source.items()
+    }
+
+
+def _get_index():
+    """快取檔被其他 process 更新過（mtime 不同）才重建索引"""
+    mtime = _cache_mtime()
+    if _index["mtime"] is None or _index["mtime"] != mtime:
+        _build_index(load_cache(), mtime)
+    return _index
+
+
+def _encode_cursor(item) -> str:
+    published_at, news_id = _sort_key(item)
+    return f"{published_at}|{news_id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    published_at, sep, news_id = cursor.rpartition("|")
+    if not sep:
+        raise ValueError(f"invalid cursor: {cursor}")
+    return published_at, news_id
+
+
+def query_news(cursor: str | None = None, limit: int = 20, fields: list[str] | None = None,
+               source: str | None = None) -> dict:
+    """
+    依 published_at 由新到舊分頁查詢快取中的新聞
+    cursor: 上一頁回傳的 next_cursor；fields: 只回傳指定欄位；source: 只取該來源
+    """
+    if fields:
+        unknown = set(fields) - NEWS_FIELDS
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    index = _get_index()
+    keys, items = index["by_source"].get(source, ([], [])) if source else index["all"]
+
+    end = bisect.bisect_left(keys, _decode_cursor(cursor)) if cursor else len(items)
+    start = max(0, end - limit)
+    page = items[start:end][::-1]
+
+    if fields:
+        page = [{f: it.get(f) for f in fields} for it in page]
+
+    return {
+        "news": page,
+        "next_cursor": _encode_cursor(items[start]) if start > 0 else None,
+        "total_count": len(items),
+        "updated_at": index["updated_at"],
+    }
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次成功聚合的快取 {"news", "total_count", "updated_at"}（沒有快取時為空清單）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -0,0 +1,200 @@
+"""
+新聞來源註冊表 — 設定檔驅動的 RSS / JSON API adapter
+- 來源清單在 backend/news_sources.json（可用 NEWS_SOURCES_FILE 覆寫路徑）
+- 新增來源只要加一筆設定：type=rss 直接給 url；type=json 另給 items_path 與 fields 對照
+- fetch_all 以單一 httpx client 並行抓取：每個主機有並行上限，每個來源有獨立 deadline，
+  結果依完成順序合併，慢來源逾時只會缺該來源，不會拖住整批聚合
+- 所有請求走 http_cache.conditional_get：上游未變動時沿用上次結果，adapter.unchanged 標記為 True
+
+設定範例（JSON API）：
+    {"key": "xxx", "name": "顯示名稱", "icon": "📰", "type": "json",
+     "url": "https://example.com/api/news", "items_path": "data.items",
+     "fields": {"title": "headline", "url": "link", "summary": "desc", "published_at": "ts"},
+     "time_format": "epoch_ms" | "epoch" | "iso", "per_host": 1, "deadline": 10}
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import httpx
+
+from scrapers import http_cache, parsing
+
+SOURCES_FILE = os.getenv("NEWS_SOURCES_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "news_sources.json",
+)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8",
+}
+
+DEFAULTS = {"limit": 35, "deadline": 20, "per_host": 2, "min_title_len": 0}
+
+
+def news_hash(title, source):
+    return hashlib.md5(f"{title}:{source}".encode()).hexdigest()
+
+
+def _to_iso(value, time_format: str) -> str:
+    """各種時間格式 → UTC ISO 8601（無法解析時保留原字串）"""
+    if value in (None, ""):
+        return ""
+    try:
+        if time_format == "epoch_ms":
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value / 1000))
+        if time_format == "epoch":
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+        if time_format == "iso":
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        else:  # rfc822（RSS pubDate）
+            dt = parsedate_to_datetime(value)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    except Exception:
+        return str(value)
+
+
+class SourceAdapter:
+    """單一新聞來源：抓取 → 解析 → 正規化成統一新聞格式"""
+
+    def __init__(self, config: dict, defaults: dict | None = None):
+        cfg = {**DEFAULTS, **(defaults or {}), **config}
+        self.key = cfg["key"]
+        self.name = cfg["name"]
+        self.icon = cfg.get("icon", "📰")
+        self.url = cfg["url"]
+        self.host = urlparse(self.url).netloc
+        self.id_key = cfg.get("id_key", self.name)
+        self.limit = cfg["limit"]
+        self.deadline = cfg["deadline"]
+        self.per_host = cfg["per_host"]
+        self.min_title_len = cfg["min_title_len"]
+        self.config = cfg
+        self.unchanged = False  # 最近一次抓取是否沿用上次結果（304 / 內容相同）
+
+    async def fetch(self, client: httpx.AsyncClient) -> list[dict]:
+        self.unchanged = False
+        items, changed = await http_cache.conditional_get(client, self.url, self.parse, headers=HEADERS)
+        self.unchanged = not changed
+        return items
+
+    def parse(self, resp) -> list[dict]:
+        """可為 async（解析交給 parsing worker 時）"""
+        raise NotImplementedError
+
+    def _make_item(self, title, url, summary, published_at) -> dict | None:
+        title = (title or "").strip()
+        if not title or len(title) < self.min_title_len:
+            return None
+        return {
+            "id": news_hash(title, self.id_key),
+            "title": title,
+            "url": url or "",
+            "summary": (summary or "")[:100],
+            "source": self.name,
+            "source_icon": self.icon,
+            "published_at": published_at,
+            "fetched_at": int(time.time()),
+        }
+
+
+class RSSAdapter(SourceAdapter):
+    """RSS / Atom feed"""
+
+    async def parse(self, resp) -> list[dict]:
+        entries = await parsing.parse_feed(resp.text)
+        news = []
+        for entry in entries[:self.limit]:
+            item = self._make_item(
+                entry.get("title", ""),
+                entry.get("link", ""),
+                entry.get("summary", ""),
+                _to_iso(entry.get("published", ""), self.config.get("time_format", "rfc822")),
+            )
+            if item:
+                news.append(item)
+        return news
+
+
+class JSONAdapter(SourceAdapter):
+    """JSON API：items_path 以 . 分隔指到清單，fields 對照各欄位名稱"""
+
+    def parse(self, resp) -> list[dict]:
+        data = resp.json()
+        for part in self.config.get("items_path", "").split("."):
+            if part:
+                data = (data or {}).get(part, [])
+        fields = self.config.get("fields", {})
+        time_format = self.config.get("time_format", "iso")
+        news = []
+        for raw in (data or [])[:self.limit]:
+            item = self._make_item(
+                raw.get(fields.get("title", "title"), ""),
+                raw.get(fields.get("url", "url"), ""),
+                raw.get(fields.get("summary", "summary"), ""),
+                _to_iso(raw.get(fields.get("published_at", "published_at")), time_format),
+            )
+            if item:
+                news.append(item)
+        return news
+
+
+ADAPTERS = {"rss": RSSAdapter, "json": JSONAdapter}
+
+
+def load_registry(path: str | None = None) -> list[SourceAdapter]:
+    """讀取來源設定檔，略過 enabled=false 或 type 不支援的來源"""
+    with open(path or SOURCES_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = config.get("defaults", {})
+    adapters = []
+    for src in config.get("sources", []):
+        if not src.get("enabled", True):
+            continue
+        adapter_cls = ADAPTERS.get(src.get("type"))
+        if adapter_cls is None:
+            print(f"[News] Unknown source type for {src.get('key')}: {src.get('type')}")
+            continue
+        adapters.append(adapter_cls(src, defaults))
+    return adapters
+
+
+async def fetch_all(adapters: list[SourceAdapter], client: httpx.AsyncClient | None = None) -> list[dict]:
+    """
+    並行抓取所有來源，依完成順序合併
+    每個主機一個 semaphore（上限取該主機來源中最小的 per_host），deadline 含排隊時間
+    """
+    host_limits: dict[str, int] = {}
+    for a in adapters:
+        host_limits[a.host] = min(host_limits.get(a.host, a.per_host), a.per_host)
+    semaphores = {host: asyncio.Semaphore(limit) for host, limit in host_limits.items()}
+
+    async def _run(adapter: SourceAdapter, http: httpx.AsyncClient):
+        async def _guarded():
+            async with semaphores[adapter.host]:
+                return await adapter.fetch(http)
+        try:
+            return await asyncio.wait_for(_guarded(), timeout=adapter.deadline)
+        except asyncio.TimeoutError:
+            print(f"[News] {adapter.key} deadline exceeded ({adapter.deadline}s)")
+        except Exception as e:
+            print(f"[News] {adapter.key} error: {e}")
+        return []
+
+    async def _gather(http: httpx.AsyncClient):
+        merged = []
+        for done in asyncio.as_completed([_run(a, http) for a in adapters]):
+            merged.extend(await done)
+        return merged
+
+    if client is not None:
+        return await _gather(client)
+    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as http:
+        return await _gather(http)
@@ -0,0 +1,152 @@
+"""
+HTML / RSS 解析執行器 — 把 BeautifulSoup / feedparser 的 CPU 工作移出事件循環
+- parse_html(text, extract, *args)：在 worker 內建 soup 並呼叫 extract(soup, *args)，
+  只把 extract 回傳的純資料（dict / list / str）傳回事件循環，soup 本身不跨 worker
+- parse_feed(text)：在 worker 內跑 feedparser，回傳 entries
+- only=SoupStrainer(...)：只建立目標元素的子樹（如 a.board / div.r-ent / 巴哈 bsn 連結），
+  頁面其餘部分不進 soup，解析時間與記憶體都只剩一小部分
+- BeautifulSoup 的 tree builder 可插拔：PARSER_BACKEND=lxml（C 實作，較快）或 html.parser（純 Python），
+  未設定時有裝 lxml 就用 lxml，沒裝則退回 html.parser；extractor 不需因 backend 而改寫
+- 內容長度超過 PROCESS_THRESHOLD 且 process pool 可用時送進 process pool（不受 GIL 影響），
+  其餘送進 thread pool（小頁面省下序列化成本）
+- extract 必須是模組層級函式（process pool 以 pickle 傳遞函式參照）
+- PARSE_MODE=inline 時直接在事件循環上解析（舊行為，用來對照 loop lag）
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import feedparser
+from bs4 import BeautifulSoup, SoupStrainer
+
+PARSE_MODE = os.getenv("PARSE_MODE", "pool")
+PROCESS_WORKERS = int(os.getenv("PARSE_PROCESS_WORKERS", "1"))
+THREAD_WORKERS = int(os.getenv("PARSE_THREAD_WORKERS", "2"))
+PROCESS_THRESHOLD = int(os.getenv("PARSE_PROCESS_THRESHOLD", "200000"))  # 字元數
+
+BACKENDS = ("lxml", "html.parser")
+
+
+def _resolve_backend(requested: str) -> str:
+    """PARSER_BACKEND 指定的 backend 不可用時依 BACKENDS 順序退回下一個可用的"""
+    if requested and requested not in BACKENDS:
+        print(f"[Parsing] Unknown parser backend {requested!r}, expected one of {BACKENDS}")
+        requested = ""
+    for backend in ([requested] if requested else []) + list(BACKENDS):
+        if backend == "html.parser":
+            return backend
+        try:
+            __import__(backend)
+            return backend
+        except ImportError:
+            if backend == requested:
+                print(f"[Parsing] {backend} not installed, falling back")
+    return "html.parser"
+
+
+HTML_BACKEND = _resolve_backend(os.getenv("PARSER_BACKEND", ""))
+
+try:
+    from bs4.builder import LXMLTreeBuilder
+    from lxml import etree
+
+    class _HTMLBuilder(LXMLTreeBuilder):
+        """bs4 的 lxml builder 會傳 strip_cdata 給 etree.HTMLParser（lxml 5 起棄用、每次解析都發 DeprecationWarning），
+        這裡建 parser 時不轉傳"""
+
+        def default_parser(self, encoding):
+            def _parser(target, strip_cdata, recover, encoding):
+                return etree.HTMLParser(target=target, recover=recover, encoding=encoding)
+            return _parser
+except ImportError:
+    _HTMLBuilder = None
+
+_thread_pool: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+_stats = {kind: {"jobs": 0, "seconds": 0.0} for kind in ("inline", "thread", "process")}
+
+
+def _soup_extract(text: str, extract, args: tuple, only: SoupStrainer | None, backend: str):
+    if backend == "lxml" and _HTMLBuilder is not None:
+        return extract(BeautifulSoup(text, builder=_HTMLBuilder(), parse_only=only), *args)
+    return extract(BeautifulSoup(text, backend, parse_only=only), *args)
+
+
+def _feed_entries(text: str):
+    return feedparser.parse(text).entries
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="parse")
+    return _thread_pool
+
+
+def _get_process_pool() -> ProcessPoolExecutor | None:
+    global _process_pool
+    if _process_pool is None and PROCESS_WORKERS > 0:
+        # spawn：避免 fork 帶著事件循環與排程器執行緒的狀態
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def _run(func, *args, size: int):
+    """依模式與內容大小挑選執行位置，並記錄各 pool 的工作量"""
+    start = time.perf_counter()
+    if PARSE_MODE == "inline":
+        kind = "inline"
+        result = func(*args)
+    else:
+        loop = asyncio.get_running_loop()
+        pool = _get_process_pool() if size >= PROCESS_THRESHOLD else None
+        kind = "process" if pool else "thread"
+        try:
+            result = await loop.run_in_executor(pool or _get_thread_pool(), func, *args)
+        except BrokenProcessPool:
+            print("[Parsing] Process pool broken, falling back to thread pool")
+            _reset_process_pool()
+            kind = "thread"
+            result = await loop.run_in_executor(_get_thread_pool(), func, *args)
+    _stats[kind]["jobs"] += 1
+    _stats[kind]["seconds"] += time.perf_counter() - start
+    return result
+
+
+def _reset_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def parse_html(text: str, extract, *args, only: SoupStrainer | None = None):
+    """解析 text（only 限定只建立符合的子樹），在 worker 內呼叫 extract(soup, *args) 並回傳其結果"""
+    return await _run(_soup_extract, text, extract, args, only, HTML_BACKEND, size=len(text))
+
+
+async def parse_feed(text: str) -> list:
+    """以 feedparser 解析 RSS / Atom，回傳 entries"""
+    return await _run(_feed_entries, text, size=len(text))
+
+
+def stats() -> dict:
+    return {
+        "mode": PARSE_MODE,
+        "backend": HTML_BACKEND,
+        **{kind: {"jobs": s["jobs"], "seconds": round(s["seconds"], 3)} for kind, s in _stats.items()},
+    }
+
+
+def shutdown():
+    """關閉 worker pool（app 關閉時呼叫）"""
+    global _thread_pool
+    _reset_process_pool()
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False)
+        _thread_pool = None
@@ -0,0 +1,105 @@
+"""
+PTT 熱門文章推文擷取 — 抓 Tab 4 前 TOP_N 篇的文章頁，把推 / 噓 / → 推文逐行解析成各篇統計與推文內文
+- 快取鍵：文章 URL + 上次抓取時 index 頁顯示的推文數（seen_nrec）；推文數沒變的文章不重抓
+- 「爆」與「X」開頭的推文數是區間值，看不出有沒有新推文，改以 STALE_SECONDS 為期限重抓
+- 同時最多 CONCURRENCY 篇（與 ptt_crawler 的每主機上限分開，避免搶走版面爬取的額度）
+- 統計寫入 SQLite（ptt_comment），fetch_all_discussions 組裝時讀取推噓數給情緒分析
+"""
+import asyncio
+import re
+import time
+
+import httpx
+from bs4 import SoupStrainer
+
+import database
+from scrapers import board_watch, parsing, ptt_crawler
+
+TOP_N = 20
+CONCURRENCY = 3
+STALE_SECONDS = 1800    # 區間型推文數（爆 / X?）的重抓期限
+MAX_COMMENTS = 200      # 每篇保存的推文內文上限
+
+# 文章頁只需要推文列
+PUSH_LINES = SoupStrainer("div", class_=re.compile(r'(^|\s)push(\s|$)'))
+
+_TAGS = {"推": "push", "噓": "boo", "→": "neutral"}
+
+
+def _extract_comments(soup) -> dict:
+    """文章頁 → 推 / 噓 / → 計數 + 推文內文（依出現順序）"""
+    counts = {"push": 0, "boo": 0, "neutral": 0}
+    comments = []
+    for line in soup.select("div.push"):
+        tag_el = line.select_one(".push-tag")
+        kind = _TAGS.get(tag_el.get_text(strip=True)) if tag_el else None
+        if not kind:  # 「檔案過大」等系統提示也用 div.push
+            continue
+        counts[kind] += 1
+        user_el = line.select_one(".push-userid")
+        content_el = line.select_one(".push-content")
+        comments.append({
+            "tag": kind,
+            "user": user_el.get_text(strip=True) if user_el else "",
+            "content": content_el.get_text(strip=True).lstrip(":").strip() if content_el else "",
+        })
+    return {**counts, "comments": comments}
+
+
+def _needs_fetch(article: dict, cached: dict | None, now: int) -> bool:
+    if cached is None or cached["seen_nrec"] != article["popularity"]:
+        return True
+    if not article["popularity"].isdigit() and article["popularity"]:
+        return now - cached["fetched_at"] >= STALE_SECONDS
+    return False
+
+
+async def _fetch_article(client: httpx.AsyncClient, article: dict, semaphore: asyncio.Semaphore) -> dict | None:
+    try:
+        async with semaphore:
+            resp = await client.get(
+                article["url"], headers=ptt_crawler.HEADERS, cookies=ptt_crawler.PTT_COOKIES, timeout=10,
+            )
+        if resp.status_code != 200:
+            return None
+        parsed = await parsing.parse_html(resp.text, _extract_comments, only=PUSH_LINES)
+    except Exception as e:
+        print(f"[PTT] comments {article['url']} error: {e}")
+        return None
+    return {
+        "url": article["url"],
+        "seen_nrec": article["popularity"],
+        "push": parsed["push"],
+        "boo": parsed["boo"],
+        "neutral": parsed["neutral"],
+        "comments": parsed["comments"][:MAX_COMMENTS],
+    }
+
+
+async def refresh_top_comments(client: httpx.AsyncClient | None = None, limit: int = TOP_N) -> dict:
+    """抓追蹤版面熱門前 limit 篇中有新推文的文章，回傳 {"candidates", "fetched", "cached"}"""
+    boards = [b["key"] for b in board_watch.watched("ptt")]
+    articles = await ptt_crawler.hot_articles(boards, limit=limit)
+    cached = await database.get_ptt_comment_stats([a["url"] for a in articles])
+    now = int(time.time())
+    stale = [a for a in articles if _needs_fetch(a, cached.get(a["url"]), now)]
+
+    results = []
+    if stale:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        if client is not None:
+            results = await asyncio.gather(*[_fetch_article(client, a, semaphore) for a in stale])
+        else:
+            async with httpx.AsyncClient(timeout=15, follow_redirects=True) as http:
+                results = await asyncio.gather(*[_fetch_article(http, a, semaphore) for a in stale])
+        results = [r for r in results if r]
+        if results:
+            await database.save_ptt_comments(results)
+
+    return {"candidates": len(articles), "fetched": len(results), "cached": len(articles) - len(stale)}
+
+
+async def comment_stats(urls: list[str]) -> dict[str, dict]:
+    """{url: {"push", "boo", "neutral"}}，給情緒分析使用"""
+    stats = await database.get_ptt_comment_stats(urls)
+    return {url: {k: s[k] for k in ("push", "boo", "neutral")} for url, s in stats.items()}
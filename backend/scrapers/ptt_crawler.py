@@ -0,0 +1,208 @@
+"""
+PTT 增量爬蟲 — 每版記住上次爬到的頁碼與最新文章 ID（ptt_cursor），
+每次從 index.html 往回走 index{N}.html，走到上次的頁面就停
+- 上次的最新頁也會重抓（當時可能還沒滿），另外多往回 REFRESH_PAGES 頁更新近期文章推文數
+- 上次的最新文章（或更早發文的文章）出現後，再抓 REFRESH_PAGES 頁就停：刪文 / 重整使頁碼位移時，
+  不會因為記錄的頁碼過舊而多走
+- 發文時間早於滾動視窗（WINDOW_HOURS）的頁面不再往回走；第一次爬取最多 MAX_PAGES 頁
+- 所有 ptt.cc 請求共用模組層級的 host_semaphore()（PER_HOST）：多個版面並行、
+  或多個分片排程工作（board_watch）同時執行也不會超過上限
+- 推文數寫入 SQLite（ptt_article），熱門排行是「近 24 小時發文中推文數最多」，而非只看首頁 20 篇
+文章 ID（M.1712345678.A.ABC）內含發文 epoch 秒，直接作為發文時間
+"""
+import asyncio
+import re
+import time
+import weakref
+
+import httpx
+from bs4 import SoupStrainer
+
+import database
+from scrapers import parsing
+
+PTT_BASE = "https://www.ptt.cc"
+PTT_COOKIES = {"over18": "1"}
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+WINDOW_HOURS = 24
+MAX_PAGES = 30      # 每版每次最多抓幾頁（含 index.html）
+REFRESH_PAGES = 2   # 游標頁之前再多抓幾頁，更新近期文章的推文數
+PER_HOST = 4        # ptt.cc 同時進行的請求上限
+BATCH = 4           # 每次並行往回抓的頁數
+
+SKIP_PREFIXES = ["[公告]", "Fw: [公告]", "[版規]", "[置底]", "[活動]"]
+
+# index 頁只需要文章列、置底分隔線與翻頁按鈕
+INDEX_ENTRIES = SoupStrainer("div", class_=re.compile(r'(^|\s)(r-ent|r-list-sep|btn-group-paging)(\s|$)'))
+_ARTICLE_ID_RE = re.compile(r'/(M\.(\d+)\.A\.[0-9A-Za-z]+)\.html')
+_PAGE_RE = re.compile(r'index(\d+)\.html')
+
+# 事件循環 → ptt.cc semaphore（asyncio.Semaphore 只能在建立它的事件循環中使用）
+_host_semaphores = weakref.WeakKeyDictionary()
+
+
+def host_semaphore() -> asyncio.Semaphore:
+    """ptt.cc 共用的並行上限（PER_HOST），所有爬取路徑都經過它"""
+    loop = asyncio.get_running_loop()
+    semaphore = _host_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _host_semaphores[loop] = asyncio.Semaphore(PER_HOST)
+    return semaphore
+
+
+def nrec_value(pop_text: str) -> int:
+    """推文數文字 → 數值：爆 = 100、X 開頭（噓多）= -1、數字 = int、其他 = 0"""
+    if pop_text == "爆":
+        return 100
+    if pop_text.startswith("X"):
+        return -1
+    if pop_text.isdigit():
+        return int(pop_text)
+    return 0
+
+
+def _extract_index_page(soup) -> dict:
+    """index 頁 → 上一頁頁碼 + 文章列表（置底分隔線之後的置底文不算）"""
+    prev_page = None
+    for a in soup.select("div.btn-group-paging a"):
+        if "上頁" in a.get_text():
+            page_match = _PAGE_RE.search(a.get("href", ""))
+            if page_match:
+                prev_page = int(page_match.group(1))
+
+    articles = []
+    for item in soup.select("div.r-ent, div.r-list-sep"):
+        if "r-list-sep" in item.get("class", []):
+            break
+        title_el = item.select_one("div.title a")
+        if not title_el:  # 已刪除的文章沒有連結
+            continue
+
+        href = title_el.get("href", "")
+        id_match = _ARTICLE_ID_RE.search(href)
+        nrec_el = item.select_one("div.nrec span")
+        pop_text = nrec_el.get_text(strip=True) if nrec_el else "0"
+
+        articles.append({
+            "article_id": id_match.group(1) if id_match else href,
+            "posted_at": int(id_match.group(2)) if id_match else None,
+            "title": title_el.get_text(strip=True),
+            "url": f"{PTT_BASE}{href}",
+            "popularity": pop_text,
+            "popularity_value": nrec_value(pop_text),
+        })
+    return {"prev_page": prev_page, "articles": articles}
+
+
+async def _fetch_index(client: httpx.AsyncClient, board: str, page: int | None) -> dict | None:
+    name = f"index{page}.html" if page else "index.html"
+    try:
+        async with host_semaphore():
+            resp = await client.get(
+                f"{PTT_BASE}/bbs/{board}/{name}", headers=HEADERS, cookies=PTT_COOKIES, timeout=10,
+            )
+        if resp.status_code != 200:
+            return None
+        return await parsing.parse_html(resp.text, _extract_index_page, only=INDEX_ENTRIES)
+    except Exception as e:
+        print(f"[PTT] {board}/{name} error: {e}")
+        return None
+
+
+def _posted_at(article_id: str | None) -> int | None:
+    match = _ARTICLE_ID_RE.search(f"/{article_id}.html") if article_id else None
+    return int(match.group(2)) if match else None
+
+
+def _cursor_index(pages: list[dict], cursor_ts: int | None) -> int | None:
+    """pages 中第一個含上次最新文章（或更早發文）的頁序"""
+    if cursor_ts is None:
+        return None
+    for i, page in enumerate(pages):
+        if any(a["posted_at"] and a["posted_at"] <= cursor_ts for a in page["articles"]):
+            return i
+    return None
+
+
+def _oldest(pages: list[dict]) -> int | None:
+    times = [a["posted_at"] for p in pages for a in p["articles"] if a["posted_at"]]
+    return min(times) if times else None
+
+
+async def crawl_board(client: httpx.AsyncClient, board: str) -> dict:
+    """增量爬一個版面，回傳本次抓取的頁數與寫入的文章數"""
+    state = await database.get_ptt_cursor(board)
+
+    latest = await _fetch_index(client, board, None)
+    if latest is None:
+        return {"board": board, "pages": 0, "articles": 0}
+    latest_page = latest["prev_page"] + 1 if latest["prev_page"] else 1
+
+    # 往回走到上次的最新頁（含），再多 REFRESH_PAGES 頁
+    lower = max(1, state["last_page"] - REFRESH_PAGES) if state else 1
+    cutoff = int(time.time()) - WINDOW_HOURS * 3600
+    cursor_ts = _posted_at(state["last_article_id"]) if state else None
+    pages = [latest]
+    page = latest_page - 1
+    while page >= lower and len(pages) < MAX_PAGES:
+        oldest = _oldest(pages[-BATCH:])
+        if oldest is not None and oldest < cutoff:
+            break
+        # 走到上次的最新文章：只剩 REFRESH_PAGES 頁要補
+        limit = MAX_PAGES - len(pages)
+        reached = _cursor_index(pages, cursor_ts)
+        if reached is not None:
+            limit = min(limit, REFRESH_PAGES - (len(pages) - 1 - reached))
+            if limit <= 0:
+                break
+        batch = list(range(page, max(lower, page - BATCH + 1) - 1, -1))[:limit]
+        results = await asyncio.gather(*[_fetch_index(client, board, n) for n in batch])
+        pages.extend(r for r in results if r)
+        if any(r is None for r in results):
+            break
+        page = batch[-1] - 1
+
+    articles = [
+        a for p in pages for a in p["articles"]
+        if not any(a["title"].startswith(prefix) for prefix in SKIP_PREFIXES)
+        and "(本文已被刪除)" not in a["title"]
+    ]
+    newest = latest["articles"][-1]["article_id"] if latest["articles"] else None
+    await database.save_ptt_crawl(board, latest_page, newest, articles)
+    return {"board": board, "pages": len(pages), "articles": len(articles)}
+
+
+async def crawl_boards(client: httpx.AsyncClient, boards: list[str]) -> list[dict]:
+    """多版並行增量爬取（共用 ptt.cc semaphore）；單一版面失敗不影響其他版"""
+    results = await asyncio.gather(
+        *[crawl_board(client, board) for board in boards],
+        return_exceptions=True,
+    )
+    stats = []
+    for board, r in zip(boards, results):
+        if isinstance(r, Exception):
+            print(f"[PTT] crawl {board} error: {r}")
+            continue
+        stats.append(r)
+    return stats
+
+
+async def hot_articles(boards: list[str], limit: int = 20, hours: int = WINDOW_HOURS) -> list[dict]:
+    """滾動視窗內推文數最多的文章（Tab 4 格式）"""
+    rows = await database.get_ptt_hot_articles(boards, int(time.time()) - hours * 3600, limit)
+    return [
+        {
+            "title": r["title"],
+            "url": r["url"],
+            "source": f"PTT {r['board']}",
+            "board": r["board"],
+            "posted_at": r["posted_at"],
+            "popularity": r["nrec"],
+            "popularity_value": r["push"],
+        }
+        for r in rows
+    ]
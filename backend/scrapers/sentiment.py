@@ -1,7 +1,29 @@
 """
 遊戲討論情緒分析模組 — 基於 PTT 推噓比 + 遊戲領域關鍵字
 不依賴外部 NLP 套件，純規則判斷
+有文章頁推文統計（ptt_comments）時，以實際推 / 噓行數取代 index 頁的推文數
+關鍵字比對用 keyword_matcher（Aho-Corasick），正負面一次走訪
+標題關鍵字判斷結果以正規化標題為 key 存在有上限的 LRU（MEMO_SIZE），跨刷新沿用：
+每次刷新大多是上次看過的標題，analyze_many 批次判斷時只有新標題需要實際比對；新聞、每周摘要共用同一份
+標題判斷引擎（SENTIMENT_ENGINE）：
+- rules（預設）：關鍵字規則
+- nb：sentiment_model 的字元 n-gram naive Bayes
+- hybrid：先看關鍵字，規則判為中性時採用 naive Bayes（信心 ≥ NB_MIN_CONFIDENCE）
+模型檔不存在時 nb / hybrid 退回 rules
 """
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Iterable
+
+from scrapers import sentiment_model
+from scrapers.keyword_matcher import KeywordMatcher
+
+# 推文統計：推 + 噓達 MIN_VOTES 行才採用，噓比例 ≥ BOO_RATIO 為負面、推比例 ≥ PUSH_RATIO 為正面
+MIN_VOTES = 10
+BOO_RATIO = 0.35
+PUSH_RATIO = 0.85
 
 # 遊戲領域正面/負面關鍵字
 _POS_KEYWORDS = {
@@ -18,6 +40,64 @@ _NEG_KEYWORDS = {
     "抄襲", "外掛", "掛機", "鎖區", "刪號",
 }
 
+# 正負面關鍵字編成一個自動機，每個標題只走訪一次
+_MATCHER = KeywordMatcher({"pos": _POS_KEYWORDS, "neg": _NEG_KEYWORDS})
+
+ENGINE = os.getenv("SENTIMENT_ENGINE", "rules")
+NB_MIN_CONFIDENCE = float(os.getenv("SENTIMENT_NB_MIN_CONFIDENCE", "0.7"))
+
+MEMO_SIZE = int(os.getenv("SENTIMENT_MEMO_SIZE", "10000"))
+_memo: OrderedDict[str, str] = OrderedDict()   # 正規化標題 → label
+_memo_stats = {"hits": 0, "misses": 0}
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_title(title: str) -> str:
+    """全形 / 半形統一（NFKC）、連續空白合併，作為 memo key"""
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", title or "")).strip()
+
+
+def _keyword_label(title: str) -> str:
+    pos_hits, neg_hits = 0, 0
+    if title:
+        hits = _MATCHER.counts(title)
+        pos_hits = hits.get("pos", 0)
+        neg_hits = hits.get("neg", 0)
+    if pos_hits > neg_hits:
+        return "positive"
+    elif neg_hits > pos_hits:
+        return "negative"
+    return "neutral"
+
+
+def _title_label(title: str) -> str:
+    """依 ENGINE 判斷標題情緒"""
+    model = sentiment_model.model
+    if ENGINE == "rules" or model is None:
+        return _keyword_label(title)
+    if ENGINE == "nb":
+        return model.predict(title)["label"]
+    label = _keyword_label(title)
+    if label != "neutral":
+        return label
+    guess = model.predict(title)
+    return guess["label"] if guess["confidence"] >= NB_MIN_CONFIDENCE else label
+
+
+def _memo_label(title: str) -> str:
+    key = normalize_title(title)
+    label = _memo.get(key)
+    if label is not None:
+        _memo.move_to_end(key)
+        _memo_stats["hits"] += 1
+        return label
+    _memo_stats["misses"] += 1
+    label = _title_label(key)
+    _memo[key] = label
+    if len(_memo) > MEMO_SIZE:
+        _memo.popitem(last=False)
+    return label
+
 
 def analyze_title(title: str) -> dict:
     """
@@ -26,52 +106,79 @@ def analyze_title(title: str) -> dict:
     """
     if not title:
         return {"label": "neutral"}
+    return {"label": _memo_label(title)}
 
-    pos_hits = sum(1 for kw in _POS_KEYWORDS if kw in title)
-    neg_hits = sum(1 for kw in _NEG_KEYWORDS if kw in title)
 
-    if pos_hits > neg_hits:
-        return {"label": "positive"}
-    elif neg_hits > pos_hits:
-        return {"label": "negative"}
-    return {"label": "neutral"}
+def analyze_many(titles: Iterable[str]) -> list[dict]:
+    """
+    批次判斷標題情緒（經 LRU memo，重複標題不重新比對）
+    回傳與 titles 同順序的 [{"label": ...}]
+    """
+    return [{"label": _memo_label(t)} if t else {"label": "neutral"} for t in titles]
+
 
+def memo_stats() -> dict:
+    total = _memo_stats["hits"] + _memo_stats["misses"]
+    return {
+        "engine": ENGINE if sentiment_model.model is not None else "rules",
+        "size": len(_memo),
+        "max_size": MEMO_SIZE,
+        **_memo_stats,
+        "hit_rate": round(_memo_stats["hits"] / total, 3) if total else 0.0,
+    }
 
-def analyze_ptt_article(title: str, popularity_value: int) -> dict:
+
+def clear_memo():
+    _memo.clear()
+    _memo_stats["hits"] = _memo_stats["misses"] = 0
+
+
+def _comment_signal(comments: dict | None) -> str | None:
+    """推 / 噓行數 → 情緒訊號；票數不足時回傳 None"""
+    if not comments:
+        return None
+    votes = comments.get("push", 0) + comments.get("boo", 0)
+    if votes < MIN_VOTES:
+        return None
+    if comments.get("boo", 0) / votes >= BOO_RATIO:
+        return "negative"
+    if comments.get("push", 0) / votes >= PUSH_RATIO:
+        return "positive"
+    return "neutral"
+
+
+def analyze_ptt_article(title: str, popularity_value: int, comments: dict | None = None) -> dict:
     """
     PTT 文章：結合推噓比 + 關鍵字判斷
     popularity_value: 100 = 爆, 正數 = 推多, 負數(X) = 噓多, 0 = 無
+    comments: 文章頁推文統計 {"push", "boo", "neutral"}（可無）
     回傳 {"label": "positive"|"negative"|"neutral"}
     """
-    # 先看推噓比（權重較高，因為是真實用戶行為）
-    if popularity_value >= 50:
+    # 先看推噓比（權重較高，因為是真實用戶行為）；有推文統計時用實際推 / 噓行數
+    comment_signal = _comment_signal(comments)
+    if comment_signal is not None:
+        pop_signal = comment_signal
+    elif popularity_value >= 50:
         pop_signal = "positive"
     elif popularity_value < 0:
         pop_signal = "negative"
     else:
         pop_signal = "neutral"
 
-    # 再看關鍵字
-    kw = analyze_title(title)
-
-    # 推噓比 > 關鍵字（真實行為優先）
+    # 推噓比 > 關鍵字（真實行為優先）；推噓比中性時才看關鍵字
     if pop_signal != "neutral":
         return {"label": pop_signal}
-    return kw
+    return analyze_title(title)
 
 
-def aggregate_sentiment(items: list[dict]) -> dict:
-    """計算一批項目的整體情緒（每項需有 sentiment.label）"""
-    if not items:
-        return {"label": "neutral", "positive_pct": 0, "negative_pct": 0, "neutral_pct": 100}
-
-    labels = [it["sentiment"]["label"] for it in items if "sentiment" in it]
-    total = len(labels)
+def summarize_counts(positive: int, negative: int, neutral: int) -> dict:
+    """正 / 負 / 中性計數 → 整體情緒與百分比（正負差距超過 10 個百分點才判定傾向）"""
+    total = positive + negative + neutral
     if total == 0:
         return {"label": "neutral", "positive_pct": 0, "negative_pct": 0, "neutral_pct": 100}
 
-    pos_pct = round(labels.count("positive") / total * 100, 1)
-    neg_pct = round(labels.count("negative") / total * 100, 1)
+    pos_pct = round(positive / total * 100, 1)
+    neg_pct = round(negative / total * 100, 1)
     neu_pct = round(100 - pos_pct - neg_pct, 1)
 
     if pos_pct > neg_pct + 10:
@@ -82,3 +189,10 @@ def aggregate_sentiment(items: list[dict]) -> dict:
         overall = "neutral"
 
     return {"label": overall, "positive_pct": pos_pct, "negative_pct": neg_pct, "neutral_pct": neu_pct}
+
+
+def aggregate_sentiment(items: list[dict]) -> dict:
+    """計算一批項目的整體情緒（每項需有 sentiment.label）"""
+    labels = [it["sentiment"]["label"] for it in items if "sentiment" in it]
+    return summarize_counts(labels.count("positive"), labels.count("negative"),
+                            len(labels) - labels.count("positive") - labels.count("negative"))
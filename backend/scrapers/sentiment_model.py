@@ -0,0 +1,207 @@
+"""
+標題情緒分類模型 — 字元 n-gram 雜湊特徵 + 多項式 naive Bayes（sentiment 的另一個判斷引擎）
+- 特徵：NFKC + 小寫後的字元 1~3-gram，以 crc32 雜湊到 2^bits 個桶（不需要詞表，模型大小固定）
+- 模型檔為精簡二進位（見 _HEADER），log 機率表以 float32 依「桶 × 類別」排列；
+  import 時以 mmap 唯讀映射，只有實際查到的頁面才會進記憶體，多個 worker 共用同一份 page cache
+- 純 Python（struct + mmap + memoryview），不依賴 numpy
+- 模型檔不存在時 model 為 None，sentiment 退回關鍵字規則
+- 模型檔不隨 repo 提交：需以實際標註語料訓練（models/sentiment_train.tsv 只是格式範例，量太少），
+  holdout 準確率勝過 rules 再部署並設定 SENTIMENT_ENGINE=nb / hybrid
+
+訓練 / 試算（於 backend/ 目錄）：
+    python -m scrapers.sentiment_model train models/sentiment_train.tsv [-o models/sentiment_nb.bin]
+        [--bits 14] [--ngrams 1-3] [--alpha 0.5] [--holdout 0.2]
+    python -m scrapers.sentiment_model predict "標題" ...
+訓練資料為 TSV：每行「label<TAB>title」，# 開頭為註解
+"""
+import argparse
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import unicodedata
+import zlib
+
+MODEL_FILE = os.getenv("SENTIMENT_MODEL_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "models", "sentiment_nb.bin",
+)
+
+MAGIC = b"GINB"
+VERSION = 1
+# magic, version, bits, ngram_min, ngram_max, 類別數
+_HEADER = struct.Struct("<4sHBBBB2x")
+_LABEL = struct.Struct("<16s")
+DEFAULT_BITS = 14
+DEFAULT_NGRAMS = (1, 3)
+
+
+def _grams(title: str, ngram_min: int, ngram_max: int):
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    for n in range(ngram_min, ngram_max + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if not gram.isspace():
+                yield gram
+
+
+def features(title: str, bits: int, ngram_min: int, ngram_max: int) -> list[int]:
+    """標題 → 雜湊桶編號（重複出現的 n-gram 重複計入）"""
+    mask = (1 << bits) - 1
+    return [zlib.crc32(g.encode("utf-8")) & mask for g in _grams(title, ngram_min, ngram_max)]
+
+
+class NaiveBayesModel:
+    """唯讀模型：header + labels + log priors + log 機率表（buckets × classes）"""
+
+    def __init__(self, buffer, source: str = ""):
+        self.source = source
+        self._buffer = buffer  # mmap 或 bytes；保留參照避免被回收
+        magic, version, bits, ngram_min, ngram_max, n_classes = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a sentiment model file (magic={magic!r}, version={version})")
+        offset = _HEADER.size
+        self.labels = []
+        for _ in range(n_classes):
+            self.labels.append(_LABEL.unpack_from(buffer, offset)[0].rstrip(b"\0").decode("ascii"))
+            offset += _LABEL.size
+        self.bits, self.ngram_min, self.ngram_max = bits, ngram_min, ngram_max
+        self.priors = struct.unpack_from(f"<{n_classes}f", buffer, offset)
+        offset += 4 * n_classes
+        size = (1 << bits) * n_classes
+        if len(buffer) - offset != 4 * size:
+            raise ValueError("truncated sentiment model file")
+        view = memoryview(buffer)[offset:]
+        self._table = view.cast("f") if sys.byteorder == "little" else None
+        if self._table is None:  # big-endian 主機：改為解包整張表
+            self._table = struct.unpack_from(f"<{size}f", buffer, offset)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesModel":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, source=path)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._buffer)
+
+    def scores(self, title: str) -> list[float]:
+        """各類別的 log 後驗（未正規化）"""
+        table, n_classes = self._table, len(self.labels)
+        totals = list(self.priors)
+        for h in features(title, self.bits, self.ngram_min, self.ngram_max):
+            base = h * n_classes
+            for c in range(n_classes):
+                totals[c] += table[base + c]
+        return totals
+
+    def predict(self, title: str) -> dict:
+        """→ {"label", "confidence"}（confidence 為最高類別的後驗機率）"""
+        totals = self.scores(title)
+        best = max(range(len(totals)), key=totals.__getitem__)
+        norm = sum(math.exp(s - totals[best]) for s in totals)
+        return {"label": self.labels[best], "confidence": round(1 / norm, 3)}
+
+
+def train(samples: list[tuple[str, str]], bits: int = DEFAULT_BITS,
+          ngrams: tuple[int, int] = DEFAULT_NGRAMS, alpha: float = 0.5) -> bytes:
+    """(label, title) → 模型檔內容（多項式 NB，additive smoothing alpha）"""
+    labels = sorted({label for label, _ in samples})
+    if not labels:
+        raise ValueError("no training samples")
+    buckets = 1 << bits
+    counts = [[0] * buckets for _ in labels]
+    totals = [0] * len(labels)
+    docs = [0] * len(labels)
+    for label, title in samples:
+        c = labels.index(label)
+        docs[c] += 1
+        for h in features(title, bits, *ngrams):
+            counts[c][h] += 1
+            totals[c] += 1
+
+    priors = [math.log(d / len(samples)) for d in docs]
+    table = []
+    denoms = [math.log(totals[c] + alpha * buckets) for c in range(len(labels))]
+    for h in range(buckets):
+        for c in range(len(labels)):
+            table.append(math.log(counts[c][h] + alpha) - denoms[c])
+
+    return b"".join([
+        _HEADER.pack(MAGIC, VERSION, bits, ngrams[0], ngrams[1], len(labels)),
+        *(_LABEL.pack(label.encode("ascii")) for label in labels),
+        struct.pack(f"<{len(labels)}f", *priors),
+        struct.pack(f"<{len(table)}f", *table),
+    ])
+
+
+def read_samples(path: str) -> list[tuple[str, str]]:
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, _, title = line.partition("\t")
+            if title:
+                samples.append((label.strip(), title.strip()))
+    return samples
+
+
+def _load_default() -> NaiveBayesModel | None:
+    if not os.path.exists(MODEL_FILE):
+        return None
+    try:
+        return NaiveBayesModel.load(MODEL_FILE)
+    except (OSError, ValueError) as e:
+        print(f"[Sentiment] Model load failed ({MODEL_FILE}): {e}")
+        return None
+
+
+model = _load_default()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="標題情緒 naive Bayes 模型")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_train = sub.add_parser("train", help="以 TSV 標註資料訓練模型")
+    p_train.add_argument("data", help="label<TAB>title 檔案")
+    p_train.add_argument("-o", "--output", default=MODEL_FILE, help="模型輸出路徑")
+    p_train.add_argument("--bits", type=int, default=DEFAULT_BITS, help="雜湊桶數 2^bits")
+    p_train.add_argument("--ngrams", default="%d-%d" % DEFAULT_NGRAMS, help="字元 n-gram 範圍，如 1-3")
+    p_train.add_argument("--alpha", type=float, default=0.5, help="smoothing")
+    p_train.add_argument("--holdout", type=float, default=0.0, help="保留比例做驗證（0 = 全部拿來訓練）")
+    p_predict = sub.add_parser("predict", help="用模型判斷標題")
+    p_predict.add_argument("titles", nargs="+")
+    p_predict.add_argument("-m", "--model", default=MODEL_FILE)
+    opts = parser.parse_args(argv)
+
+    if opts.cmd == "predict":
+        nb = NaiveBayesModel.load(opts.model)
+        for title in opts.titles:
+            print(f"{nb.predict(title)}\t{title}")
+        return
+
+    ngram_min, ngram_max = (int(n) for n in opts.ngrams.split("-"))
+    samples = read_samples(opts.data)
+    if opts.holdout:
+        rng = random.Random(0)
+        shuffled = samples[:]
+        rng.shuffle(shuffled)
+        cut = int(len(shuffled) * (1 - opts.holdout))
+        held = shuffled[cut:]
+        nb = NaiveBayesModel(train(shuffled[:cut], opts.bits, (ngram_min, ngram_max), opts.alpha))
+        correct = sum(1 for label, title in held if nb.predict(title)["label"] == label)
+        print(f"holdout accuracy: {correct}/{len(held)} = {correct / max(1, len(held)):.2%}")
+
+    data = train(samples, opts.bits, (ngram_min, ngram_max), opts.alpha)
+    os.makedirs(os.path.dirname(os.path.abspath(opts.output)), exist_ok=True)
+    with open(opts.output, "wb") as f:
+        f.write(data)
+    print(f"trained on {len(samples)} titles → {opts.output} ({len(data) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
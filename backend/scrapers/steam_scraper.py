@@ -44,7 +44,7 @@ async def fetch_top_games():
 
     except Exception as e:
         print(f"[Steam] Error fetching top games: {e}")
-        return _load_cache().get("games", [])
+        return load_cache().get("games", [])
 
 
 async def fetch_player_count(appid: int):
@@ -129,7 +129,8 @@ def _save_cache(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次成功抓取的快取 {"games", "updated_at"}（沒有快取時為空 dict）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -67,13 +67,13 @@ async def fetch_top_games(limit=20):
 
     if not token:
         print("[Twitch] No token available, returning cached data")
-        return _load_cache().get("games", _get_demo_data())
+        return load_cache().get("games", _get_demo_data())
 
     try:
         # 1. 抓取中文語言串流（language=zh 涵蓋繁體中文台灣/香港）
         streams = await _fetch_zh_streams(token, count=100)
         if not streams:
-            return _load_cache().get("games", _get_demo_data())
+            return load_cache().get("games", _get_demo_data())
 
         # 2. 依遊戲聚合觀看人數
         game_viewers = {}
@@ -105,7 +105,7 @@ async def fetch_top_games(limit=20):
 
     except Exception as e:
         print(f"[Twitch] Error fetching top games: {e}")
-        return _load_cache().get("games", _get_demo_data())
+        return load_cache().get("games", _get_demo_data())
 
 
 async def _fetch_zh_streams(token, count=100):
@@ -166,7 +166,8 @@ def _save_cache(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次成功抓取的快取 {"games", "updated_at"}（沒有快取時為空 dict）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
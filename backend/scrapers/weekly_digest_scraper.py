@@ -4,13 +4,24 @@
 - 資料來源：Google News RSS + 4Gamers tag + YouTube Data API + 巴哈遊戲板公告
 - 分類：📢 廣告/行銷 │ 🎉 活動 │ 🤝 聯名合作
 - 時間範圍：過去 14 天（涵蓋進行中活動）
-- 排程：每周一執行一次
+- 排程：每日增量執行一次：每個遊戲 × 來源記錄水位（上次成功查詢的時間），只查水位之後的新項目，
+  項目寫入 SQLite（database.digest_item，以 URL 與正規化標題去重）；摘要為該表近 14 天的查詢結果
+- 去重：標題指紋（去掉來源前綴 / 網站名稱 / 標點）+ 正規化 URL；指紋 seen-set（database.digest_seen）
+  保留比 item store 久，已看過的項目只推進既有列的時間、不再跑情緒分析；既有列已被清理（轉載舊公告）時
+  以第一次看到的時間重新寫入；第一次看到在 NEW_ITEM_DAYS 內的項目標記 new，其餘 ongoing
+- 並行：所有遊戲 × 來源一起排入，每個上游主機一個 semaphore（HOST_LIMITS），
+  單次來源查詢逾時（SOURCE_TIMEOUT，不含排隊時間）只缺該來源
+- Google News：多個遊戲合併成一個 OR 查詢（GOOGLE_NEWS_BATCH_SIZE，URL 不超過 GOOGLE_NEWS_MAX_URL），
+  每個 feed 只解析一次、依別名索引分派給各遊戲；feed 飽和時分到太少項目的遊戲改用單一遊戲查詢
+- YouTube / Google CSE：每日配額帳本 + 回應快取（api_quota），剩餘配額依遊戲排名優先配給，
+  配不到的遊戲該來源標記 skipped、水位不前進
+- 巴哈 BSN：名稱 → BSN 解析結果存在 SQLite（含否定紀錄與 TTL），KNOWN_BSN 為種子，穩定後幾乎不需搜尋
+- 單次執行的狀態（別名索引、Google News 批次、配額預算）放在 DigestRun，由主函式傳給各查詢函式；
+  重疊的執行（排程 + 手動重新整理）各有一份，互不覆寫
 """
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
 from collections import Counter
-import feedparser
 import json
 import os
 import sys
@@ -19,6 +30,11 @@ import re
 import urllib.parse
 from datetime import datetime, timedelta, timezone
 from email.utils import parsedate_to_datetime
+from bs4 import SoupStrainer
+import database
+from scrapers import api_quota, fingerprint, game_aliases, http_cache, parsing, sentiment
+from scrapers.game_aliases import TAG_ALIASES, GameAliasIndex  # noqa: F401（TAG_ALIASES 沿用舊匯入路徑）
+from scrapers.keyword_matcher import KeywordMatcher
 
 TW_TZ = timezone(timedelta(hours=8))
 
@@ -40,6 +56,29 @@ HEADERS = {
     "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8",
 }
 
+# 每個上游主機同時進行的來源查詢上限（API 配額類較保守）
+HOST_LIMITS = {
+    "google_news": 3,
+    "4gamers": 2,
+    "youtube": 2,
+    "google_cse": 1,
+    "bahamut": 2,
+}
+SOURCE_TIMEOUT = 45  # 單一遊戲單一來源的查詢上限（秒），取得 semaphore 後才開始計時
+
+# 配額 API 端點（可改指本機替身伺服器離線測試，見 tests/api_standin.py）
+YOUTUBE_SEARCH_URL = os.getenv("YOUTUBE_SEARCH_URL") or "https://www.googleapis.com/youtube/v3/search"
+GOOGLE_CSE_URL = os.getenv("GOOGLE_CSE_URL") or "https://www.googleapis.com/customsearch/v1"
+# 聚焦行銷相關搜尋（活動/聯名/廣告），不搜「官方」避免拉到一般影片；每個遊戲每次執行各查一次
+YOUTUBE_QUERIES = ["{game} 活動 聯名", "{game} 廣告 PV CM"]
+
+# Google News 合併查詢
+GOOGLE_NEWS_BATCH_SIZE = 8    # 每個 OR 查詢最多合併的遊戲數（1 = 逐一遊戲查詢）
+GOOGLE_NEWS_MAX_URL = 2000    # 合併查詢 URL 長度上限
+GOOGLE_NEWS_FEED_CAP = 100    # RSS 單次最多回傳筆數；達到上限表示部分遊戲的結果可能被擠掉
+GOOGLE_NEWS_MIN_ENTRIES = 3   # 飽和 feed 中分到少於此筆數的遊戲改用單一遊戲查詢
+GOOGLE_NEWS_MAX_ITEMS = 15    # 每個遊戲最多收錄的新聞數
+
 # ── 行銷分類關鍵字（僅行銷/推廣活動，排除營運公告/版更等）──
 EVENT_KEYWORDS = [
     "活動", "限定", "開跑", "登場", "開放", "賽季",
@@ -51,6 +90,79 @@ AD_KEYWORDS = [
     "廣告", "代言", "大使", "宣傳", "PV", "CM", "預告", "trailer",
     "MV", "形象", "品牌", "主題曲", "贊助", "推廣", "KOL",
 ]
+MARKETING_KEYWORDS = EVENT_KEYWORDS + COLLAB_KEYWORDS + AD_KEYWORDS
+
+# ── 各來源的排除清單 ──
+# 非行銷噪音（4Gamers / 社群貼文）
+NOISE_KEYWORDS = [
+    "性侵", "詐騙", "犯罪", "逮捕", "判刑", "起訴",
+    "買賣", "代儲", "代打", "徵人", "收購",
+]
+# 非行銷噪音（Google News：犯罪新聞、股市、純電競賽事等無關報導）
+NEWS_NOISE_KEYWORDS = [
+    "性侵", "詐騙", "犯罪", "逮捕", "判刑", "起訴", "酒駕",
+    "股價", "財報", "營收報告", "法說會",
+]
+# 評測/攻略等非行銷內容（4Gamers）
+REVIEW_SKIP_WORDS = [
+    "評測", "review", "心得", "開箱", "攻略", "教學",
+    "tier list", "比較", "推薦", "懶人包",
+]
+# 攻略/實況類影片（YouTube）
+YT_SKIP_WORDS = [
+    "實況", "直播", "攻略", "教學", "開箱", "心得", "評測", "review",
+    "gameplay", "walkthrough", "let's play", "分享", "試玩", "體驗",
+    "比較", "推薦", "tier list", "通關", "挑戰", "抽卡", "課金",
+    "pvp", "pve", "組隊", "配裝", "懶人包",
+]
+
+# ── 巴哈板頁貼文篩選 ──
+# 只保留情報類貼文前綴
+BAHAMUT_ALLOW_PREFIXES = ["【情報】", "【官方】", "【活動】"]
+# 排除非行銷類貼文
+BAHAMUT_DENY_PREFIXES = [
+    "【心得】", "【攻略】", "【閒聊】", "【問題】",
+    "【密技】", "【討論】", "【公告】", "【其他】",
+    "【造型】", "【分享】", "【集中】", "【數據】",
+]
+# 板務/行政類關鍵字（直接排除）
+BAHAMUT_ADMIN_SKIP_KWS = [
+    "板主", "板規", "哈啦區", "發文規則", "申請人", "看板規範",
+    "站規", "版規", "徵板主", "子板", "輕鬆不放縱",
+    "集中串規則", "發文注意", "板務",
+]
+# 玩家社群類內容（非官方行銷）
+BAHAMUT_PLAYER_SKIP_KWS = [
+    "集中串", "互助區", "交換", "徵人", "徵友", "找人",
+    "贈送串", "分享串", "集中討論", "捏臉", "捏角",
+    "序號分享", "人品爆炸",
+]
+# 行銷相關關鍵字（title 必須包含至少一個）
+BAHAMUT_MARKETING_KWS = [
+    "活動", "聯名", "合作", "限定", "聯動", "連動", "跨界",
+    "開跑", "獎勵", "贈送", "免費", "預告", "賽事", "代言",
+    "廣告", "PV", "主題曲", "贊助", "周年", "週年", "節慶",
+    "春節", "新年", "造型", "儲值", "抽獎", "禮包",
+]
+
+# ── 關鍵字自動機：模組載入時編譯一次，每筆項目走訪一次即得到所有清單的命中 ──
+# ignore_case 與否沿用各來源原本的比對方式（4Gamers / YouTube 比對小寫文字）
+_TAG_KEYWORDS = {"ad": AD_KEYWORDS, "collab": COLLAB_KEYWORDS, "event": EVENT_KEYWORDS}
+_CLASSIFY_MATCHER = KeywordMatcher(_TAG_KEYWORDS)
+# _classify_item 以原關鍵字比對小寫化的文字，含大寫的關鍵字（PV、CM…）不會命中；
+# 併入 ignore_case 自動機時只取全小寫的關鍵字，篩選與分類一次走訪且分類結果不變
+_LOWER_TAG_KEYWORDS = {tag: [kw for kw in kws if kw == kw.lower()] for tag, kws in _TAG_KEYWORDS.items()}
+_4GAMERS_MATCHER = KeywordMatcher({
+    "noise": NOISE_KEYWORDS, "skip": REVIEW_SKIP_WORDS, "marketing": MARKETING_KEYWORDS, **_LOWER_TAG_KEYWORDS,
+}, ignore_case=True)
+_YT_MATCHER = KeywordMatcher({
+    "skip": YT_SKIP_WORDS, "marketing": MARKETING_KEYWORDS, **_LOWER_TAG_KEYWORDS,
+}, ignore_case=True)
+_NEWS_MATCHER = KeywordMatcher({"noise": NEWS_NOISE_KEYWORDS, "marketing": MARKETING_KEYWORDS})
+_SOCIAL_MATCHER = KeywordMatcher({"noise": NOISE_KEYWORDS, "marketing": MARKETING_KEYWORDS})
+_BAHAMUT_MATCHER = KeywordMatcher({
+    "admin": BAHAMUT_ADMIN_SKIP_KWS, "player": BAHAMUT_PLAYER_SKIP_KWS, "marketing": BAHAMUT_MARKETING_KWS,
+})
 
 # ── 非遊戲黑名單（巴哈姆特熱門版中的非遊戲板）──
 BOARD_BLACKLIST = [
@@ -82,25 +194,7 @@ def _clean_game_name(raw_name: str) -> str:
                 break
     return name
 
-# ── 4Gamers tag 名稱對照表 ──
-TAG_ALIASES = {
-    "勝利女神：妮姬": ["NIKKE", "勝利女神"],
-    "崩壞：星穹鐵道": ["星穹鐵道", "崩壞星穹鐵道"],
-    "蔚藍檔案 Blue Archive": ["蔚藍檔案", "Blue Archive"],
-    "Fate/Grand Order": ["FGO", "Fate"],
-    "哈利波特：魔法覺醒": ["哈利波特"],
-    "明日方舟：終末地": ["明日方舟", "Arknights"],
-    "傳說對決": ["AOV", "Arena of Valor"],
-    "天堂W": ["天堂", "Lineage"],
-    "原神": ["Genshin", "Genshin Impact"],
-    "神魔之塔": ["Tower of Saviors"],
-    "天堂M": ["Lineage M", "天堂 Mobile"],
-    "RO仙境傳説": ["仙境傳說", "RO"],
-    "貓咪大戰爭": ["Battle Cats"],
-    "星城Online": ["星城"],
-}
-
-# ── 常見手遊 BSN 對照（補巴哈熱門版未涵蓋的遊戲）──
+# ── 常見手遊 BSN 對照（補巴哈熱門版未涵蓋的遊戲）；每次解析前寫入 bsn_resolution 作為種子 ──
 KNOWN_BSN = {
     "傳說對決": "30518",
     "天堂M": "25908",
@@ -118,18 +212,17 @@ KNOWN_BSN = {
 }
 
 
-async def _search_bsn(client: httpx.AsyncClient, game_name: str) -> str | None:
-    """自動搜尋巴哈姆特遊戲板 BSN：ACG 搜尋 + 板頁標題驗證"""
+async def _search_bsn(client: httpx.AsyncClient, game_name: str, run: "DigestRun | None" = None) -> str | None:
+    """
+    自動搜尋巴哈姆特遊戲板 BSN：ACG 搜尋 + 板頁標題驗證
+    確定找不到時回傳 None；搜尋或驗證請求失敗時拋出例外（暫時性錯誤，不寫入否定快取）
+    """
     encoded = urllib.parse.quote(game_name)
-    try:
-        resp = await client.get(
-            f"https://acg.gamer.com.tw/search.php?s=3&kw={encoded}",
-            timeout=15,
-        )
-        if resp.status_code != 200:
-            return None
-    except Exception:
-        return None
+    resp = await client.get(
+        f"https://acg.gamer.com.tw/search.php?s=3&kw={encoded}",
+        timeout=15,
+    )
+    resp.raise_for_status()
 
     bsn_list = re.findall(r'(?:G2|C|B)\.php\?bsn=0*(\d+)', resp.text)
     counter = Counter(bsn_list)
@@ -137,19 +230,11 @@ async def _search_bsn(client: httpx.AsyncClient, game_name: str) -> str | None:
     if not candidates:
         return None
 
-    # 產生所有可能的匹配名稱（含 TAG_ALIASES 變體 + CJK base）
-    match_names = {game_name.lower()}
-    for canonical, aliases in TAG_ALIASES.items():
-        all_names = [canonical] + aliases
-        if any(n in game_name or game_name in n for n in all_names):
-            for n in all_names:
-                match_names.add(n.lower())
-            break
-    cjk_base = re.sub(r'[^\u4e00-\u9fff]', '', game_name)
-    if len(cjk_base) >= 2:
-        match_names.add(cjk_base)
+    # 所有可能的匹配名稱（含 TAG_ALIASES 變體 + CJK base）
+    match_names = _alias_index(game_name, run).match_names(game_name)
 
     # 逐一驗證候選 BSN：板頁標題/描述必須包含遊戲名稱
+    failed = 0
     for bsn in candidates:
         try:
             resp2 = await client.get(
@@ -157,70 +242,157 @@ async def _search_bsn(client: httpx.AsyncClient, game_name: str) -> str | None:
                 timeout=10,
             )
             if resp2.status_code != 200:
+                failed += 1
                 continue
-            soup = BeautifulSoup(resp2.text, "html.parser")
-            title_el = soup.select_one("title")
-            page_title = (title_el.get_text() if title_el else "").lower()
-            meta = soup.select_one('meta[name="description"]')
-            desc = (meta.get("content", "") if meta else "").lower()
-            full = page_title + " " + desc
+            full = await parsing.parse_html(resp2.text, _extract_board_meta, only=BOARD_META)
 
             if any(name in full for name in match_names):
                 _log(f"[WeeklyDigest] Auto-BSN: {game_name} -> bsn={bsn}")
                 return bsn
         except Exception:
+            failed += 1
             continue
+    if failed:
+        raise RuntimeError(f"{failed}/{len(candidates)} board pages failed to load")
     return None
 
 
-def _title_contains_game(title: str, game_name: str) -> bool:
-    """檢查標題是否包含遊戲名稱（含別名 + CJK 核心字）"""
-    t = title.lower()
-    # 主名稱
-    if game_name.lower() in t:
-        return True
-    # TAG_ALIASES 別名
-    for canonical, aliases in TAG_ALIASES.items():
-        all_names = [canonical] + aliases
-        if any(n.lower() in game_name.lower() or game_name.lower() in n.lower() for n in all_names):
-            if any(alias.lower() in t for alias in all_names):
-                return True
-            break
-    # CJK 核心字（至少 2 字的中文部分）
-    cjk = re.sub(r'[^\u4e00-\u9fff]', '', game_name)
-    if len(cjk) >= 2 and cjk in title:
-        return True
-    return False
+def _match_seed(game_name: str, seeds: dict[str, str]) -> str | None:
+    """遊戲名稱與種子名稱互為子字串即視為同一款（沿用原本 KNOWN_BSN 的比對方式）"""
+    for known_name, known_bsn in seeds.items():
+        if game_name in known_name or known_name in game_name:
+            return known_bsn
+    return None
+
+
+async def _resolve_bsn(games: list[dict], run: "DigestRun | None" = None) -> dict:
+    """
+    為仍缺 bsn 的遊戲補上 bsn：
+    1. 解析表（database.bsn_resolution）中未過期的紀錄，含否定紀錄（確定找不到的名稱在 TTL 內不再搜尋）
+    2. KNOWN_BSN 種子（已寫入解析表，模糊比對名稱）
+    3. 其餘遊戲並行 ACG 搜尋（共用巴哈主機上限），結果寫回解析表；請求失敗不寫入，下次再試
+    回傳 {"cached", "seeded", "searched", "found"} 統計
+    """
+    stats = {"cached": 0, "seeded": 0, "searched": 0, "found": 0}
+    missing = [g for g in games if g["bsn"] is None]
+    if not missing:
+        return stats
+
+    await database.seed_bsn_resolutions(KNOWN_BSN)
+    table = await database.get_bsn_resolutions()
+    seeds = {name: row["bsn"] for name, row in table.items() if row["source"] == "seed"}
+
+    pending = []
+    for game in missing:
+        row = table.get(game["name"])
+        if row is not None:
+            game["bsn"] = row["bsn"]
+            stats["cached"] += 1
+            continue
+        seeded = _match_seed(game["name"], seeds)
+        if seeded:
+            game["bsn"] = seeded
+            stats["seeded"] += 1
+            continue
+        pending.append(game)
+
+    if pending:
+        semaphore = asyncio.Semaphore(HOST_LIMITS["bahamut"])
+
+        async def _lookup(client: httpx.AsyncClient, game: dict):
+            async with semaphore:
+                return await _search_bsn(client, game["name"], run)
+
+        async with httpx.AsyncClient(timeout=15, follow_redirects=True, headers=HEADERS) as client:
+            results = await asyncio.gather(*[_lookup(client, g) for g in pending], return_exceptions=True)
+
+        resolved = {}
+        for game, found in zip(pending, results):
+            if isinstance(found, Exception):
+                _log(f"[WeeklyDigest] BSN lookup failed for {game['name']}: {found}")
+                continue
+            game["bsn"] = found
+            resolved[game["name"]] = found
+            stats["found"] += found is not None
+        stats["searched"] = len(pending)
+        await database.save_bsn_resolutions(resolved)
+
+    return stats
+
+
+class DigestRun:
+    """
+    單次 fetch_weekly_digest 的執行狀態，由主函式建立後傳給目標遊戲解析與各來源查詢函式：
+    - index：目標遊戲別名索引（_get_target_games 建立）
+    - news：Google News 合併查詢
+    - budget：配額預算
+    單獨呼叫來源函式（run=None）時用單一遊戲索引、逐一查詢、不記帳也不快取
+    """
+
+    def __init__(self):
+        self.index: GameAliasIndex | None = None
+        self.news: "GoogleNewsBatches | None" = None
+        self.budget: api_quota.QuotaBudget | None = None
+
+
+def _alias_index(game_name: str, run: DigestRun | None = None) -> GameAliasIndex:
+    """本次執行的別名索引；沒有或不含該遊戲時退回單一遊戲索引"""
+    if run is not None and run.index is not None and game_name in run.index.games:
+        return run.index
+    return game_aliases.index_for((game_name,))
+
+
+def _title_contains_game(title: str, game_name: str, run: DigestRun | None = None) -> bool:
+    """檢查標題是否包含遊戲名稱（含別名 + CJK 核心字，不分大小寫）"""
+    return _alias_index(game_name, run).contains(title, game_name)
 
 
 def _classify_item(title: str, summary: str = "") -> list[str]:
     """根據標題和摘要分類消息類型"""
-    text = f"{title} {summary}".lower()
-    tags = []
-    if any(kw in text for kw in AD_KEYWORDS):
-        tags.append("ad")
-    if any(kw in text for kw in COLLAB_KEYWORDS):
-        tags.append("collab")
-    if any(kw in text for kw in EVENT_KEYWORDS):
-        tags.append("event")
-    if not tags:
-        tags.append("news")
-    return tags
+    return _tags_from_hits(_CLASSIFY_MATCHER.categories(f"{title} {summary}".lower()))
+
+
+def _tags_from_hits(hits: set[str]) -> list[str]:
+    """自動機命中的分類 → 消息類型標籤（依 ad / collab / event 順序，都沒有則為 news）"""
+    return [tag for tag in ("ad", "collab", "event") if tag in hits] or ["news"]
+
+
+WINDOW_DAYS = 14
+WATERMARK_OVERLAP = 86400  # 來源收錄有延遲：每次從水位再往回 1 天查，重複項目由 item store 去重
+NEW_ITEM_DAYS = 7          # 第一次看到在 7 天內的項目標記為 new，其餘為 ongoing（上週已出現）
 
 
 def _get_search_range():
     """取得搜尋時間範圍：過去 14 天（涵蓋進行中的活動）"""
     now = datetime.now(TW_TZ)
-    start = now - timedelta(days=14)
+    start = now - timedelta(days=WINDOW_DAYS)
     return start, now
 
 
-async def _get_target_games() -> list[dict]:
+def _title_key(title: str) -> str:
+    """item store 去重用的標題指紋（去掉來源前綴 / 網站名稱、NFKC、小寫、去掉空白與標點）"""
+    return fingerprint.title_fingerprint(title)
+
+
+def _published_ts(published_at: str) -> int | None:
+    """來源的發佈時間字串（無時區者視為 UTC）→ epoch 秒；空字串或無法解析回傳 None"""
+    if not published_at:
+        return None
+    try:
+        dt = datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+async def _get_target_games(run: DigestRun | None = None) -> list[dict]:
     """
     從現有快取取得目標遊戲清單：
     - Android 營收 Top 10
     - 巴哈姆特熱門版 Top 10（含 bsn）
-    合併去重後回傳
+    合併去重後回傳；有 run 時把別名索引存進 run.index
     """
     games = []
     seen_names = set()
@@ -286,50 +458,38 @@ async def _get_target_games() -> list[dict]:
     except (FileNotFoundError, json.JSONDecodeError, KeyError):
         _log("[WeeklyDigest] Discussion cache not found, skipping Bahamut")
 
-    # 3. 自動搜尋巴哈 BSN（ACG 搜尋 + 板頁驗證）
-    missing_bsn = [g for g in games if g["bsn"] is None]
-    if missing_bsn:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True, headers=HEADERS) as client:
-            for game in missing_bsn:
-                found = await _search_bsn(client, game["name"])
-                if found:
-                    game["bsn"] = found
+    # 目標遊戲確定後建一次別名索引，本次執行的名稱比對都用它
+    run = run if run is not None else DigestRun()
+    run.index = GameAliasIndex([g["name"] for g in games])
 
-    # 4. 用 KNOWN_BSN 硬編碼補上仍缺 bsn 的遊戲（最終兜底）
-    for game in games:
-        if game["bsn"] is None:
-            for known_name, known_bsn in KNOWN_BSN.items():
-                if game["name"] in known_name or known_name in game["name"]:
-                    game["bsn"] = known_bsn
-                    break
+    # 3. 解析表（含否定紀錄）→ KNOWN_BSN 種子 → 並行 ACG 搜尋（ACG 搜尋 + 板頁驗證）
+    try:
+        bsn_stats = await _resolve_bsn(games, run)
+    except Exception as e:
+        _log(f"[WeeklyDigest] BSN resolution error: {e}")
+        bsn_stats = {}
 
     with_bsn = len([g for g in games if g["bsn"]])
     _log(f"[WeeklyDigest] Target games: {len(games)} "
          f"({len([g for g in games if g['source'] == 'android_grossing'])} Android + "
          f"{len([g for g in games if g['source'] == 'bahamut_hot'])} Bahamut), "
-         f"{with_bsn} with BSN")
+         f"{with_bsn} with BSN {bsn_stats}")
     return games
 
 
-def _get_tag_variants(game_name: str) -> list[str]:
-    """取得遊戲名稱的所有可能 tag 變體（支援子字串匹配）"""
-    variants = [game_name]
-    for canonical, aliases in TAG_ALIASES.items():
-        all_names = [canonical] + aliases
-        # 子字串匹配：遊戲名稱包含 canonical/alias，或反過來
-        if any(n in game_name or game_name in n for n in all_names):
-            variants = [canonical] + aliases + [game_name]
-            break
-    return list(set(variants))
+def _get_tag_variants(game_name: str, run: DigestRun | None = None) -> list[str]:
+    """取得遊戲名稱的所有可能 tag 變體（正式名稱、別名、原名稱，依序嘗試）"""
+    return _alias_index(game_name, run).variants(game_name)
 
 
 # ============================================================
 # 來源 1: 4Gamers tag 搜尋
 # ============================================================
-async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: datetime) -> list[dict]:
+async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: datetime,
+                         run: DigestRun | None = None) -> list[dict]:
     """搜尋 4Gamers 特定遊戲的近期新聞"""
     items = []
-    variants = _get_tag_variants(game_name)
+    variants = _get_tag_variants(game_name, run)
 
     for tag in variants:
         encoded = urllib.parse.quote(tag)
@@ -349,17 +509,6 @@ async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: date
 
     since_ts = int(since.timestamp() * 1000)
 
-    # 排除非行銷內容
-    noise_keywords = [
-        "性侵", "詐騙", "犯罪", "逮捕", "判刑", "起訴",
-        "買賣", "代儲", "代打", "徵人", "收購",
-    ]
-    skip_words = [
-        "評測", "review", "心得", "開箱", "攻略", "教學",
-        "tier list", "比較", "推薦", "懶人包",
-    ]
-    marketing_kws = EVENT_KEYWORDS + COLLAB_KEYWORDS + AD_KEYWORDS
-
     results = []
     for item in items:
         ts = item.get("createPublishedAt", 0)
@@ -370,19 +519,12 @@ async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: date
         combined = f"{title} {intro}".lower()
 
         # 標題必須包含遊戲名稱
-        if not _title_contains_game(title, game_name):
-            continue
-
-        # 排除噪音
-        if any(kw in combined for kw in noise_keywords):
+        if not _title_contains_game(title, game_name, run):
             continue
 
-        # 排除非行銷內容（評測/攻略等）
-        if any(kw in combined for kw in skip_words):
-            continue
-
-        # 必須包含行銷相關關鍵字
-        if not any(kw.lower() in combined for kw in marketing_kws):
+        # 排除噪音、非行銷內容（評測/攻略等），且必須包含行銷相關關鍵字
+        hits = _4GAMERS_MATCHER.categories(combined)
+        if "noise" in hits or "skip" in hits or "marketing" not in hits:
             continue
 
         results.append({
@@ -391,7 +533,7 @@ async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: date
             "summary": intro[:120],
             "source": "4Gamers",
             "published_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts / 1000)),
-            "tags": _classify_item(title, intro),
+            "tags": _tags_from_hits(hits),
         })
 
     return results
@@ -400,32 +542,22 @@ async def _search_4gamers(client: httpx.AsyncClient, game_name: str, since: date
 # ============================================================
 # 來源 2: YouTube Data API — 官方影音/廣告/PV
 # ============================================================
-async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: datetime) -> list[dict]:
+async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: datetime,
+                         run: DigestRun | None = None) -> list[dict]:
     """搜尋 YouTube 上的遊戲官方影音/廣告"""
     api_key = os.getenv("YOUTUBE_API_KEY", "")
     if not api_key:
         return []
 
     results = []
-    # 聚焦行銷相關搜尋（活動/聯名/廣告），不搜「官方」避免拉到一般影片
-    queries = [
-        f"{game_name} 活動 聯名",
-        f"{game_name} 廣告 PV CM",
-    ]
-    published_after = since.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-    # 排除非行銷內容
-    yt_skip_words = [
-        "實況", "直播", "攻略", "教學", "開箱", "心得", "評測", "review",
-        "gameplay", "walkthrough", "let's play", "分享", "試玩", "體驗",
-        "比較", "推薦", "tier list", "通關", "挑戰", "抽卡", "課金",
-        "pvp", "pve", "組隊", "配裝", "懶人包",
-    ]
-
-    for q in queries:
+    # 日期視窗取到當天起點：同一天內的重複查詢可共用回應快取
+    window = since.astimezone(timezone.utc).strftime("%Y-%m-%d")
+    published_after = f"{window}T00:00:00Z"
+
+    for q in (template.format(game=game_name) for template in YOUTUBE_QUERIES):
         try:
-            resp = await client.get(
-                "https://www.googleapis.com/youtube/v3/search",
+            status, data = await api_quota.get_json(
+                client, run and run.budget, "youtube", game_name, YOUTUBE_SEARCH_URL,
                 params={
                     "part": "snippet",
                     "q": q,
@@ -437,12 +569,11 @@ async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: date
                     "order": "relevance",
                     "key": api_key,
                 },
-                timeout=15,
+                query=q, window=window,
             )
-            if resp.status_code != 200:
-                _log(f"[WeeklyDigest] YouTube API error {resp.status_code} for '{q}'")
+            if status != 200:
+                _log(f"[WeeklyDigest] YouTube API error {status} for '{q}'")
                 continue
-            data = resp.json()
 
             for item in data.get("items", []):
                 snippet = item.get("snippet", {})
@@ -452,17 +583,12 @@ async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: date
                 published = snippet.get("publishedAt", "")
 
                 # 標題必須包含遊戲名稱（防止 YT 推薦無關影片）
-                if not _title_contains_game(title, game_name):
-                    continue
-
-                title_lower = title.lower()
-                # 排除攻略/實況類
-                if any(sw in title_lower for sw in yt_skip_words):
+                if not _title_contains_game(title, game_name, run):
                     continue
 
-                # 必須包含至少一個行銷相關關鍵字
-                marketing_kws = EVENT_KEYWORDS + COLLAB_KEYWORDS + AD_KEYWORDS
-                if not any(kw.lower() in title_lower for kw in marketing_kws):
+                # 排除攻略/實況類，且必須包含至少一個行銷相關關鍵字
+                hits = _YT_MATCHER.categories(title)
+                if "skip" in hits or "marketing" not in hits:
                     continue
 
                 results.append({
@@ -471,9 +597,11 @@ async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: date
                     "summary": f"頻道：{channel}",
                     "source": "YouTube",
                     "published_at": published[:19] if published else "",
-                    "tags": _classify_item(title),
+                    "tags": _tags_from_hits(hits),
                     "thumbnail": snippet.get("thumbnails", {}).get("medium", {}).get("url", ""),
                 })
+        except api_quota.QuotaExhausted:
+            raise
         except Exception as e:
             _log(f"[WeeklyDigest] YouTube search error: {e}")
 
@@ -487,10 +615,25 @@ async def _search_youtube(client: httpx.AsyncClient, game_name: str, since: date
     return unique
 
 
+# 板頁只需要 <title>/<meta> 與文章連結，其餘不進 soup
+BOARD_META = SoupStrainer(["title", "meta"])
+BOARD_POST_LINKS = SoupStrainer("a", href=re.compile(r'C\.php\?bsn='))
+
+
+def _extract_board_meta(soup) -> str:
+    """板頁 <title> + meta description（小寫），供 BSN 驗證比對遊戲名稱"""
+    title_el = soup.select_one("title")
+    page_title = (title_el.get_text() if title_el else "").lower()
+    meta = soup.select_one('meta[name="description"]')
+    desc = (meta.get("content", "") if meta else "").lower()
+    return page_title + " " + desc
+
+
 # ============================================================
 # 來源 3: 巴哈姆特遊戲板 — 活動/公告/官方貼文
 # ============================================================
-async def _search_bahamut_board(client: httpx.AsyncClient, bsn: str, game_name: str) -> list[dict]:
+async def _search_bahamut_board(client: httpx.AsyncClient, bsn: str, game_name: str,
+                                run: DigestRun | None = None) -> list[dict]:
     """搜尋巴哈姆特遊戲板上的活動/公告/官方相關貼文"""
     if not bsn:
         return []
@@ -501,124 +644,108 @@ async def _search_bahamut_board(client: httpx.AsyncClient, bsn: str, game_name:
         if resp.status_code != 200:
             return []
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        results = []
-        seen_titles = set()
-
-        # 只保留情報類貼文前綴
-        allow_prefixes = ["【情報】", "【官方】", "【活動】"]
-        # 排除非行銷類貼文
-        deny_prefixes = [
-            "【心得】", "【攻略】", "【閒聊】", "【問題】",
-            "【密技】", "【討論】", "【公告】", "【其他】",
-            "【造型】", "【分享】", "【集中】", "【數據】",
-        ]
-
-        # 板務/行政類關鍵字（直接排除）
-        admin_skip_kws = [
-            "板主", "板規", "哈啦區", "發文規則", "申請人", "看板規範",
-            "站規", "版規", "徵板主", "子板", "輕鬆不放縱",
-            "集中串規則", "發文注意", "板務",
-        ]
-
-        # 行銷相關關鍵字（title 必須包含至少一個）
-        marketing_kws = [
-            "活動", "聯名", "合作", "限定", "聯動", "連動", "跨界",
-            "開跑", "獎勵", "贈送", "免費", "預告", "賽事", "代言",
-            "廣告", "PV", "主題曲", "贊助", "周年", "週年", "節慶",
-            "春節", "新年", "造型", "儲值", "抽獎", "禮包",
-        ]
-
-        for a in soup.select("a[href]"):
-            href = a.get("href", "")
-            if "C.php?bsn=" not in href:
-                continue
+        return await parsing.parse_html(resp.text, _extract_board_posts, game_name, only=BOARD_POST_LINKS)
+    except Exception as e:
+        _log(f"[WeeklyDigest] Bahamut board error for bsn={bsn}: {e}")
+        return []
 
-            title = a.get_text(strip=True)
-            if not title or len(title) < 5 or title in seen_titles:
-                continue
 
-            # 排除板務/行政貼文
-            if any(kw in title for kw in admin_skip_kws):
-                continue
+def _extract_board_posts(soup, game_name: str) -> list[dict]:
+    """從板頁挑出行銷相關的情報/活動貼文"""
+    results = []
+    seen_titles = set()
 
-            # 處理「精華」前綴：去掉後判斷真實分類
-            # 巴哈的精華標記前有 icon font (\ue838 等 PUA 字元)，需一併清除
-            core_title = re.sub(r'[\ue000-\uf8ff]', '', title).strip()
-            if core_title.startswith("精華"):
-                core_title = core_title[2:].strip()
+    for a in soup.select("a[href]"):
+        href = a.get("href", "")
+        if "C.php?bsn=" not in href:
+            continue
 
-            # 排除非行銷類前綴
-            if any(core_title.startswith(p) for p in deny_prefixes):
-                continue
+        title = a.get_text(strip=True)
+        if not title or len(title) < 5 or title in seen_titles:
+            continue
 
-            # 排除玩家社群類內容（非官方行銷）
-            player_skip_kws = [
-                "集中串", "互助區", "交換", "徵人", "徵友", "找人",
-                "贈送串", "分享串", "集中討論", "捏臉", "捏角",
-                "序號分享", "人品爆炸",
-            ]
-            if any(kw in title for kw in player_skip_kws):
-                continue
+        # 排除板務/行政貼文
+        hits = _BAHAMUT_MATCHER.categories(title)
+        if "admin" in hits:
+            continue
 
-            # 必須是情報類，或包含行銷關鍵字
-            is_info_post = any(core_title.startswith(p) for p in allow_prefixes)
-            has_marketing_kw = any(kw in title for kw in marketing_kws)
-            if not is_info_post and not has_marketing_kw:
-                continue
+        # 處理「精華」前綴：去掉後判斷真實分類
+        # 巴哈的精華標記前有 icon font (\ue838 等 PUA 字元)，需一併清除
+        core_title = re.sub(r'[\ue000-\uf8ff]', '', title).strip()
+        if core_title.startswith("精華"):
+            core_title = core_title[2:].strip()
 
-            # 即使是情報貼，也要有行銷內容（排除純數據/排行情報）
-            if is_info_post and not has_marketing_kw:
-                continue
+        # 排除非行銷類前綴
+        if core_title.startswith(tuple(BAHAMUT_DENY_PREFIXES)):
+            continue
 
-            seen_titles.add(title)
-            if not href.startswith("http"):
-                href = f"https://forum.gamer.com.tw/{href}"
+        # 排除玩家社群類內容（非官方行銷）
+        if "player" in hits:
+            continue
 
-            results.append({
-                "title": title,
-                "url": href,
-                "summary": f"巴哈 {game_name} 板",
-                "source": "巴哈討論板",
-                "published_at": "",
-                "tags": _classify_item(title),
-            })
+        # 必須是情報類，或包含行銷關鍵字
+        is_info_post = core_title.startswith(tuple(BAHAMUT_ALLOW_PREFIXES))
+        has_marketing_kw = "marketing" in hits
+        if not is_info_post and not has_marketing_kw:
+            continue
 
-            if len(results) >= 8:
-                break
+        # 即使是情報貼，也要有行銷內容（排除純數據/排行情報）
+        if is_info_post and not has_marketing_kw:
+            continue
 
-        return results
-    except Exception as e:
-        _log(f"[WeeklyDigest] Bahamut board error for bsn={bsn}: {e}")
-        return []
+        seen_titles.add(title)
+        if not href.startswith("http"):
+            href = f"https://forum.gamer.com.tw/{href}"
+
+        results.append({
+            "title": title,
+            "url": href,
+            "summary": f"巴哈 {game_name} 板",
+            "source": "巴哈討論板",
+            "published_at": "",
+            "tags": _classify_item(title),
+        })
+
+        if len(results) >= 8:
+            break
+
+    return results
 
 
 # ============================================================
 # 來源 4: Google News RSS — 跨媒體新聞聚合（最廣覆蓋）
 # ============================================================
-async def _search_google_news(client: httpx.AsyncClient, game_name: str, since: datetime) -> list[dict]:
-    """透過 Google News RSS 搜尋遊戲相關行銷新聞（不需 API key）"""
-    # 用純遊戲名稱搜尋（不加關鍵字限制），讓 post-filter 處理相關性
-    encoded = urllib.parse.quote(f'"{game_name}"')
-    url = f"https://news.google.com/rss/search?q={encoded}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+def _google_news_url(names: list[str]) -> str:
+    """用純遊戲名稱搜尋（不加關鍵字限制），讓 post-filter 處理相關性；多個遊戲以 OR 合併"""
+    query = " OR ".join(f'"{name}"' for name in names)
+    return f"https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=zh-TW&gl=TW&ceid=TW:zh-Hant"
+
+
+def _google_news_batches(names: list[str]) -> list[list[str]]:
+    """依序把遊戲切成 OR 查詢批次：每批最多 GOOGLE_NEWS_BATCH_SIZE 個，URL 不超過 GOOGLE_NEWS_MAX_URL"""
+    batches: list[list[str]] = []
+    for name in names:
+        if (batches and len(batches[-1]) < GOOGLE_NEWS_BATCH_SIZE
+                and len(_google_news_url(batches[-1] + [name])) <= GOOGLE_NEWS_MAX_URL):
+            batches[-1].append(name)
+        else:
+            batches.append([name])
+    return batches
 
-    try:
-        resp = await client.get(url, timeout=15)
-        if resp.status_code != 200:
-            return []
-    except Exception:
-        return []
 
-    feed = feedparser.parse(resp.text)
-    results = []
+async def _fetch_google_news(client: httpx.AsyncClient, names: list[str]) -> list:
+    """條件式請求：feed 未變動時沿用上次 feedparser 結果，不重新解析"""
+    entries, _ = await http_cache.conditional_get(
+        client, _google_news_url(names), lambda r: parsing.parse_feed(r.text), timeout=15,
+    )
+    return entries
 
-    # 非行銷噪音關鍵字（排除犯罪新聞、股市、純電競賽事等無關報導）
-    noise_keywords = [
-        "性侵", "詐騙", "犯罪", "逮捕", "判刑", "起訴", "酒駕",
-        "股價", "財報", "營收報告", "法說會",
-    ]
 
-    for entry in feed.entries:
+def _google_news_results(entries: list, since: datetime) -> list[dict]:
+    """已確認屬於該遊戲的 feed 項目 → 行銷新聞（過濾日期、噪音，最多 GOOGLE_NEWS_MAX_ITEMS 則）"""
+    results = []
+
+    for entry in entries:
         title = entry.get("title", "")
         link = entry.get("link", "")
         source_name = ""
@@ -626,10 +753,6 @@ async def _search_google_news(client: httpx.AsyncClient, game_name: str, since:
             source_name = entry.source.get("title", "") if isinstance(entry.source, dict) else str(entry.source)
         pub_str = entry.get("published", "")
 
-        # 標題必須包含遊戲名稱（防止混入其他遊戲的新聞）
-        if not _title_contains_game(title, game_name):
-            continue
-
         # 解析日期，過濾超出範圍的
         pub_dt = None
         try:
@@ -639,13 +762,9 @@ async def _search_google_news(client: httpx.AsyncClient, game_name: str, since:
         except Exception:
             pass  # 無法解析日期的仍保留
 
-        # 排除噪音
-        if any(kw in title for kw in noise_keywords):
-            continue
-
-        # 必須包含行銷相關關鍵字
-        marketing_kws = EVENT_KEYWORDS + COLLAB_KEYWORDS + AD_KEYWORDS
-        if not any(kw in title for kw in marketing_kws):
+        # 排除噪音，且必須包含行銷相關關鍵字
+        hits = _NEWS_MATCHER.categories(title)
+        if "noise" in hits or "marketing" not in hits:
             continue
 
         tags = _classify_item(title)
@@ -662,16 +781,86 @@ async def _search_google_news(client: httpx.AsyncClient, game_name: str, since:
             "tags": tags,
         })
 
-        if len(results) >= 15:
+        if len(results) >= GOOGLE_NEWS_MAX_ITEMS:
             break
 
     return results
 
 
+async def _search_google_news_single(client: httpx.AsyncClient, game_name: str, since: datetime,
+                                     run: DigestRun | None = None) -> list[dict]:
+    """單一遊戲查詢"""
+    try:
+        entries = await _fetch_google_news(client, [game_name])
+    except Exception:
+        return []
+    # 標題必須包含遊戲名稱（防止混入其他遊戲的新聞）
+    return _google_news_results(
+        [e for e in entries if _title_contains_game(e.get("title", ""), game_name, run)], since,
+    )
+
+
+class GoogleNewsBatches:
+    """
+    單次執行的 Google News 合併查詢：同批遊戲共用一個 feed（第一個查詢的遊戲觸發抓取，其餘等待同一結果）
+    feed 只解析一次，項目依別名索引分派給批次內的遊戲（英數別名需完整單字；一則提到多個遊戲時各自收錄）
+    合併查詢失敗、或 feed 飽和且該遊戲分到少於 GOOGLE_NEWS_MIN_ENTRIES 則時，改用單一遊戲查詢
+    """
+
+    def __init__(self, names: list[str], index: GameAliasIndex):
+        self.index = index
+        self.batches = _google_news_batches(names)
+        self._batch_of = {name: i for i, batch in enumerate(self.batches) for name in batch}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.stats = {"games": len(self._batch_of), "feeds": 0, "fallbacks": 0}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._batch_of
+
+    async def _route(self, client: httpx.AsyncClient, i: int) -> tuple[dict[str, list], bool]:
+        batch = self.batches[i]
+        entries = await _fetch_google_news(client, batch)
+        self.stats["feeds"] += 1
+        wanted = set(batch)
+        routed: dict[str, list] = {name: [] for name in batch}
+        for entry in entries:
+            # 英數別名需完整單字：批次 feed 混有其他遊戲的新聞，避免 "RO" 命中 "PRO" / "Roblox"
+            for game in self.index.games_in(entry.get("title", ""), word_boundary=True) & wanted:
+                routed[game].append(entry)
+        return routed, len(entries) >= GOOGLE_NEWS_FEED_CAP
+
+    async def search(self, client: httpx.AsyncClient, game_name: str, since: datetime) -> list[dict]:
+        i = self._batch_of[game_name]
+        if len(self.batches[i]) > 1:
+            if i not in self._tasks:
+                self._tasks[i] = asyncio.ensure_future(self._route(client, i))
+            try:
+                # shield：單一遊戲逾時被取消時不影響同批其他遊戲
+                routed, saturated = await asyncio.shield(self._tasks[i])
+            except Exception as e:
+                _log(f"[WeeklyDigest] Google News batch error ({game_name}): {e}")
+            else:
+                if not saturated or len(routed[game_name]) >= GOOGLE_NEWS_MIN_ENTRIES:
+                    return _google_news_results(routed[game_name], since)
+            self.stats["fallbacks"] += 1
+        else:
+            self.stats["feeds"] += 1
+        return await _search_google_news_single(client, game_name, since)
+
+
+async def _search_google_news(client: httpx.AsyncClient, game_name: str, since: datetime,
+                              run: DigestRun | None = None) -> list[dict]:
+    """透過 Google News RSS 搜尋遊戲相關行銷新聞（不需 API key；本次執行有合併查詢時共用批次 feed，不在其中的遊戲逐一查詢）"""
+    if run is not None and run.news is not None and game_name in run.news:
+        return await run.news.search(client, game_name, since)
+    return await _search_google_news_single(client, game_name, since, run)
+
+
 # ============================================================
 # 來源 5: Google Custom Search — Facebook/IG 官方社群貼文
 # ============================================================
-async def _search_social_posts(client: httpx.AsyncClient, game_name: str, since: datetime) -> list[dict]:
+async def _search_social_posts(client: httpx.AsyncClient, game_name: str, since: datetime,
+                              run: DigestRun | None = None) -> list[dict]:
     """透過 Google Custom Search API 搜尋 Facebook/IG 公開貼文（免 FB API 審核）"""
     api_key = os.getenv("GOOGLE_CSE_KEY", "")
     cx = os.getenv("GOOGLE_CSE_CX", "")
@@ -679,54 +868,45 @@ async def _search_social_posts(client: httpx.AsyncClient, game_name: str, since:
         return []
 
     results = []
-    days_back = (datetime.now(TW_TZ) - since).days
+    days_back = max(1, (datetime.now(TW_TZ) - since).days)
+    query = f'"{game_name}" 活動 OR 聯名 OR 合作 OR 更新'
 
     try:
-        resp = await client.get(
-            "https://www.googleapis.com/customsearch/v1",
+        status, data = await api_quota.get_json(
+            client, run and run.budget, "google_cse", game_name, GOOGLE_CSE_URL,
             params={
                 "key": api_key,
                 "cx": cx,
-                "q": f'"{game_name}" 活動 OR 聯名 OR 合作 OR 更新',
+                "q": query,
                 "dateRestrict": f"d{days_back}",
                 "lr": "lang_zh-TW",
                 "num": 10,
             },
-            timeout=15,
+            query=query, window=since.astimezone(timezone.utc).strftime("%Y-%m-%d"),
         )
-        if resp.status_code != 200:
-            _log(f"[WeeklyDigest] Google CSE error {resp.status_code}")
+        if status != 200:
+            _log(f"[WeeklyDigest] Google CSE error {status}")
             return []
-
-        data = resp.json()
+    except api_quota.QuotaExhausted:
+        raise
     except Exception as e:
         _log(f"[WeeklyDigest] Google CSE request failed: {e}")
         return []
 
-    # 非行銷噪音
-    noise_keywords = [
-        "性侵", "詐騙", "犯罪", "逮捕", "判刑", "起訴",
-        "買賣", "代儲", "代打", "徵人", "收購",
-    ]
-
     for item in data.get("items", []):
         title = item.get("title", "")
         link = item.get("link", "")
         snippet = item.get("snippet", "")
 
         # 標題或摘要必須包含遊戲名稱
-        if not _title_contains_game(f"{title} {snippet}", game_name):
+        if not _title_contains_game(f"{title} {snippet}", game_name, run):
             continue
 
         combined = f"{title} {snippet}"
 
-        # 排除噪音
-        if any(kw in combined for kw in noise_keywords):
-            continue
-
-        # 必須包含行銷關鍵字
-        marketing_kws = EVENT_KEYWORDS + COLLAB_KEYWORDS + AD_KEYWORDS
-        if not any(kw in combined for kw in marketing_kws):
+        # 排除噪音，且必須包含行銷關鍵字
+        hits = _SOCIAL_MATCHER.categories(combined)
+        if "noise" in hits or "marketing" not in hits:
             continue
 
         tags = _classify_item(title, snippet)
@@ -754,80 +934,155 @@ async def _search_social_posts(client: httpx.AsyncClient, game_name: str, since:
 # ============================================================
 # 主函式
 # ============================================================
-async def fetch_weekly_digest() -> dict:
-    """主函式：產生每周遊戲行銷摘要"""
-    start_time, now = _get_search_range()
-    games = await _get_target_games()
+# (結果欄位, 上游主機, 查詢函式)；巴哈板查的是 bsn，其餘查遊戲名稱；查詢函式另以 run= 接收 DigestRun
+SOURCES = [
+    ("google_news", "google_news", _search_google_news),
+    ("facebook", "google_cse", _search_social_posts),
+    ("4gamers", "4gamers", _search_4gamers),
+    ("youtube", "youtube", _search_youtube),
+    ("bahamut", "bahamut", _search_bahamut_board),
+]
 
-    if not games:
-        _log("[WeeklyDigest] No target games found, returning cache")
-        return _load_cache()
 
-    digest = []
+async def _limited(semaphores: dict[str, asyncio.Semaphore], host: str, func, *args,
+                   report=None, **kwargs) -> list[dict] | None:
+    """
+    取得主機 semaphore 後才建立並執行查詢 func(*args, **kwargs)；逾時、失敗或沒配到配額回傳 None（該來源水位不前進）
+    report(status, items) 回報進度：取得 semaphore 時 running，結束時 done（附項目數）、skipped（配額）或 failed
+    """
+    report = report or (lambda status, items=None: None)
+    async with semaphores[host]:
+        report("running")
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout=SOURCE_TIMEOUT)
+            report("done", len(result))
+            return result
+        except api_quota.QuotaExhausted:
+            report("skipped")
+            return None
+        except asyncio.TimeoutError:
+            _log(f"[WeeklyDigest] {func.__name__} timeout ({args[1]})")
+        except Exception as e:
+            _log(f"[WeeklyDigest] {func.__name__} error ({args[1]}): {e}")
+        report("failed")
+        return None
 
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-        for game in games:
-            name = game["name"]
-            bsn = game.get("bsn")
-            _log(f"[WeeklyDigest] Searching: {name} (bsn={bsn})")
-
-            # 5 個來源並行查詢
-            results = await asyncio.gather(
-                _search_google_news(client, name, start_time),
-                _search_social_posts(client, name, start_time),
-                _search_4gamers(client, name, start_time),
-                _search_youtube(client, name, start_time),
-                _search_bahamut_board(client, bsn, name),
-                return_exceptions=True,
-            )
-            gnews_items, fb_items, fgamers_items, yt_items, baha_items = [
-                r if isinstance(r, list) else [] for r in results
-            ]
 
-            all_items = gnews_items + fb_items + fgamers_items + yt_items + baha_items
+def _source_since(window_start: datetime, watermark: int | None) -> datetime:
+    """來源查詢起點：有水位時從水位往回 WATERMARK_OVERLAP，但不早於 14 天視窗"""
+    if watermark is None:
+        return window_start
+    return max(window_start, datetime.fromtimestamp(watermark - WATERMARK_OVERLAP, TW_TZ))
 
-            if not all_items:
-                continue
 
-            # 跨來源去重（用標題相似度）
-            all_items = _dedup_items(all_items)
+async def _digest_game(client: httpx.AsyncClient, game: dict, window_start: datetime,
+                       watermarks: dict[tuple[str, str], int],
+                       semaphores: dict[str, asyncio.Semaphore], progress=None,
+                       run: DigestRun | None = None) -> dict[str, list[dict] | None]:
+    """單一遊戲：各來源從自己的水位開始查，依主機上限排隊 → {來源: 項目（失敗為 None）}"""
+    name = game["name"]
+    bsn = game.get("bsn")
+    _log(f"[WeeklyDigest] Searching: {name} (bsn={bsn})")
+
+    def reporter(key):
+        if progress is None:
+            return None
+        return lambda status, items=None: progress(name, key, status, items)
+
+    results = await asyncio.gather(*[
+        _limited(semaphores, host, func, client, bsn, name, report=reporter(key), run=run) if key == "bahamut"
+        else _limited(semaphores, host, func, client, name,
+                      _source_since(window_start, watermarks.get((name, key))), report=reporter(key), run=run)
+        for key, host, func in SOURCES
+    ])
+    return dict(zip([key for key, _, _ in SOURCES], results))
+
 
-            # 只保留有行銷標籤的項目（移除純 "news" 分類）
-            all_items = [item for item in all_items
-                         if item.get("tags") != ["news"]]
+def _with_sentiment(items: list[dict]) -> list[dict]:
+    """標題情緒（LRU memo，與討論區 / 新聞共用）"""
+    for item, label in zip(items, sentiment.analyze_many(i.get("title", "") for i in items)):
+        item["sentiment"] = label
+    return items
 
-            if not all_items:
+
+def _new_items(by_source: dict[str, list[dict] | None],
+               seen: dict[str, int]) -> tuple[list[dict], set[str], list[dict]]:
+    """
+    本次查到的行銷項目（移除純 "news" 分類）標上來源欄位與指紋後分成兩組：
+    - 標題與 URL 指紋都不在 seen-set 的新項目（附標題情緒），準備寫入 item store
+    - 已看過的項目（附 seen-set 中第一次看到的時間 first_seen），交給 refresh_digest_items
+    同時回傳本次看到的所有指紋
+    """
+    items, fingerprints, batch, repeats = [], set(), set(), []
+    for key, _, _ in SOURCES:
+        for item in by_source.get(key) or []:
+            if item.get("tags") == ["news"]:
                 continue
+            title_key = _title_key(item.get("title", ""))
+            url_fp = fingerprint.url_fingerprint(item.get("url", ""))
+            if not title_key or not url_fp:
+                continue
+            fingerprints.update((title_key, url_fp))
+            if title_key in batch or url_fp in batch:
+                continue
+            batch.update((title_key, url_fp))
+            entry = {**item, "source_key": key, "title_key": title_key,
+                     "url_key": fingerprint.canonical_url(item["url"])}
+            known = [seen[fp] for fp in (title_key, url_fp) if fp in seen]
+            if known:
+                repeats.append({**entry, "first_seen": min(known)})
+            else:
+                items.append(entry)
+    # 只分析新項目
+    return _with_sentiment(items), fingerprints, repeats
+
+
+def _build_game_entry(game: dict, items: list[dict]) -> dict | None:
+    """item store 中該遊戲的視窗內項目 → 去重、排序、分類統計後的遊戲摘要"""
+    # 跨來源去重（用標題相似度），先寫入的優先
+    all_items = _dedup_items(items)
+
+    if not all_items:
+        return None
 
-            # 按發佈時間排序（無時間的排最後）
-            all_items.sort(key=lambda x: x.get("published_at") or "0000", reverse=True)
-
-            # 分類統計
-            tag_counts = {"ad": 0, "collab": 0, "event": 0, "news": 0}
-            for item in all_items:
-                for t in item.get("tags", []):
-                    tag_counts[t] = tag_counts.get(t, 0) + 1
-
-            digest.append({
-                "game": name,
-                "source": game["source"],
-                "rank": game["rank"],
-                "items": all_items,
-                "item_count": len(all_items),
-                "tag_counts": tag_counts,
-                "sources_used": {
-                    "google_news": len(gnews_items),
-                    "facebook": len(fb_items),
-                    "4gamers": len(fgamers_items),
-                    "youtube": len(yt_items),
-                    "bahamut": len(baha_items),
-                },
-            })
+    # 按發佈時間排序（無時間的排最後）
+    all_items.sort(key=lambda x: x.get("published_at") or "0000", reverse=True)
+
+    # 分類統計；第一次看到在 NEW_ITEM_DAYS 內為 new，其餘為 ongoing
+    tag_counts = {"ad": 0, "collab": 0, "event": 0, "news": 0}
+    new_since = int(time.time()) - NEW_ITEM_DAYS * 86400
+    for item in all_items:
+        for t in item.get("tags", []):
+            tag_counts[t] = tag_counts.get(t, 0) + 1
+        item["status"] = "new" if item.pop("first_seen", 0) >= new_since else "ongoing"
+
+    source_counts = Counter(item.pop("source_key", "") for item in all_items)
+    return {
+        "game": game["name"],
+        "source": game["source"],
+        "rank": game["rank"],
+        "items": all_items,
+        "item_count": len(all_items),
+        "new_count": sum(item["status"] == "new" for item in all_items),
+        "tag_counts": tag_counts,
+        "sources_used": {key: source_counts.get(key, 0) for key, _, _ in SOURCES},
+    }
+
+
+async def build_digest(games: list[dict]) -> dict:
+    """摘要視圖：item store 中目標遊戲近 WINDOW_DAYS 天的項目（不查任何來源）"""
+    start_time, now = _get_search_range()
+    stored = await database.get_digest_items([g["name"] for g in games], int(start_time.timestamp()))
+    digest = []
+    for game in games:
+        entry = _build_game_entry(game, stored.get(game["name"], []))
+        if entry:
+            digest.append(entry)
 
     # 按消息數量排序（行銷活躍度高的排前面）
     digest.sort(key=lambda x: x["item_count"], reverse=True)
 
-    result = {
+    return {
         "digest": digest,
         "game_count": len(digest),
         "total_items": sum(g["item_count"] for g in digest),
@@ -838,19 +1093,78 @@ async def fetch_weekly_digest() -> dict:
         "updated_at": int(time.time()),
     }
 
+
+async def fetch_weekly_digest(full: bool = False, progress=None) -> dict:
+    """
+    主函式：增量更新 item store 後產生摘要（所有遊戲並行，依主機上限排隊）
+    full=True 時忽略水位，整個 14 天視窗重查（item store 仍會去重）
+    progress(game, source, status, items) 回報每個遊戲 × 來源的進度（pending / running / done / skipped / failed）
+    """
+    start_time, _ = _get_search_range()
+    run = DigestRun()
+    games = await _get_target_games(run)
+
+    if not games:
+        _log("[WeeklyDigest] No target games found, returning cache")
+        return load_cache()
+
+    if progress is not None:
+        for game in games:
+            for key, _, _ in SOURCES:
+                progress(game["name"], key, "pending", None)
+
+    started = time.perf_counter()
+    run_at = int(time.time())
+    watermarks = {} if full else await database.get_digest_watermarks()
+    semaphores = {host: asyncio.Semaphore(limit) for host, limit in HOST_LIMITS.items()}
+    names = [game["name"] for game in games]
+    if run.index is None or not set(names) <= set(run.index.games):
+        run.index = GameAliasIndex(names)
+    run.news = GoogleNewsBatches(names, run.index)
+    # 配額依排名配給（兩個榜單的同名次交錯），排名高的遊戲先拿到剩餘配額
+    run.budget = budget = api_quota.QuotaBudget()
+    by_priority = [g["name"] for _, g in sorted(enumerate(games), key=lambda p: (p[1].get("rank") or 999, p[0]))]
+    await budget.plan(by_priority, {"youtube": len(YOUTUBE_QUERIES), "google_cse": 1})
+    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
+        fetched = await asyncio.gather(*[
+            _digest_game(client, game, start_time, watermarks, semaphores, progress, run) for game in games
+        ])
+    news_stats = run.news.stats
+    if news_stats["feeds"]:
+        _log(f"[WeeklyDigest] Google News: {news_stats['feeds']} feeds for {news_stats['games']} games "
+             f"({news_stats['fallbacks']} per-game fallbacks)")
+    _log(f"[WeeklyDigest] Quota: {budget.stats}")
+
+    added, advanced = 0, []
+    for game, by_source in zip(games, fetched):
+        items, seen_now, repeats = _new_items(by_source, await database.get_digest_seen(game["name"]))
+        # 已看過的項目推進既有列的時間；既有列已被清理（轉載舊公告）時重新寫入，first_seen 沿用 seen-set → ongoing
+        revived = await database.refresh_digest_items(game["name"], [
+            {**item, "published_ts": _published_ts(item.get("published_at", ""))} for item in repeats
+        ])
+        added += await database.save_digest_items(game["name"], [
+            {**item, "published_ts": _published_ts(item.get("published_at", ""))} for item in items
+        ] + _with_sentiment(revived))
+        await database.mark_digest_seen(game["name"], seen_now)
+        advanced.extend((game["name"], key, run_at) for key, items in by_source.items() if items is not None)
+    await database.save_digest_watermarks(advanced)
+
+    result = await build_digest(games)
     _save_cache(result)
-    _log(f"[WeeklyDigest] Done — {len(digest)} games, {result['total_items']} total items")
+    _log(f"[WeeklyDigest] Done — {added} new items, {len(result['digest'])} games, "
+         f"{result['total_items']} total items in {time.perf_counter() - started:.1f}s")
     return result
 
 
 def _dedup_items(items: list[dict]) -> list[dict]:
-    """跨來源去重：相同標題（前 20 字）視為重複"""
+    """跨來源去重：正規化標題（去掉來源前綴與標點）前 20 字相同，或正規化 URL 相同，視為重複"""
     seen = set()
     unique = []
     for item in items:
-        key = item.get("title", "")[:20]
-        if key and key not in seen:
-            seen.add(key)
+        key = fingerprint.normalize_title(item.get("title", ""))[:20]
+        url = "url:" + fingerprint.canonical_url(item["url"]) if item.get("url") else ""
+        if key and key not in seen and (not url or url not in seen):
+            seen.update((key, url) if url else (key,))
             unique.append(item)
     return unique
 
@@ -861,7 +1175,8 @@ def _save_cache(data):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _load_cache():
+def load_cache() -> dict:
+    """上次產生的摘要快取 {"digest", "game_count", "total_items", ...}（沒有快取時為空摘要）"""
     try:
         with open(CACHE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -0,0 +1,107 @@
+"""
+YouTube Data API / Google Custom Search 本機替身伺服器 — 離線測試配額預算與回應快取
+- GET /youtube/v3/search 每次扣 100 單位，GET /customsearch/v1 每次扣 1 次；超過每日配額回 403 quotaExceeded
+- 回傳依查詢字串產生的固定結果（標題含遊戲名稱與行銷關鍵字，會通過摘要的過濾）
+- app.state.calls 記錄收到的 (api, q)
+測試以 running(app) 在背景執行緒啟動；本機手動測試：
+    python -m tests.api_standin --port 8765
+    YOUTUBE_SEARCH_URL=http://127.0.0.1:8765/youtube/v3/search \\
+    GOOGLE_CSE_URL=http://127.0.0.1:8765/customsearch/v1 uvicorn main:app
+"""
+import argparse
+import re
+import socket
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+
+
+def _quota_error() -> JSONResponse:
+    return JSONResponse(status_code=403, content={
+        "error": {"code": 403, "errors": [{"reason": "quotaExceeded"}], "message": "Quota exceeded"},
+    })
+
+
+def create_app(youtube_quota: int = 10000, cse_quota: int = 100) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = []
+    app.state.used = {"youtube": 0, "google_cse": 0}
+
+    def spend(api: str, cost: int, quota: int) -> bool:
+        if app.state.used[api] + cost > quota:
+            return False
+        app.state.used[api] += cost
+        return True
+
+    @app.get("/youtube/v3/search")
+    def youtube_search(q: str, key: str, publishedAfter: str = "", maxResults: int = 5):
+        app.state.calls.append(("youtube", q))
+        if not spend("youtube", 100, youtube_quota):
+            return _quota_error()
+        published = publishedAfter or "2026-01-01T00:00:00Z"
+        return {"items": [
+            {
+                "id": {"videoId": f"{zlib.crc32(q.encode())}-{i}"},
+                "snippet": {
+                    "title": f"{q} 限定活動 官方PV #{i}",
+                    "channelTitle": "官方頻道",
+                    "publishedAt": published,
+                    "thumbnails": {"medium": {"url": ""}},
+                },
+            }
+            for i in range(min(maxResults, 2))
+        ]}
+
+    @app.get("/customsearch/v1")
+    def custom_search(q: str, key: str, cx: str):
+        app.state.calls.append(("google_cse", q))
+        if not spend("google_cse", 1, cse_quota):
+            return _quota_error()
+        match = _QUOTED_RE.search(q)
+        game = match.group(1) if match else q
+        return {"items": [{
+            "title": f"{game} 聯名活動開跑",
+            "link": f"https://www.facebook.com/standin/posts/{zlib.crc32(q.encode())}",
+            "snippet": f"{game} 官方粉絲團",
+        }]}
+
+    return app
+
+
+@contextmanager
+def running(app: FastAPI):
+    """在背景執行緒啟動替身伺服器（隨機埠），yield 基底 URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="none"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YouTube / Google CSE 替身伺服器")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--youtube-quota", type=int, default=10000)
+    parser.add_argument("--cse-quota", type=int, default=100)
+    opts = parser.parse_args()
+    uvicorn.run(create_app(opts.youtube_quota, opts.cse_quota), host="127.0.0.1", port=opts.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,10 @@ def use_in_memory_db(tmp_path, monkeypatch):
     db_path = str(tmp_path / "test_history.db")
     monkeypatch.setattr(database, "DB_PATH", db_path)
     return db_path
+
+
+@pytest.fixture(autouse=True)
+def reset_http_validators():
+    """條件式請求的驗證資訊存在模組層級，每個測試前清空避免互相沿用"""
+    from scrapers import http_cache
+    http_cache.validators.clear()
@@ -0,0 +1,98 @@
+"""
+api_quota.py 測試 — 以本機替身伺服器（api_standin）離線驗證：依排名配給配額、帳本記帳、回應快取、上游配額錯誤
+"""
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+import database
+from scrapers import api_quota, weekly_digest_scraper
+from tests import api_standin
+
+
+@pytest.fixture(autouse=True)
+def isolate_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(weekly_digest_scraper, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(weekly_digest_scraper, "CACHE_FILE", str(tmp_path / "weekly_digest.json"))
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """替身伺服器（YouTube 500 單位 / CSE 2 次），摘要的 YouTube / CSE 端點改指向它"""
+    app = api_standin.create_app(youtube_quota=500, cse_quota=2)
+    with api_standin.running(app) as base:
+        monkeypatch.setattr(weekly_digest_scraper, "YOUTUBE_SEARCH_URL", f"{base}/youtube/v3/search")
+        monkeypatch.setattr(weekly_digest_scraper, "GOOGLE_CSE_URL", f"{base}/customsearch/v1")
+        yield app
+
+
+async def test_digest_spends_quota_on_top_ranked_games_and_caches(standin, monkeypatch):
+    await database.init_db()
+    monkeypatch.setenv("YOUTUBE_API_KEY", "k")
+    monkeypatch.setenv("GOOGLE_CSE_KEY", "k")
+    monkeypatch.setenv("GOOGLE_CSE_CX", "cx")
+    monkeypatch.setattr(api_quota, "API_QUOTAS", {
+        "youtube": {"daily": 500, "cost": 100}, "google_cse": {"daily": 2, "cost": 1},
+    })
+    # 今天已用掉 100 單位 → 剩 4 次 YouTube 查詢，只夠兩個遊戲（每個遊戲 2 次）
+    await database.add_api_quota_used("youtube", api_quota.quota_day(), 100)
+
+    games = [
+        {"name": "原神", "source": "android_grossing", "rank": 2, "bsn": None},
+        {"name": "神魔之塔", "source": "android_grossing", "rank": 3, "bsn": None},
+        {"name": "天堂W", "source": "bahamut_hot", "rank": 1, "bsn": None},
+    ]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(return_value=games))
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", [
+        ("facebook", "google_cse", weekly_digest_scraper._search_social_posts),
+        ("youtube", "youtube", weekly_digest_scraper._search_youtube),
+    ])
+
+    progress = {}
+    data = await weekly_digest_scraper.fetch_weekly_digest(
+        full=True, progress=lambda game, source, status, items: progress.__setitem__((game, source), status),
+    )
+
+    queried = {(api, q.split()[0].strip('"')) for api, q in standin.state.calls}
+    assert queried == {(api, game) for api in ("youtube", "google_cse") for game in ("天堂W", "原神")}
+    assert progress[("神魔之塔", "youtube")] == "skipped" and progress[("神魔之塔", "facebook")] == "skipped"
+    assert progress[("天堂W", "youtube")] == "done"
+    assert await database.get_api_quota_used("youtube", api_quota.quota_day()) == 500
+    assert await database.get_api_quota_used("google_cse", api_quota.quota_day()) == 2
+    assert {g["game"] for g in data["digest"]} == {"天堂W", "原神"}
+    # 沒配到配額的來源水位不前進
+    watermarks = await database.get_digest_watermarks()
+    assert ("神魔之塔", "youtube") not in watermarks and ("原神", "youtube") in watermarks
+
+    # 重新整理：同一查詢 + 日期視窗讀快取，不再送出查詢也不記帳
+    calls = len(standin.state.calls)
+    again = await weekly_digest_scraper.fetch_weekly_digest(full=True)
+    assert len(standin.state.calls) == calls
+    assert await database.get_api_quota_used("youtube", api_quota.quota_day()) == 500
+    assert again["total_items"] == data["total_items"]
+
+
+async def test_upstream_quota_error_stops_api_for_run(standin):
+    """帳本以為還有配額但上游回 403 quotaExceeded：本次執行不再查該 API，錯誤回應不快取"""
+    await database.init_db()
+    standin.state.used["youtube"] = 500
+    budget = api_quota.QuotaBudget({"youtube": {"daily": 10000, "cost": 100}})
+    assert await budget.plan(["原神", "天堂W"], {"youtube": 2}) == {"youtube": []}
+
+    url = weekly_digest_scraper.YOUTUBE_SEARCH_URL
+    async with httpx.AsyncClient() as client:
+        status, data = await budget.get_json(client, "youtube", "原神", url,
+                                             {"q": "原神", "key": "k"}, "原神", "2026-10-01")
+        assert status == 403 and data is None
+        with pytest.raises(api_quota.QuotaExhausted):
+            await budget.get_json(client, "youtube", "天堂W", url, {"q": "天堂W", "key": "k"}, "天堂W", "2026-10-01")
+    assert await database.get_api_response("youtube", "原神", "2026-10-01") is None
+    assert budget.stats["youtube"] == {"remaining": 100, "calls": 1, "cached": 0, "skipped": 1}
+
+
+async def test_plan_stops_at_first_game_that_does_not_fit():
+    await database.init_db()
+    budget = api_quota.QuotaBudget({"youtube": {"daily": 500, "cost": 100}})
+    assert await budget.plan(["a", "b", "c"], {"youtube": 2}) == {"youtube": ["c"]}
+    assert budget.stats["youtube"]["remaining"] == 5
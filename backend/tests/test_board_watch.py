@@ -0,0 +1,213 @@
+"""
+board_watch.py 測試 — 追蹤清單載入、依活躍度分片與錯開、巴哈版面解析、分片刷新容錯、排程替換
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from bs4 import BeautifulSoup
+
+import database
+from scrapers import board_watch
+
+
+def _boards(n):
+    return [{"site": "ptt", "key": f"B{i}", "name": f"B{i}", "activity": (i % 40) + 0.1} for i in range(n)]
+
+
+def test_default_watchlist_loads_both_sites():
+    boards = board_watch.load_watchlist()
+    sites = {b["site"] for b in boards}
+    assert sites == {"ptt", "bahamut"}
+    assert any(b["key"] == "C_Chat" for b in boards)
+    assert all(b["activity"] > 0 for b in boards)
+
+
+def test_watchlist_defaults_applied(tmp_path):
+    path = tmp_path / "boards.json"
+    path.write_text(json.dumps({
+        "defaults": {"activity": 3},
+        "ptt": [{"board": "Steam"}],
+        "bahamut": [{"bsn": 60076, "name": "原神", "activity": 9}],
+    }), encoding="utf-8")
+    boards = board_watch.load_watchlist(str(path))
+    assert boards == [
+        {"site": "ptt", "key": "Steam", "name": "Steam", "game": None, "activity": 3},
+        {"site": "bahamut", "key": "60076", "name": "原神", "game": "原神", "activity": 9},
+    ]
+    assert [b["key"] for b in board_watch.watched("bahamut", str(path))] == ["60076"]
+
+
+def test_plan_shards_groups_by_activity_and_staggers():
+    """120 個版面：每片不超過 shard_size，活躍版面週期較短，同週期分片錯開起始時間"""
+    boards = _boards(120)
+    shards = board_watch.plan_shards(boards, shard_size=8)
+
+    assert len(shards) == 15
+    assert sum(len(s["boards"]) for s in shards) == 120
+    assert all(len(s["boards"]) <= 8 for s in shards)
+
+    intervals = [s["interval"] for s in shards]
+    assert intervals == sorted(intervals)  # 活躍度高的分片排前面、週期短
+    assert all(board_watch.MIN_INTERVAL <= i <= board_watch.MAX_INTERVAL for i in intervals)
+
+    for interval in set(intervals):
+        group = [s for s in shards if s["interval"] == interval]
+        offsets = sorted(s["offset"] for s in group)
+        assert len(set(offsets)) == len(group)
+        assert offsets[-1] < interval * 60
+
+    for s in shards:
+        # 分片內的請求都落在週期的前 SPREAD 比例內
+        assert s["spacing"] * len(s["boards"]) <= s["interval"] * 60 * board_watch.SPREAD + 1e-6
+
+
+def test_interval_for_quiet_board_is_capped():
+    assert board_watch._interval_for(0) == board_watch.MAX_INTERVAL
+    assert board_watch._interval_for(0.01) == board_watch.MAX_INTERVAL
+    assert board_watch._interval_for(1000) == board_watch.MIN_INTERVAL
+
+
+BAHAMUT_BOARD_HTML = """
+<table>
+<tr class="b-list__row b-list-item">
+  <td><span class="b-list__summary__gp b-gp--good">52</span></td>
+  <td><a href="C.php?bsn=60076&snA=1"><p class="b-list__main__title">【心得】新角色實測</p></a></td>
+  <td><p class="b-list__count__number"><span>31</span>/<span>2000</span></p></td>
+</tr>
+<tr class="b-list__row b-list-item">
+  <td><span class="b-list__summary__gp"></span></td>
+  <td><a href="C.php?bsn=60076&snA=2"><p class="b-list__main__title">【問題】卡關</p></a></td>
+</tr>
+<tr class="b-list__row"><td>廣告</td></tr>
+</table>
+"""
+
+
+def test_extract_bahamut_board():
+    posts = board_watch._extract_bahamut_board(BeautifulSoup(BAHAMUT_BOARD_HTML, "html.parser"))
+    assert posts == [
+        {"title": "【心得】新角色實測", "url": "https://forum.gamer.com.tw/C.php?bsn=60076&snA=1", "gp": 52, "replies": 31},
+        {"title": "【問題】卡關", "url": "https://forum.gamer.com.tw/C.php?bsn=60076&snA=2", "gp": 0, "replies": 0},
+    ]
+
+
+async def test_refresh_shard_isolates_board_errors():
+    """單一版面失敗不影響同分片其他版面，巴哈結果寫入共用儲存"""
+    await database.init_db()
+
+    async def mock_get(url, **kwargs):
+        if "ptt.cc" in url:
+            raise Exception("Connection reset")
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.text = BAHAMUT_BOARD_HTML
+        resp.raise_for_status = MagicMock()
+        return resp
+
+    client = AsyncMock()
+    client.get = AsyncMock(side_effect=mock_get)
+    shard = {"id": 0, "interval": 10, "spacing": 0, "boards": [
+        {"site": "ptt", "key": "C_Chat", "name": "C_Chat", "activity": 10},
+        {"site": "bahamut", "key": "60076", "name": "原神", "activity": 5},
+    ]}
+    result = await board_watch.refresh_shard(shard, client=client)
+
+    assert result == {"shard": 0, "boards": 2, "ok": 2}  # PTT 抓取失敗時 crawl_board 回傳 0 頁，不拋例外
+    posts = await database.get_bahamut_hot_posts(["60076"], 0)
+    assert posts[0]["gp"] == 52
+    assert posts[0]["board_name"] == "原神"
+
+
+async def test_overlapping_shards_share_ptt_host_limit(monkeypatch):
+    """多個分片工作同時執行時，ptt.cc 請求總數仍不超過 PER_HOST"""
+    import asyncio
+
+    from scrapers import ptt_crawler
+
+    await database.init_db()
+    monkeypatch.setattr(ptt_crawler, "PER_HOST", 2)
+    in_flight = peak = 0
+
+    async def slow_get(url, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.text = ""
+        return resp
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=slow_get)
+    shards = [{"id": i, "interval": 10, "spacing": 0, "boards": [
+        {"site": "ptt", "key": f"B{i}", "name": f"B{i}", "activity": 1},
+    ]} for i in range(4)]
+    await asyncio.gather(*[board_watch.refresh_shard(shard, client=client) for shard in shards])
+
+    assert peak == 2
+
+
+async def test_refresh_shard_counts_failed_board():
+    await database.init_db()
+    client = AsyncMock()
+    client.get = AsyncMock(side_effect=Exception("timeout"))
+    shard = {"id": 1, "interval": 10, "spacing": 0, "boards": [
+        {"site": "bahamut", "key": "60076", "name": "原神", "activity": 5},
+    ]}
+    result = await board_watch.refresh_shard(shard, client=client)
+    assert result["ok"] == 0
+
+
+class _FakeJob:
+    def __init__(self, job_id, jobs):
+        self.id = job_id
+        self._jobs = jobs
+
+    def remove(self):
+        self._jobs.pop(self.id)
+
+
+class _FakeScheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def get_jobs(self):
+        return [_FakeJob(job_id, self.jobs) for job_id in list(self.jobs)]
+
+    def add_job(self, func, trigger, **kwargs):
+        self.jobs[kwargs["id"]] = {"func": func, "trigger": trigger, **kwargs}
+
+
+async def test_reschedule_replaces_shard_jobs():
+    """重新分片時移除舊的 board_shard_* job，其他 job 保留"""
+    await database.init_db()
+    scheduler = _FakeScheduler()
+    scheduler.jobs["board_shard_99"] = {}
+    scheduler.jobs["steam"] = {}
+
+    shards = await board_watch.reschedule(scheduler, _boards(20))
+
+    shard_jobs = sorted(j for j in scheduler.jobs if j.startswith("board_shard_"))
+    assert shard_jobs == [f"board_shard_{s['id']}" for s in shards]
+    assert "board_shard_99" not in scheduler.jobs
+    assert "steam" in scheduler.jobs
+    job = scheduler.jobs["board_shard_0"]
+    assert job["trigger"] == "interval"
+    assert job["minutes"] == shards[0]["interval"]
+    assert board_watch.stats()["boards"] == 20
+
+
+async def test_reschedule_uses_configured_shard_size(tmp_path, monkeypatch):
+    await database.init_db()
+    path = tmp_path / "boards.json"
+    path.write_text(json.dumps({"defaults": {"shard_size": 5}, "ptt": []}), encoding="utf-8")
+    monkeypatch.setattr(board_watch, "WATCHLIST_FILE", str(path))
+    assert board_watch.load_shard_size() == 5
+
+    shards = await board_watch.reschedule(_FakeScheduler(), _boards(20))
+    assert [len(s["boards"]) for s in shards] == [5, 5, 5, 5]
+
+    path.write_text(json.dumps({"ptt": []}), encoding="utf-8")
+    assert board_watch.load_shard_size() == board_watch.SHARD_SIZE
@@ -1,6 +1,6 @@
 """
 database.py 測試 — DB snapshot 完整性
-覆蓋：init_db / save_snapshot / get_history / cleanup_old_data / 邊界條件
+覆蓋：init_db / save_snapshot / get_history / cleanup_old_data / 新聞封存與全文搜尋 / 邊界條件
 """
 import time
 from unittest.mock import patch
@@ -210,7 +210,127 @@ async def test_cleanup_removes_old_data():
     assert values == [100, 200], "91-day-old record should be deleted"
 
 
+async def test_cleanup_prunes_news_archive_and_clusters():
+    """過期的封存新聞連同全文索引一起刪除；分群簽章與 LSH 桶依 LSH_KEEP_DAYS 清理"""
+    await database.init_db()
+    old = int(time.time()) - (database.NEWS_ARCHIVE_KEEP_DAYS + 1) * 86400
+    await database.archive_news([{**_news("old", "原神 舊聞"), "fetched_at": old}, _news("new", "原神 新聞")])
+    await database.save_news_clusters([
+        ("old", "old", b"sig", [1]),
+        ("new", "new", b"sig", [2]),
+    ])
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        await db.execute("UPDATE news_cluster SET created_at = ? WHERE news_id = 'old'", (old,))
+        await db.commit()
+
+    await database.cleanup_old_data()
+
+    assert [it["id"] for it in (await database.search_news("原神"))["items"]] == ["new"]
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        cursor = await db.execute("SELECT news_id FROM news_cluster")
+        assert [row[0] for row in await cursor.fetchall()] == ["new"]
+        cursor = await db.execute("SELECT news_id FROM news_lsh")
+        assert [row[0] for row in await cursor.fetchall()] == ["new"]
+
+
 async def test_cleanup_on_empty_db():
     """空 DB 執行 cleanup 不應報錯"""
     await database.init_db()
     await database.cleanup_old_data()  # 不應拋異常
+
+
+# ── archive_news / search_news ───────────────────────
+
+
+def _news(news_id, title, summary="", published_at="2026-04-04T08:00:00Z", source="巴哈姆特 GNN"):
+    return {"id": news_id, "title": title, "summary": summary, "url": f"https://example.com/{news_id}",
+            "source": source, "published_at": published_at}
+
+
+async def test_archive_news_is_incremental():
+    """重複封存同一批新聞只會寫入新的 id"""
+    await database.init_db()
+    batch = [_news("a", "《原神》5.0 更新預告"), _news("b", "Steam 夏季特賣開跑")]
+    assert await database.archive_news(batch) == 2
+    assert await database.archive_news(batch + [_news("c", "任天堂直面會整理")]) == 1
+
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM news_archive")
+        assert (await cursor.fetchone())[0] == 3
+
+
+async def test_search_news_matches_chinese_terms():
+    """中文關鍵字以字元片語比對，不需完整斷詞"""
+    await database.init_db()
+    await database.archive_news([
+        _news("a", "《原神》5.0 更新預告", "原神新版本即將推出"),
+        _news("b", "Steam 夏季特賣開跑", "年度最大特賣活動"),
+        _news("c", "原創遊戲企劃", "神秘新作"),
+    ])
+    result = await database.search_news("原神")
+    assert [it["id"] for it in result["items"]] == ["a"]
+
+    result = await database.search_news("steam 特賣")
+    assert [it["id"] for it in result["items"]] == ["b"]
+
+
+async def test_search_news_ranks_title_hits_first():
+    """標題命中的相關度高於只有摘要命中"""
+    await database.init_db()
+    await database.archive_news([
+        _news("summary_only", "新版本情報整理", "本週重點：原神聯動"),
+        _news("title_hit", "原神 聯動 活動開跑", "詳情請見官網"),
+    ])
+    result = await database.search_news("原神")
+    assert result["items"][0]["id"] == "title_hit"
+
+
+async def test_search_news_date_filter_and_pagination():
+    """日期區間過濾 + limit/offset 分頁"""
+    await database.init_db()
+    await database.archive_news([
+        _news(f"n{i}", f"活動情報 第{i}彈", published_at=f"2026-04-{i + 1:02d}T08:00:00Z")
+        for i in range(6)
+    ])
+    result = await database.search_news("活動", since="2026-04-02", until="2026-04-05")
+    assert sorted(it["id"] for it in result["items"]) == ["n1", "n2", "n3", "n4"]
+
+    page1 = await database.search_news("活動", limit=4)
+    page2 = await database.search_news("活動", limit=4, offset=4)
+    assert page1["has_more"] is True
+    assert page2["has_more"] is False
+    assert len(page1["items"]) + len(page2["items"]) == 6
+
+
+async def test_search_news_empty_query():
+    """只有符號的查詢回傳空結果而非語法錯誤"""
+    await database.init_db()
+    assert await database.search_news('"') == {"items": [], "has_more": False}
+
+
+# ── 討論情緒彙總桶 ────────────────────────────────────
+
+
+async def test_record_sentiment_is_incremental():
+    """重複組裝同一批文章不重複計數；label 改變時從舊 label 移到新 label（沿用原本的小時）"""
+    await database.init_db()
+    hour = 1_700_000_000 - 1_700_000_000 % 3600
+    items = [
+        {"url": "u1", "board": "ptt:LoL", "game": "英雄聯盟", "hour": hour, "label": "positive"},
+        {"url": "u2", "board": "ptt:C_Chat", "game": None, "hour": hour, "label": "negative"},
+    ]
+    assert await database.record_sentiment(items) == 2
+    assert await database.record_sentiment(items) == 0
+
+    moved = {**items[0], "hour": hour + 3600, "label": "negative"}
+    assert await database.record_sentiment([moved]) == 1
+
+    assert await database.get_sentiment_buckets("game", "英雄聯盟", 0) == [
+        {"hour": hour, "positive": 0, "negative": 1, "neutral": 0},
+    ]
+    assert await database.get_sentiment_buckets("board", "ptt:C_Chat", 0) == [
+        {"hour": hour, "positive": 0, "negative": 1, "neutral": 0},
+    ]
+    assert await database.get_sentiment_buckets("game", "C_Chat", 0) == []
+    keys = await database.get_sentiment_keys("board", 0)
+    assert [k["key"] for k in keys] == ["ptt:C_Chat", "ptt:LoL"]
@@ -2,11 +2,14 @@
 discussion_scraper.py 測試 — HTML 解析、PTT 推文數轉換、容錯
 使用 unittest.mock 模擬 httpx 回應，不打外部網站
 """
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bs4 import BeautifulSoup
 
-from scrapers import discussion_scraper
+import database
+from scrapers import discussion_scraper, ptt_crawler
 
 
 # ── helpers ──────────────────────────────────────────
@@ -109,13 +112,14 @@ PTT_ARTICLES_HTML = """
 
 async def test_fetch_ptt_hot_articles_popularity_conversion():
     """推文數轉換：爆→100, X開頭→-1, 數字→int, 無→0，公告跳過"""
+    await database.init_db()
     mock_client = AsyncMock()
     mock_client.get = AsyncMock(return_value=_mock_response(text=PTT_ARTICLES_HTML))
     mock_client.__aenter__ = AsyncMock(return_value=mock_client)
     mock_client.__aexit__ = AsyncMock(return_value=False)
 
-    with patch("scrapers.discussion_scraper.httpx.AsyncClient", return_value=mock_client):
-        articles = await discussion_scraper.fetch_ptt_hot_articles()
+    await ptt_crawler.crawl_board(mock_client, "C_Chat")
+    articles = await discussion_scraper.load_ptt_hot_articles()
 
     # [公告] 應被過濾
     titles = [a["title"] for a in articles]
@@ -179,3 +183,126 @@ async def test_fetch_bahamut_hot_articles_with_source():
     assert len(articles) >= 1
     assert articles[0]["source"] == "原神"  # bsn=60076 對應的版名
     assert articles[0]["bsn"] == "60076"
+
+
+def test_extract_bahamut_home_resolves_board_after_article():
+    """單次走訪：文章連結出現在版面連結之前，仍能補上來源版名"""
+    html = """
+    <a href="C.php?bsn=60076&snA=1">【情報】新版本預告</a>
+    <a href="B.php?bsn=60076">原神</a>
+    """
+    home = discussion_scraper._extract_bahamut_home(BeautifulSoup(html, "html.parser"))
+    assert home["boards"][0]["name"] == "原神"
+    assert home["articles"][0]["source"] == "原神"
+
+
+async def test_refresh_site_pages_fetches_bahamut_home_once():
+    """一次刷新只抓一次巴哈首頁與 PTT hotboards，結果寫入共用儲存"""
+    await database.init_db()
+    async def mock_get(url, **kwargs):
+        if "forum.gamer.com.tw" in url:
+            return _mock_response(text=BAHAMUT_HTML)
+        return _mock_response(text=PTT_HOTBOARDS_HTML)
+
+    mock_client = AsyncMock()
+    mock_client.get = AsyncMock(side_effect=mock_get)
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("scrapers.discussion_scraper.httpx.AsyncClient", return_value=mock_client):
+        await discussion_scraper.refresh_site_pages()
+
+    urls = [c.args[0] for c in mock_client.get.call_args_list]
+    assert urls.count(discussion_scraper.BAHAMUT_HOME) == 1
+    assert len(urls) == 2
+    home = await database.get_discussion_page("bahamut_home")
+    assert home["boards"][0]["name"] == "原神"
+    assert (await database.get_discussion_page("ptt_hotboards"))[0]["name"] == "C_Chat"
+
+
+async def test_refresh_site_pages_keeps_previous_on_failure():
+    """抓取失敗（空結果）不覆蓋上一份快照"""
+    await database.init_db()
+    await database.save_discussion_page("ptt_hotboards", [{"name": "C_Chat"}])
+    mock_client = AsyncMock()
+    mock_client.get = AsyncMock(side_effect=Exception("Connection refused"))
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+
+    with patch("scrapers.discussion_scraper.httpx.AsyncClient", return_value=mock_client):
+        await discussion_scraper.refresh_site_pages()
+
+    assert await database.get_discussion_page("ptt_hotboards") == [{"name": "C_Chat"}]
+
+
+async def test_fetch_all_discussions_assembles_from_store_without_http():
+    """組裝只讀共用儲存：不建立任何 HTTP client，四個分頁都有資料"""
+    await database.init_db()
+    home = discussion_scraper._extract_bahamut_home(BeautifulSoup(BAHAMUT_HTML, "html.parser"))
+    await database.save_discussion_page("bahamut_home", home)
+    await database.save_discussion_page("ptt_hotboards", [
+        {"name": "C_Chat", "url": "https://www.ptt.cc/bbs/C_Chat/index.html", "popularity": 9999}
+    ])
+    now = int(time.time())
+    await database.save_ptt_crawl("C_Chat", 100, f"M.{now}.A.001", [{
+        "article_id": f"M.{now}.A.001", "posted_at": now, "title": "[閒聊] 熱門",
+        "url": f"https://www.ptt.cc/bbs/C_Chat/M.{now}.A.001.html",
+        "popularity": "爆", "popularity_value": 100,
+    }])
+    await database.save_bahamut_posts("36730", "原神", [
+        {"title": "【心得】好玩推薦", "url": "https://forum.gamer.com.tw/C.php?bsn=60076&snA=12345", "gp": 50, "replies": 3},
+        {"title": "【情報】新活動", "url": "https://forum.gamer.com.tw/C.php?bsn=36730&snA=2", "gp": 10, "replies": 1},
+    ])
+
+    with patch("scrapers.discussion_scraper.httpx.AsyncClient", side_effect=AssertionError("no live fetch")):
+        data = await discussion_scraper.fetch_all_discussions()
+
+    assert data["bahamut_boards"][0]["name"] == "原神"
+    assert data["ptt_boards"][0]["name"] == "C_Chat"
+    assert data["ptt_articles"][0]["popularity_value"] == 100
+    # 首頁文章在前，追蹤版面的高 GP 文補在後，同一 URL 不重複
+    urls = [a["url"] for a in data["bahamut_articles"]]
+    assert urls[0].endswith("snA=12345")
+    assert len(urls) == len(set(urls)) == 2
+
+
+async def test_fetch_all_discussions_records_sentiment_buckets():
+    """組裝時寫入版面 / 遊戲彙總桶，重複組裝不重複計數；趨勢只讀彙總桶"""
+    await database.init_db()
+    now = int(time.time())
+    await database.save_ptt_crawl("LoL", 100, f"M.{now}.A.001", [{
+        "article_id": f"M.{now}.A.001", "posted_at": now, "title": "[心得] 新英雄 好玩推薦",
+        "url": f"https://www.ptt.cc/bbs/LoL/M.{now}.A.001.html",
+        "popularity": "3", "popularity_value": 3,
+    }])
+    await database.save_bahamut_posts("36730", "原神", [
+        {"title": "【討論】又延期 失望", "url": "https://forum.gamer.com.tw/C.php?bsn=36730&snA=2", "gp": 10, "replies": 1},
+    ])
+
+    await discussion_scraper.fetch_all_discussions()
+    await discussion_scraper.fetch_all_discussions()
+
+    lol = await discussion_scraper.sentiment_trend("game", "英雄聯盟", hours=24)
+    assert lol["summary"]["total"] == 1
+    assert lol["points"][0]["positive"] == 1 and lol["points"][0]["label"] == "positive"
+    genshin = await discussion_scraper.sentiment_trend("board", "bahamut:36730", hours=24, step="day")
+    assert genshin["summary"]["label"] == "negative"
+    games = await discussion_scraper.sentiment_keys("game", hours=24)
+    assert {g["key"] for g in games} == {"英雄聯盟", "原神"}
+
+
+async def test_sentiment_trend_merges_hours_into_days():
+    await database.init_db()
+    hour = int(time.time()) // 3600 * 3600
+    await database.record_sentiment([
+        {"url": f"u{i}", "board": "ptt:LoL", "game": "英雄聯盟", "hour": hour - i * 3600, "label": label}
+        for i, label in enumerate(["positive", "positive", "neutral", "negative"])
+    ])
+    hourly = await discussion_scraper.sentiment_trend("game", "英雄聯盟", hours=24)
+    assert [p["total"] for p in hourly["points"]] == [1, 1, 1, 1]
+    daily = await discussion_scraper.sentiment_trend("game", "英雄聯盟", hours=24, step="day")
+    assert sum(p["total"] for p in daily["points"]) == 4
+    assert daily["summary"]["positive_pct"] == 50.0
+
+    with pytest.raises(ValueError):
+        await discussion_scraper.sentiment_trend("site", "x")
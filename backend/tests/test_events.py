@@ -0,0 +1,170 @@
+"""
+events.py 測試 — 版本遞增、fan-out、來源過濾、慢消費者斷線、SSE 串流格式、long-poll 等待
+"""
+import asyncio
+import json
+
+import pytest
+
+import events
+
+
+# ── publish / version ────────────────────────────────
+
+
+def test_publish_increments_version_per_source():
+    """每個來源各自遞增版本號"""
+    bc = events.Broadcaster()
+    assert bc.version("news") == 0
+    bc.publish("news", updated_at=100)
+    bc.publish("news", updated_at=200)
+    bc.publish("twitch")
+    assert bc.version("news") == 2
+    assert bc.version("twitch") == 1
+    assert bc.snapshot()["news"] == {"version": 2, "updated_at": 200}
+
+
+def test_publish_fans_out_to_all_subscribers():
+    """所有訂閱者都收到同一事件"""
+    bc = events.Broadcaster()
+    subs = [bc.subscribe() for _ in range(100)]
+    event = bc.publish("news", updated_at=123)
+    for sub in subs:
+        assert sub.queue.get_nowait() == ("update", event)
+    assert event == {"source": "news", "version": 1, "updated_at": 123}
+
+
+def test_subscriber_source_filter():
+    """只訂閱 twitch 的連線不應收到 news 事件"""
+    bc = events.Broadcaster()
+    sub = bc.subscribe({"twitch"})
+    bc.publish("news")
+    assert sub.queue.empty()
+    bc.publish("twitch")
+    assert sub.queue.qsize() == 1
+
+
+def test_diff_only_sent_to_diff_subscribers():
+    """diff 事件只送給有要求 diff 的訂閱者"""
+    bc = events.Broadcaster()
+    plain = bc.subscribe()
+    with_diff = bc.subscribe(with_diff=True)
+    bc.publish("news", diff={"added": ["a"], "removed": []})
+    assert plain.queue.qsize() == 1
+    assert with_diff.queue.qsize() == 2
+    with_diff.queue.get_nowait()
+    name, payload = with_diff.queue.get_nowait()
+    assert name == "diff"
+    assert payload["added"] == ["a"]
+    assert payload["version"] == 1
+
+
+def test_slow_consumer_is_dropped():
+    """佇列塞滿的訂閱者被移除，並收到結束訊號"""
+    bc = events.Broadcaster(queue_size=2)
+    slow = bc.subscribe()
+    fast = bc.subscribe()
+    for _ in range(2):
+        bc.publish("news")
+        fast.queue.get_nowait()
+    bc.publish("news")  # slow 的佇列已滿
+
+    assert slow.dropped
+    assert slow.queue.get_nowait() is None
+    assert bc.stats() == {"subscribers": 1, "dropped": 1}
+    assert fast.queue.qsize() == 1
+
+
+# ── stream ───────────────────────────────────────────
+
+
+async def test_stream_emits_hello_then_updates():
+    """串流先送 hello 快照，接著轉送 update 事件"""
+    bc = events.Broadcaster()
+    bc.publish("steam", updated_at=1)
+    sub = bc.subscribe()
+    gen = events.stream(bc, sub, heartbeat=5)
+
+    hello = await gen.__anext__()
+    assert hello.startswith("event: hello\n")
+    assert json.loads(hello.split("data: ", 1)[1])["steam"]["version"] == 1
+
+    bc.publish("steam", updated_at=2)
+    chunk = await gen.__anext__()
+    assert chunk.startswith("event: update\n")
+    assert json.loads(chunk.split("data: ", 1)[1])["version"] == 2
+    await gen.aclose()
+    assert bc.stats()["subscribers"] == 0
+
+
+async def test_stream_heartbeat_when_idle():
+    """閒置超過 heartbeat 時送註解行"""
+    bc = events.Broadcaster()
+    gen = events.stream(bc, bc.subscribe(), heartbeat=0.05)
+    await gen.__anext__()
+    assert await asyncio.wait_for(gen.__anext__(), timeout=1) == ": ping\n\n"
+    await gen.aclose()
+
+
+async def test_stream_ends_when_dropped():
+    """被斷開的訂閱者串流應結束"""
+    bc = events.Broadcaster(queue_size=1)
+    sub = bc.subscribe()
+    gen = events.stream(bc, sub, heartbeat=5)
+    await gen.__anext__()
+    bc.publish("news")
+    bc.publish("news")
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+
+
+# ── diff_by_key ──────────────────────────────────────
+
+
+def test_diff_by_key():
+    old = [{"id": "a"}, {"id": "b"}]
+    new = [{"id": "b"}, {"id": "c"}]
+    assert events.diff_by_key(old, new, "id") == {"added": ["c"], "removed": ["a"]}
+
+
+# ── wait_for_version（long-poll）──────────────────────
+
+
+async def test_wait_for_version_wakes_on_publish():
+    """等待中的 long-poll 在 publish 後立即返回 True"""
+    bc = events.Broadcaster()
+    bc.publish("news")
+    waiter = asyncio.create_task(bc.wait_for_version("news", 1, timeout=5))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    bc.publish("news")
+    assert await asyncio.wait_for(waiter, timeout=1) is True
+
+
+async def test_wait_for_version_timeout():
+    """版本未變動時逾時回傳 False"""
+    bc = events.Broadcaster()
+    assert await bc.wait_for_version("twitch", 0, timeout=0.05) is False
+
+
+async def test_wait_for_version_already_newer():
+    """client 版本落後時不等待"""
+    bc = events.Broadcaster()
+    bc.publish("news")
+    bc.publish("news")
+    assert await bc.wait_for_version("news", 1, timeout=5) is True
+
+
+async def test_wait_for_version_after_restart():
+    """client 版本比伺服器新（伺服器重啟後歸零）也視為有變動"""
+    bc = events.Broadcaster()
+    assert await bc.wait_for_version("news", 7, timeout=5) is True
+
+
+async def test_wait_for_version_ignores_other_sources():
+    """其他來源的 publish 不應喚醒"""
+    bc = events.Broadcaster()
+    waiter = asyncio.create_task(bc.wait_for_version("news", 0, timeout=0.1))
+    await asyncio.sleep(0.01)
+    bc.publish("twitch")
+    assert await waiter is False
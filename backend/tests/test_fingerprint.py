@@ -0,0 +1,33 @@
+"""
+fingerprint.py 測試 — 標題正規化（來源前綴 / 網站名稱 / 標點）、URL 正規化、指紋
+"""
+from scrapers import fingerprint
+
+
+def test_normalize_title_strips_source_decorations():
+    expected = fingerprint.normalize_title("原神 聯名活動開跑")
+    for title in ("【情報】原神 聯名活動開跑！", "[4Gamers] 原神  聯名活動開跑", "原神聯名活動開跑 - Facebook",
+                  "（公告）原神聯名活動開跑｜巴哈姆特電玩資訊站", "原神　聯名活動開跑"):
+        assert fingerprint.normalize_title(title) == expected
+    # 非網站名稱的 " - " 後半段保留
+    assert fingerprint.normalize_title("原神 × 麥當勞 - 聯名活動開跑") == "原神麥當勞聯名活動開跑"
+    # 只有括號時保留原文
+    assert fingerprint.normalize_title("【情報】") == "情報"
+
+
+def test_canonical_url():
+    assert fingerprint.canonical_url("http://www.Example.com/a/?utm_source=x&b=2&a=1#top") == \
+        "https://example.com/a?a=1&b=2"
+    assert fingerprint.canonical_url("https://youtu.be/abc?si=zz") == "https://youtube.com/watch?v=abc"
+    assert fingerprint.canonical_url("https://m.youtube.com/shorts/abc") == "https://youtube.com/watch?v=abc"
+    assert fingerprint.canonical_url("https://www.facebook.com/p/1?fbclid=x") == "https://facebook.com/p/1"
+    assert fingerprint.canonical_url("not a url") == "not a url"
+
+
+def test_fingerprints():
+    assert fingerprint.title_fingerprint("【活動】原神 聯名！") == fingerprint.title_fingerprint("原神聯名")
+    assert fingerprint.title_fingerprint("！！") == ""
+    assert fingerprint.url_fingerprint("https://youtu.be/abc") == \
+        fingerprint.url_fingerprint("https://www.youtube.com/watch?v=abc&feature=share")
+    assert fingerprint.title_fingerprint("原神") != fingerprint.url_fingerprint("原神")
+    assert fingerprint.url_fingerprint("") == ""
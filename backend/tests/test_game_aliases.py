@@ -0,0 +1,34 @@
+"""
+game_aliases.py 測試 — 別名群組、名稱變體順序、一次走訪多遊戲比對、英數別名單字邊界
+"""
+from scrapers import game_aliases
+from scrapers.game_aliases import GameAliasIndex
+
+
+def test_variants_and_match_names():
+    index = GameAliasIndex(["星穹鐵道", "未知遊戲"])
+    assert index.variants("星穹鐵道") == ["崩壞：星穹鐵道", "星穹鐵道", "崩壞星穹鐵道"]
+    assert index.variants("未知遊戲") == ["未知遊戲"]
+    assert index.variants("不在索引") == ["不在索引"]
+    assert "崩壞星穹鐵道" in index.match_names("星穹鐵道")
+    # 群組比對不分大小寫
+    assert GameAliasIndex(["nikke"]).variants("nikke")[0] == "勝利女神：妮姬"
+
+
+def test_games_in_single_pass():
+    index = GameAliasIndex(["原神", "Fate/Grand Order", "崩壞：星穹鐵道"])
+    assert index.games_in("FGO 與 genshin 同場加映") == {"Fate/Grand Order", "原神"}
+    assert index.contains("星穹鐵道全新版本", "崩壞：星穹鐵道")
+    assert not index.contains("完全無關的內容", "原神")
+
+
+def test_word_boundary_for_ascii_aliases():
+    index = GameAliasIndex(["RO仙境傳説"])
+    assert index.games_in("PRO 選手專訪") == {"RO仙境傳説"}
+    assert index.games_in("PRO 選手專訪", word_boundary=True) == set()
+    assert index.games_in("RO 新職業", word_boundary=True) == {"RO仙境傳説"}
+    assert index.games_in("仙境傳說改版", word_boundary=True) == {"RO仙境傳説"}
+
+
+def test_index_for_is_cached():
+    assert game_aliases.index_for(("原神",)) is game_aliases.index_for(("原神",))
@@ -0,0 +1,103 @@
+"""
+http_cache.py 測試 — 條件式請求標頭、304 沿用、內容相同跳過解析、LRU 淘汰
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from scrapers import http_cache
+
+
+def _resp(status_code=200, body=b"<rss/>", headers=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.content = body
+    resp.headers = headers or {}
+    resp.raise_for_status = MagicMock()
+    if status_code >= 400:
+        resp.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
+    return resp
+
+
+def _client(*responses):
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=list(responses))
+    return client
+
+
+async def test_first_fetch_parses_and_stores_validators():
+    store = http_cache.ValidatorStore()
+    parse = MagicMock(return_value=["a"])
+    client = _client(_resp(headers={"etag": '"v1"', "last-modified": "Fri, 04 Apr 2026 08:00:00 GMT"}))
+
+    value, changed = await http_cache.conditional_get(client, "https://x/feed", parse, store=store)
+
+    assert (value, changed) == (["a"], True)
+    assert store.get("https://x/feed")["etag"] == '"v1"'
+    assert store.stats()["misses"] == 1
+
+
+async def test_sends_validators_and_reuses_on_304():
+    """第二次請求帶 If-None-Match / If-Modified-Since，304 時不呼叫 parse"""
+    store = http_cache.ValidatorStore()
+    parse = MagicMock(return_value=["a"])
+    client = _client(
+        _resp(headers={"etag": '"v1"', "last-modified": "Fri, 04 Apr 2026 08:00:00 GMT"}),
+        _resp(status_code=304, body=b""),
+    )
+
+    await http_cache.conditional_get(client, "https://x/feed", parse, headers={"User-Agent": "t"}, store=store)
+    value, changed = await http_cache.conditional_get(client, "https://x/feed", parse, headers={"User-Agent": "t"}, store=store)
+
+    sent = client.get.call_args_list[1].kwargs["headers"]
+    assert sent["If-None-Match"] == '"v1"'
+    assert sent["If-Modified-Since"] == "Fri, 04 Apr 2026 08:00:00 GMT"
+    assert sent["User-Agent"] == "t"
+    assert (value, changed) == (["a"], False)
+    assert parse.call_count == 1
+
+
+async def test_same_body_skips_parse():
+    """上游不支援 304 但內容相同時，以雜湊判定未變動"""
+    store = http_cache.ValidatorStore()
+    parse = MagicMock(return_value=["a"])
+    client = _client(_resp(body=b"same"), _resp(body=b"same"))
+
+    await http_cache.conditional_get(client, "https://x/feed", parse, store=store)
+    value, changed = await http_cache.conditional_get(client, "https://x/feed", parse, store=store)
+
+    assert (value, changed) == (["a"], False)
+    assert parse.call_count == 1
+    assert store.stats()["hits"] == 1
+
+
+async def test_changed_body_reparses():
+    store = http_cache.ValidatorStore()
+    parse = MagicMock(side_effect=[["a"], ["b"]])
+    client = _client(_resp(body=b"one"), _resp(body=b"two"))
+
+    await http_cache.conditional_get(client, "https://x/feed", parse, store=store)
+    value, changed = await http_cache.conditional_get(client, "https://x/feed", parse, store=store)
+
+    assert (value, changed) == (["b"], True)
+
+
+async def test_error_status_raises_and_keeps_entry():
+    store = http_cache.ValidatorStore()
+    client = _client(_resp(body=b"one"), _resp(status_code=503))
+
+    await http_cache.conditional_get(client, "https://x/feed", lambda r: ["a"], store=store)
+    with pytest.raises(Exception):
+        await http_cache.conditional_get(client, "https://x/feed", lambda r: ["b"], store=store)
+
+    assert store.get("https://x/feed")["value"] == ["a"]
+
+
+def test_store_evicts_least_recently_used():
+    store = http_cache.ValidatorStore(max_entries=2)
+    store.put("a", {"value": 1})
+    store.put("b", {"value": 2})
+    store.get("a")
+    store.put("c", {"value": 3})
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
@@ -0,0 +1,89 @@
+"""
+jobs.py 測試 — 提交立即回傳、同種類去重、進度回報、失敗 / 逾時紀錄、重啟後查詢與 interrupted 標記
+"""
+import asyncio
+
+import pytest
+
+import database
+import jobs
+
+
+@pytest.fixture
+def manager():
+    return jobs.JobManager(persist_interval=0)
+
+
+async def test_submit_returns_immediately_and_dedups(manager):
+    await database.init_db()
+    release = asyncio.Event()
+
+    async def work(report, full=False):
+        report("原神", "google_news", "running")
+        await release.wait()
+        report("原神", "google_news", "done", 3)
+        return {"full": full}
+
+    job, dup = await manager.submit("digest", work, params={"full": True})
+    assert not dup and job["status"] == "queued"
+
+    again, dup = await manager.submit("digest", work)
+    assert dup and again["id"] == job["id"]
+
+    try:
+        for _ in range(100):
+            running = await manager.get(job["id"])
+            if running["progress"]["total"]:
+                break
+            await asyncio.sleep(0.01)
+        assert running["status"] == "running"
+        assert running["progress"]["tasks"]["原神"]["google_news"]["status"] == "running"
+        # 進度也寫回 DB（persist_interval=0）
+        await asyncio.sleep(0.05)
+        assert (await database.get_job(job["id"]))["progress"]["counts"] == {"running": 1}
+    finally:
+        release.set()
+    final = await manager.wait(job["id"])
+    assert final["status"] == "succeeded"
+    assert final["result"] == {"full": True}
+    assert final["progress"]["counts"] == {"done": 1}
+    assert final["progress"]["tasks"]["原神"]["google_news"]["items"] == 3
+
+    # 結束後可再提交新工作
+    nxt, dup = await manager.submit("digest", work)
+    assert not dup and nxt["id"] != job["id"]
+    assert (await manager.wait(nxt["id"]))["status"] == "succeeded"
+
+
+async def test_failed_and_timed_out_jobs_are_recorded(manager):
+    await database.init_db()
+
+    async def boom(report):
+        raise RuntimeError("upstream down")
+
+    async def slow(report):
+        await asyncio.sleep(1)
+
+    failed, _ = await manager.submit("a", boom)
+    timed_out, _ = await manager.submit("b", slow, timeout=0.01)
+    assert (await manager.wait(failed["id"]))["error"] == "upstream down"
+    final = await manager.wait(timed_out["id"])
+    assert final["status"] == "failed" and "timeout" in final["error"]
+
+
+async def test_job_records_survive_restart(manager):
+    """新的 manager（模擬重啟）從 DB 讀紀錄；重啟前未完成的工作標記為 interrupted"""
+    await database.init_db()
+
+    async def quick(report):
+        return {"ok": 1}
+
+    done, _ = await manager.submit("digest", quick)
+    await manager.wait(done["id"])
+    await database.save_job({**done, "id": "stale", "status": "running"})
+
+    restarted = jobs.JobManager()
+    assert await restarted.recover() == 1
+    assert (await restarted.get(done["id"]))["result"] == {"ok": 1}
+    assert (await restarted.get("stale"))["status"] == "interrupted"
+    assert await restarted.get("missing") is None
@@ -0,0 +1,77 @@
+"""
+keyword_matcher.py 測試 — 重疊命中、多分類、大小寫、兩種實作結果一致、與舊的逐一子字串判斷相同
+"""
+import random
+
+import pytest
+
+from scrapers import keyword_matcher, sentiment
+from scrapers import weekly_digest_scraper as wd
+from scrapers.keyword_matcher import KeywordMatcher
+
+BACKENDS = [b for b in keyword_matcher.BACKENDS
+            if b != "pyahocorasick" or keyword_matcher.ahocorasick is not None]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+
+def test_overlapping_and_nested_keywords(backend):
+    m = KeywordMatcher({"neg": ["糞", "糞作", "作"], "pos": ["神作"]}, backend=backend)
+    assert m.matches("根本糞作") == {"neg": {"糞", "糞作", "作"}}
+    assert m.matches("神作還是糞作") == {"pos": {"神作"}, "neg": {"糞", "糞作", "作"}}
+    assert m.counts("神作還是糞作") == {"pos": 1, "neg": 3}
+
+
+def test_keyword_in_multiple_categories(backend):
+    m = KeywordMatcher({"event": ["免費", "活動"], "pos": ["免費"]}, backend=backend)
+    assert m.categories("限時免費") == {"event", "pos"}
+    assert m.categories("沒有") == set()
+    assert m.categories("") == set()
+
+
+def test_ignore_case(backend):
+    m = KeywordMatcher({"ad": ["PV", "trailer"]}, ignore_case=True, backend=backend)
+    assert m.categories("New Trailer") == {"ad"}
+    assert m.categories("pv 公開") == {"ad"}
+    strict = KeywordMatcher({"ad": ["PV"]}, backend=backend)
+    assert strict.categories("pv 公開") == set()
+
+
+def test_empty_keyword_set(backend):
+    m = KeywordMatcher({"x": []}, backend=backend)
+    assert m.matches("任何文字") == {}
+
+
+def test_backends_agree_with_substring_checks():
+    """隨機文字：各實作與逐一 `kw in text` 結果相同"""
+    rng = random.Random(0)
+    categories = {"pos": sentiment._POS_KEYWORDS, "neg": sentiment._NEG_KEYWORDS}
+    matchers = [KeywordMatcher(categories, backend=b) for b in BACKENDS]
+    alphabet = list("".join(sentiment._POS_KEYWORDS | sentiment._NEG_KEYWORDS)) + list("ab 的了")
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {}
+        for name, words in categories.items():
+            hit = {kw for kw in words if kw in text}
+            if hit:
+                expected[name] = hit
+        for m in matchers:
+            assert m.matches(text) == expected
+
+
+def test_analyze_title_uses_matcher_counts():
+    assert sentiment.analyze_title("原神 新版本 好玩推薦")["label"] == "positive"
+    assert sentiment.analyze_title("糞作 退坑")["label"] == "negative"
+    assert sentiment.analyze_title("推薦 但 退坑")["label"] == "neutral"
+
+
+def test_digest_classify_keeps_lowercased_text_semantics():
+    """分類比對小寫化文字：含大寫的關鍵字（PV）不命中，小寫關鍵字不分大小寫"""
+    assert wd._classify_item("新角色 PV 公開") == ["news"]
+    assert wd._classify_item("官方 Trailer 公開") == ["ad"]
+    assert wd._classify_item("限定活動 聯名") == ["collab", "event"]
+    hits = wd._4GAMERS_MATCHER.categories("官方 Trailer 公開 限定活動")
+    assert wd._tags_from_hits(hits) == wd._classify_item("官方 Trailer 公開 限定活動")
@@ -0,0 +1,24 @@
+"""
+loop_monitor.py 測試 — 同步阻塞會反映在 loop lag 統計
+"""
+import asyncio
+import time
+
+from loop_monitor import LoopLagMonitor
+
+
+async def test_blocking_call_shows_up_as_lag():
+    monitor = LoopLagMonitor(interval=0.02)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    time.sleep(0.2)  # 模擬在事件循環上同步解析大頁面
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    assert monitor.stats()["max_ms"] >= 150
+    assert monitor.max_since(start) >= 0.15
+
+
+def test_stats_empty():
+    assert LoopLagMonitor().stats() == {"samples": 0, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
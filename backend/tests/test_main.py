@@ -0,0 +1,49 @@
+"""
+main.py 測試 — 面板端點（一般讀取 + long-poll）直接讀各 scraper 的真實快取函式（不 mock），
+確認端點與 scraper 的公開介面一致
+"""
+import httpx
+import pytest
+
+import main
+from events import broadcaster
+from scrapers import (discussion_scraper, mobile_scraper, news_scraper, steam_scraper, twitch_scraper,
+                      weekly_digest_scraper)
+
+SCRAPERS = [discussion_scraper, mobile_scraper, news_scraper, steam_scraper, twitch_scraper, weekly_digest_scraper]
+
+
+@pytest.fixture(autouse=True)
+def isolate_cache(tmp_path, monkeypatch):
+    for module in SCRAPERS:
+        monkeypatch.setattr(module, "CACHE_DIR", str(tmp_path))
+        monkeypatch.setattr(module, "CACHE_FILE", str(tmp_path / f"{module.__name__.rsplit('.', 1)[-1]}.json"))
+
+
+async def _get(path: str, **params) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        return await client.get(path, params=params)
+
+
+async def test_weekly_digest_reads_cache():
+    resp = await _get("/api/weekly-digest")
+    assert resp.status_code == 200
+    assert resp.json()["data"] == {"digest": [], "game_count": 0, "total_items": 0}
+
+
+@pytest.mark.parametrize("source, path", [
+    ("news", "/api/news"),
+    ("discussions", "/api/discussions"),
+    ("mobile", "/api/mobile/all"),
+    ("steam", "/api/steam/top-games"),
+    ("twitch", "/api/twitch/top-games"),
+    ("weekly_digest", "/api/weekly-digest"),
+])
+async def test_long_poll_returns_cached_data(source, path):
+    """版本已超過 since_version：立即回傳快取內容"""
+    broadcaster.publish(source)
+    version = broadcaster.version(source)
+    resp = await _get(path, since_version=version - 1, wait=0)
+    assert resp.status_code == 200
+    assert resp.json()["version"] == version
+    assert "data" in resp.json()
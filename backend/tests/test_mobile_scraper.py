@@ -18,6 +18,8 @@ def _mock_response(status_code=200, json_data=None):
     resp = MagicMock()
     resp.status_code = status_code
     resp.json.return_value = json_data or {}
+    resp.headers = {}
+    resp.content = json.dumps(json_data or {}).encode()
     resp.raise_for_status = MagicMock()
     if status_code >= 400:
         resp.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
@@ -257,7 +259,7 @@ async def test_fetch_all_mobile_total_failure_returns_cache(tmp_path):
     with open(cache_file, "w") as f:
         json.dump(cached, f)
 
-    # gather 裡兩個都拋例外，外層 catch 走 _load_cache
+    # gather 裡兩個都拋例外，外層 catch 走 load_cache
     with patch("scrapers.mobile_scraper.fetch_ios_top_free", AsyncMock(side_effect=Exception("fail"))), \
          patch("scrapers.mobile_scraper.fetch_android_top_games", AsyncMock(side_effect=Exception("fail"))), \
          patch("scrapers.mobile_scraper.asyncio") as mock_asyncio:
@@ -271,17 +273,42 @@ async def test_fetch_all_mobile_total_failure_returns_cache(tmp_path):
     assert result["ios"]["free"][0]["name"] == "CachedIOS"
 
 
+async def test_fetch_all_mobile_keeps_cache_when_rankings_unchanged():
+    """iOS 回 304 且 Android 排行與快取相同：回傳舊快取，不重寫（updated_at 不變）"""
+    ios_data = [{"rank": 1, "name": "iOSGame", "chart": "iOS Free"}]
+    android_data = {"free": [{"rank": 1, "name": "AndroidGame"}], "grossing": []}
+    cached = {"ios": {"free": ios_data, "grossing": []}, "android": android_data, "updated_at": 100}
+    mobile_scraper._save_cache(cached)
+
+    with patch("scrapers.mobile_scraper.http_cache.conditional_get", AsyncMock(return_value=(ios_data, False))), \
+         patch("scrapers.mobile_scraper.fetch_android_top_games", AsyncMock(return_value=android_data)), \
+         patch("scrapers.mobile_scraper._save_cache") as save:
+        result = await mobile_scraper.fetch_all_mobile()
+
+    assert result == cached
+    save.assert_not_called()
+
+    # Android 排行有變動時照常重寫
+    changed = {"free": [{"rank": 1, "name": "NewGame"}], "grossing": []}
+    with patch("scrapers.mobile_scraper.http_cache.conditional_get", AsyncMock(return_value=(ios_data, False))), \
+         patch("scrapers.mobile_scraper.fetch_android_top_games", AsyncMock(return_value=changed)):
+        result = await mobile_scraper.fetch_all_mobile()
+
+    assert result["android"]["free"][0]["name"] == "NewGame"
+    assert mobile_scraper.load_cache()["updated_at"] != 100
+
+
 # ── cache functions ──────────────────────────────────
 
 def test_save_and_load_cache(tmp_path):
     """cache 寫入後可正確讀回"""
     data = {"ios": {"free": [{"rank": 1}]}, "android": {"free": []}}
     mobile_scraper._save_cache(data)
-    loaded = mobile_scraper._load_cache()
+    loaded = mobile_scraper.load_cache()
     assert loaded["ios"]["free"][0]["rank"] == 1
 
 
 def test_load_cache_missing_file():
     """cache 檔案不存在時回傳預設結構"""
-    result = mobile_scraper._load_cache()
+    result = mobile_scraper.load_cache()
     assert result == {"ios": {"free": [], "grossing": []}, "android": {"free": [], "grossing": []}}
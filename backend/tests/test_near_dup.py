@@ -0,0 +1,93 @@
+"""
+near_dup.py 測試 — shingle 正規化、MinHash 相似度、LSH 增量分群、related 合併
+"""
+import aiosqlite
+
+import database
+from scrapers import near_dup
+
+
+def _item(news_id, title, source="巴哈姆特 GNN", summary=""):
+    return {"id": news_id, "title": title, "summary": summary, "source": source,
+            "url": f"https://example.com/{news_id}", "published_at": "2026-04-04T08:00:00Z"}
+
+
+# ── shingles / minhash ───────────────────────────────
+
+
+def test_shingles_ignore_punctuation_and_case():
+    """標點、全形符號與大小寫差異不影響 shingle"""
+    a = near_dup.shingles("《原神》5.0 版本「納塔」上線")
+    b = near_dup.shingles("原神 5.0版本 納塔 上線！")
+    assert a == b
+
+
+def test_similarity_of_rewritten_titles():
+    """同一則新聞改寫後仍高於門檻，無關新聞則接近 0"""
+    a = near_dup.minhash(near_dup.shingles("《原神》5.0 版本「納塔」正式上線 全新角色登場"))
+    b = near_dup.minhash(near_dup.shingles("原神5.0版本納塔正式上線，全新角色同步登場"))
+    c = near_dup.minhash(near_dup.shingles("Steam 夏季特賣開跑 年度最大折扣"))
+    assert near_dup.similarity(a, b) >= near_dup.THRESHOLD
+    assert near_dup.similarity(a, c) < 0.2
+
+
+def test_band_keys_stable():
+    """桶號只取決於簽章內容（跨 process 穩定）"""
+    sig = near_dup.minhash(near_dup.shingles("任天堂直面會 重點整理"))
+    assert near_dup.band_keys(sig) == near_dup.band_keys(sig)
+    assert len(near_dup.band_keys(sig)) == near_dup.BANDS
+
+
+# ── assign_clusters（需 DB）───────────────────────────
+
+
+async def test_assign_clusters_groups_cross_source_duplicates():
+    """同批次內不同來源的同一則新聞應歸為同一群"""
+    await database.init_db()
+    items = [
+        _item("g1", "《原神》5.0 版本「納塔」正式上線 全新角色登場", "巴哈姆特 GNN"),
+        _item("u1", "原神5.0版本納塔正式上線 全新角色登場", "UDN 遊戲角落"),
+        _item("f1", "Steam 夏季特賣開跑 年度最大折扣", "4Gamers TW"),
+    ]
+    clusters = await near_dup.assign_clusters(items)
+    assert clusters["g1"] == clusters["u1"] == "g1"
+    assert clusters["f1"] == "f1"
+
+
+async def test_assign_clusters_incremental_against_archive():
+    """下一輪的新項目會比對到上一輪已寫入的群，舊項目沿用原本 cluster_id"""
+    await database.init_db()
+    await near_dup.assign_clusters([_item("g1", "寶可夢 新作 發表會 確定 下月 舉行")])
+    clusters = await near_dup.assign_clusters([
+        _item("g1", "寶可夢 新作 發表會 確定 下月 舉行"),
+        _item("f1", "寶可夢新作發表會確定下月舉行！", "4Gamers TW"),
+    ])
+    assert clusters["f1"] == "g1"
+
+    async with aiosqlite.connect(database.DB_PATH) as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM news_cluster")
+        assert (await cursor.fetchone())[0] == 2
+
+
+async def test_assign_clusters_empty_text_not_merged():
+    """沒有內容的項目各自成群"""
+    await database.init_db()
+    clusters = await near_dup.assign_clusters([_item("a", ""), _item("b", "")])
+    assert clusters == {"a": "a", "b": "b"}
+
+
+# ── group_clusters ───────────────────────────────────
+
+
+def test_group_clusters_keeps_first_and_collects_related():
+    items = [
+        _item("g1", "標題 A", "巴哈姆特 GNN"),
+        _item("f1", "標題 B", "4Gamers TW"),
+        _item("u1", "標題 A'", "UDN 遊戲角落"),
+    ]
+    grouped = near_dup.group_clusters(items, {"g1": "g1", "u1": "g1", "f1": "f1"})
+    assert [it["id"] for it in grouped] == ["g1", "f1"]
+    assert grouped[0]["related"] == [
+        {"source": "UDN 遊戲角落", "title": "標題 A'", "url": "https://example.com/u1"}
+    ]
+    assert grouped[1]["related"] == []
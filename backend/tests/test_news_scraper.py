@@ -1,13 +1,15 @@
 """
-news_scraper.py 測試 — RSS 解析、JSON API 解析、去重、容錯
+news_scraper.py 測試 — RSS 解析、JSON API 解析、去重、容錯、分頁查詢索引
 使用 unittest.mock 模擬 httpx 回應
 """
+import json
 import time
+from contextlib import ExitStack
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from scrapers import news_scraper
+from scrapers import news_scraper, news_sources
 
 
 # ── helpers ──────────────────────────────────────────
@@ -17,17 +19,35 @@ def _mock_response(status_code=200, text="", json_data=None):
     resp.status_code = status_code
     resp.text = text
     resp.json.return_value = json_data or {}
+    resp.headers = {}
+    resp.content = text.encode() if text else json.dumps(json_data or {}).encode()
     resp.raise_for_status = MagicMock()
     if status_code >= 400:
         resp.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
     return resp
 
 
+def _patch_sources(results):
+    """以 AsyncMock 取代註冊表中各來源的 fetch（key → 回傳清單或例外）"""
+    stack = ExitStack()
+    for adapter in news_scraper._get_registry():
+        value = results.get(adapter.key, [])
+        if isinstance(value, Exception):
+            mock = AsyncMock(side_effect=value)
+        else:
+            mock = AsyncMock(return_value=value)
+        stack.enter_context(patch.object(adapter, "fetch", mock))
+    return stack
+
+
 @pytest.fixture(autouse=True)
 def isolate_cache(tmp_path, monkeypatch):
     cache_dir = str(tmp_path / "cache")
     monkeypatch.setattr(news_scraper, "CACHE_DIR", cache_dir)
     monkeypatch.setattr(news_scraper, "CACHE_FILE", str(tmp_path / "cache" / "news_data.json"))
+    monkeypatch.setattr(news_scraper, "_index", {"mtime": None, "updated_at": 0, "all": ([], []), "by_source": {}})
+    for adapter in news_scraper._get_registry():
+        adapter.unchanged = False
 
 
 # ── _news_hash ───────────────────────────────────────
@@ -146,9 +166,7 @@ async def test_aggregate_news_deduplicates():
         {"id": "def", "title": "新聞B", "source": "4G", "published_at": "2026-04-04T07:00:00Z"},
     ]
 
-    with patch("scrapers.news_scraper.fetch_gnn_rss", AsyncMock(return_value=duplicate_news[:2])), \
-         patch("scrapers.news_scraper.fetch_4gamers_tw", AsyncMock(return_value=[duplicate_news[2]])), \
-         patch("scrapers.news_scraper.fetch_udn_game", AsyncMock(return_value=[])):
+    with _patch_sources({"gnn": duplicate_news[:2], "4gamers": [duplicate_news[2]], "udn": []}):
         result = await news_scraper.aggregate_news()
 
     assert result["total_count"] == 2  # abc 去重後只剩 1 + def = 2
@@ -160,10 +178,144 @@ async def test_aggregate_news_partial_failure():
         {"id": "x1", "title": "好新聞", "source": "GNN", "published_at": "2026-04-04T08:00:00Z"},
     ]
 
-    with patch("scrapers.news_scraper.fetch_gnn_rss", AsyncMock(return_value=good_news)), \
-         patch("scrapers.news_scraper.fetch_4gamers_tw", AsyncMock(side_effect=Exception("boom"))), \
-         patch("scrapers.news_scraper.fetch_udn_game", AsyncMock(return_value=[])):
+    with _patch_sources({"gnn": good_news, "4gamers": Exception("boom"), "udn": []}):
         result = await news_scraper.aggregate_news()
 
     assert result["total_count"] == 1
     assert result["news"][0]["title"] == "好新聞"
+
+
+# ── query_news（cursor 分頁 / 投影 / 來源篩選）──────────
+
+def _seed_cache(n=25):
+    news = []
+    for i in range(n):
+        news.append({
+            "id": f"id{i:02d}",
+            "title": f"新聞 {i}",
+            "url": f"https://example.com/{i}",
+            "summary": "摘要" * 20,
+            "source": "巴哈姆特 GNN" if i % 2 == 0 else "4Gamers TW",
+            "published_at": f"2026-04-{1 + i // 10:02d}T{i % 10:02d}:00:00Z",
+        })
+    news_scraper._save_cache({"news": news, "total_count": n, "updated_at": 123})
+    return news
+
+
+def test_query_news_cursor_pagination_covers_all():
+    """依 next_cursor 逐頁往下，應不重複、不遺漏且由新到舊"""
+    news = _seed_cache()
+    seen, cursor = [], None
+    while True:
+        page = news_scraper.query_news(cursor=cursor, limit=10)
+        seen.extend(it["id"] for it in page["news"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    expected = [it["id"] for it in sorted(news, key=lambda x: x["published_at"], reverse=True)]
+    assert seen == expected
+
+
+def test_query_news_fields_projection():
+    """fields 只回傳指定欄位"""
+    _seed_cache()
+    page = news_scraper.query_news(limit=3, fields=["id", "title"])
+    assert len(page["news"]) == 3
+    assert all(set(it) == {"id", "title"} for it in page["news"])
+
+
+async def test_query_news_projects_enriched_fields(monkeypatch):
+    """aggregate_news 附加的欄位（分群 / 情緒 / 遊戲標記）也能投影"""
+    monkeypatch.setattr(news_scraper, "_game_index", None)
+    items = [{"id": "g1", "title": "原神 聯名活動開跑", "source": "GNN", "published_at": "2026-04-04T08:00:00Z"}]
+    with _patch_sources({"gnn": items}):
+        await news_scraper.aggregate_news()
+
+    fields = ["id", "cluster_id", "related", "sentiment", "games"]
+    page = news_scraper.query_news(fields=fields)
+    assert [set(it) for it in page["news"]] == [set(fields)]
+    assert page["news"][0]["games"] == ["原神"]
+
+
+def test_query_news_unknown_field_raises():
+    _seed_cache()
+    with pytest.raises(ValueError):
+        news_scraper.query_news(fields=["id", "password"])
+
+
+def test_query_news_source_filter():
+    """source 篩選只回傳該來源，total_count 為該來源總數"""
+    _seed_cache()
+    page = news_scraper.query_news(source="4Gamers TW", limit=100)
+    assert page["total_count"] == 12
+    assert all(it["source"] == "4Gamers TW" for it in page["news"])
+    assert page["next_cursor"] is None
+
+
+def test_query_news_rebuilds_index_from_cache_file():
+    """索引為空時從快取檔重建（如 process 重啟）"""
+    _seed_cache(5)
+    news_scraper._index["mtime"] = None
+    page = news_scraper.query_news(limit=2)
+    assert [it["id"] for it in page["news"]] == ["id04", "id03"]
+    assert page["updated_at"] == 123
+
+
+async def test_aggregate_news_archives_all_items(monkeypatch):
+    """aggregate_news 截斷前先把所有新聞寫入封存"""
+    import database
+    await database.init_db()
+    monkeypatch.setattr(news_scraper, "MAX_NEWS", 1)
+    items = [
+        {"id": "x1", "title": "新聞一", "source": "GNN", "published_at": "2026-04-04T08:00:00Z"},
+        {"id": "x2", "title": "新聞二", "source": "GNN", "published_at": "2026-04-04T07:00:00Z"},
+    ]
+    with _patch_sources({"gnn": items, "4gamers": [], "udn": []}):
+        result = await news_scraper.aggregate_news()
+
+    assert result["total_count"] == 1
+    found = await database.search_news("新聞")
+    assert {it["id"] for it in found["items"]} == {"x1", "x2"}
+
+
+async def test_aggregate_news_merges_cross_source_duplicates():
+    """不同來源的同一則新聞只佔一個名額，其他來源放在 related"""
+    import database
+    await database.init_db()
+    gnn = [{"id": "g1", "title": "《原神》5.0 版本「納塔」正式上線 全新角色登場", "source": "巴哈姆特 GNN",
+            "url": "https://gnn/1", "published_at": "2026-04-04T08:00:00Z"}]
+    udn = [{"id": "u1", "title": "原神5.0版本納塔正式上線 全新角色登場", "source": "UDN 遊戲角落",
+            "url": "https://udn/1", "published_at": "2026-04-04T07:00:00Z"}]
+    with _patch_sources({"gnn": gnn, "4gamers": [], "udn": udn}):
+        result = await news_scraper.aggregate_news()
+
+    assert result["total_count"] == 1
+    assert result["news"][0]["id"] == "g1"
+    assert result["news"][0]["related"][0]["url"] == "https://udn/1"
+
+
+async def test_aggregate_news_all_sources_unchanged_keeps_cache():
+    """所有來源皆 304 / 內容相同時，直接沿用快取，不重新處理也不更新 updated_at"""
+    news_scraper._save_cache({"news": [], "total_count": 0, "updated_at": 111})
+
+    with _patch_sources({"gnn": [], "4gamers": [], "udn": []}):
+        for adapter in news_scraper._get_registry():
+            adapter.unchanged = True
+        result = await news_scraper.aggregate_news()
+
+    assert result["updated_at"] == 111
+
+
+async def test_aggregate_news_tags_games(monkeypatch):
+    """每則新聞以別名索引標記提到的遊戲"""
+    monkeypatch.setattr(news_scraper, "_game_index", None)
+    items = [
+        {"id": "g1", "title": "FGO 與原神聯動？", "source": "GNN", "published_at": "2026-04-04T08:00:00Z"},
+        {"id": "g2", "title": "PRO 電競聯賽開打", "source": "GNN", "published_at": "2026-04-04T07:00:00Z"},
+    ]
+
+    with _patch_sources({"gnn": items}):
+        result = await news_scraper.aggregate_news()
+
+    games = {n["id"]: n["games"] for n in result["news"]}
+    assert games == {"g1": ["Fate/Grand Order", "原神"], "g2": []}
@@ -0,0 +1,130 @@
+"""
+news_sources.py 測試 — 設定檔載入、RSS/JSON adapter 正規化、每主機並行上限、每來源 deadline
+"""
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock
+
+from scrapers import news_sources
+
+
+def _write_config(tmp_path, sources, defaults=None):
+    path = tmp_path / "sources.json"
+    path.write_text(json.dumps({"defaults": defaults or {}, "sources": sources}), encoding="utf-8")
+    return str(path)
+
+
+class _SlowAdapter(news_sources.SourceAdapter):
+    """測試用：記錄同時進行中的請求數"""
+    active = 0
+    peak = 0
+
+    def __init__(self, key, url, delay, **cfg):
+        super().__init__({"key": key, "name": key, "url": url, **cfg})
+        self.delay = delay
+
+    async def fetch(self, client):
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            cls.active -= 1
+        return [{"id": self.key, "title": self.key}]
+
+
+# ── load_registry ────────────────────────────────────
+
+
+def test_load_registry_default_file():
+    """預設設定檔包含 GNN / 4Gamers / UDN"""
+    keys = [a.key for a in news_sources.load_registry()]
+    assert keys == ["gnn", "4gamers", "udn"]
+
+
+def test_load_registry_skips_disabled_and_unknown(tmp_path):
+    path = _write_config(tmp_path, [
+        {"key": "a", "name": "A", "type": "rss", "url": "https://a.example/rss"},
+        {"key": "b", "name": "B", "type": "rss", "url": "https://b.example/rss", "enabled": False},
+        {"key": "c", "name": "C", "type": "atom-xml", "url": "https://c.example/"},
+    ], defaults={"deadline": 5})
+    adapters = news_sources.load_registry(path)
+    assert [a.key for a in adapters] == ["a"]
+    assert adapters[0].deadline == 5
+    assert adapters[0].host == "a.example"
+
+
+# ── adapters ─────────────────────────────────────────
+
+
+def test_json_adapter_maps_fields():
+    """JSON adapter 依 items_path / fields 對照正規化"""
+    adapter = news_sources.JSONAdapter({
+        "key": "hk", "name": "HK Gamer", "type": "json", "url": "https://hk.example/api",
+        "items_path": "payload.list", "time_format": "epoch",
+        "fields": {"title": "headline", "url": "link", "summary": "desc", "published_at": "ts"},
+        "min_title_len": 3,
+    })
+    resp = MagicMock()
+    resp.json.return_value = {"payload": {"list": [
+        {"headline": "新作發表會整理", "link": "https://hk.example/1", "desc": "摘要", "ts": 0},
+        {"headline": "短", "link": "https://hk.example/2"},
+    ]}}
+    items = adapter.parse(resp)
+    assert len(items) == 1
+    assert items[0]["source"] == "HK Gamer"
+    assert items[0]["url"] == "https://hk.example/1"
+    assert items[0]["published_at"] == "1970-01-01T00:00:00Z"
+    assert items[0]["id"] == news_sources.news_hash("新作發表會整理", "HK Gamer")
+
+
+async def test_rss_adapter_keeps_legacy_id_key():
+    """id_key 讓既有來源的新聞 id 維持不變（封存/分群不會重複）"""
+    adapter = news_sources.RSSAdapter({"key": "gnn", "name": "巴哈姆特 GNN", "type": "rss",
+                                       "url": "https://gnn.gamer.com.tw/rss.xml", "id_key": "GNN"})
+    resp = MagicMock()
+    resp.text = """<rss version="2.0"><channel><item><title>標題</title>
+        <link>https://gnn/1</link><pubDate>Fri, 04 Apr 2026 08:00:00 GMT</pubDate></item></channel></rss>"""
+    items = await adapter.parse(resp)
+    assert items[0]["id"] == news_sources.news_hash("標題", "GNN")
+    assert items[0]["published_at"] == "2026-04-04T08:00:00Z"
+
+
+# ── fetch_all ────────────────────────────────────────
+
+
+async def test_fetch_all_limits_concurrency_per_host():
+    """同一主機的來源不超過 per_host 並行"""
+    _SlowAdapter.active = _SlowAdapter.peak = 0
+    adapters = [_SlowAdapter(f"s{i}", "https://same.example/feed", 0.02, per_host=2) for i in range(6)]
+    items = await news_sources.fetch_all(adapters, client=MagicMock())
+    assert len(items) == 6
+    assert _SlowAdapter.peak == 2
+
+
+async def test_fetch_all_slow_source_hits_deadline():
+    """慢來源逾時只缺該來源，不拖住其他來源"""
+    adapters = [
+        _SlowAdapter("fast", "https://fast.example/", 0.01),
+        _SlowAdapter("slow", "https://slow.example/", 5, deadline=0.1),
+    ]
+    start = time.monotonic()
+    items = await news_sources.fetch_all(adapters, client=MagicMock())
+    assert [it["id"] for it in items] == ["fast"]
+    assert time.monotonic() - start < 1
+
+
+async def test_fetch_all_isolates_errors():
+    """單一來源拋錯時其他來源照常合併"""
+    class _Broken(news_sources.SourceAdapter):
+        async def fetch(self, client):
+            raise RuntimeError("boom")
+
+    adapters = [
+        _Broken({"key": "bad", "name": "bad", "url": "https://bad.example/"}),
+        _SlowAdapter("ok", "https://ok.example/", 0),
+    ]
+    items = await news_sources.fetch_all(adapters, client=MagicMock())
+    assert [it["id"] for it in items] == ["ok"]
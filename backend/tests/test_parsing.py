@@ -0,0 +1,105 @@
+"""
+parsing.py 測試 — thread / process pool 分派、inline 模式、feed 解析、統計、backend 與 SoupStrainer 一致性
+"""
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scrapers import discussion_scraper, parsing, ptt_crawler
+
+PTT_HOTBOARDS_HTML = """
+<html><body>
+<a class="board" href="/bbs/C_Chat/index.html">
+  <div class="board-name">C_Chat</div>
+  <div class="board-nrec"><span>9999</span></div>
+</a>
+</body></html>
+"""
+
+RSS = """<rss version="2.0"><channel>
+<item><title>標題一</title><link>https://x/1</link></item>
+<item><title>標題二</title><link>https://x/2</link></item>
+</channel></rss>"""
+
+
+@pytest.fixture(autouse=True)
+def reset_parsing(monkeypatch):
+    monkeypatch.setattr(parsing, "_stats", {k: {"jobs": 0, "seconds": 0.0} for k in ("inline", "thread", "process")})
+    yield
+    parsing.shutdown()
+
+
+async def test_small_page_runs_in_thread_pool():
+    boards = await parsing.parse_html(PTT_HOTBOARDS_HTML, discussion_scraper._extract_ptt_hot_boards)
+    assert boards[0]["name"] == "C_Chat"
+    assert parsing.stats()["thread"]["jobs"] == 1
+    assert parsing.stats()["process"]["jobs"] == 0
+
+
+async def test_large_page_runs_in_process_pool(monkeypatch):
+    """超過門檻的頁面送進 process pool，extract 結果（純資料）正確傳回"""
+    monkeypatch.setattr(parsing, "PROCESS_THRESHOLD", 10)
+    monkeypatch.setattr(parsing, "PROCESS_WORKERS", 1)
+    boards = await parsing.parse_html(PTT_HOTBOARDS_HTML, discussion_scraper._extract_ptt_hot_boards)
+    assert boards[0]["popularity"] == 9999
+    assert parsing.stats()["process"]["jobs"] == 1
+
+
+async def test_process_pool_disabled_uses_threads(monkeypatch):
+    monkeypatch.setattr(parsing, "PROCESS_THRESHOLD", 10)
+    monkeypatch.setattr(parsing, "PROCESS_WORKERS", 0)
+    await parsing.parse_html(PTT_HOTBOARDS_HTML, discussion_scraper._extract_ptt_hot_boards)
+    assert parsing.stats()["thread"]["jobs"] == 1
+
+
+async def test_inline_mode(monkeypatch):
+    monkeypatch.setattr(parsing, "PARSE_MODE", "inline")
+    entries = await parsing.parse_feed(RSS)
+    assert [e["title"] for e in entries] == ["標題一", "標題二"]
+    assert parsing.stats()["inline"]["jobs"] == 1
+
+
+async def test_parse_feed_in_pool():
+    entries = await parsing.parse_feed(RSS)
+    assert entries[1].get("link") == "https://x/2"
+
+
+# ── parser backend + SoupStrainer ────────────────────
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+STRAINED_CASES = [
+    ("ptt_hotboards.html", discussion_scraper._extract_ptt_hot_boards, (), discussion_scraper.PTT_BOARD_ENTRIES),
+    ("ptt_C_Chat_index.html", ptt_crawler._extract_index_page, (), ptt_crawler.INDEX_ENTRIES),
+    ("bahamut_home.html", discussion_scraper._extract_bahamut_home, (), discussion_scraper.BAHAMUT_LINKS),
+]
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+@pytest.mark.parametrize("filename,extract,args,strainer", STRAINED_CASES)
+def test_strained_parse_matches_full_parse(backend, filename, extract, args, strainer):
+    """只解析目標子樹的結果與整頁解析相同（各 backend 皆然）"""
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    with open(os.path.join(FIXTURES, filename), encoding="utf-8") as f:
+        text = f.read()
+    full = extract(BeautifulSoup(text, "html.parser"), *args)
+    strained = parsing._soup_extract(text, extract, args, strainer, backend)
+    assert strained == full
+    assert strained  # fixture 確實有抓到東西
+
+
+def test_resolve_backend_falls_back():
+    assert parsing._resolve_backend("html.parser") == "html.parser"
+    assert parsing._resolve_backend("selectolax") in parsing.BACKENDS  # 非 bs4 tree builder 不採用
+
+
+async def test_parse_html_with_strainer_in_process_pool(monkeypatch):
+    """SoupStrainer 可隨工作送進 process pool"""
+    monkeypatch.setattr(parsing, "PROCESS_THRESHOLD", 10)
+    monkeypatch.setattr(parsing, "PROCESS_WORKERS", 1)
+    boards = await parsing.parse_html(
+        PTT_HOTBOARDS_HTML, discussion_scraper._extract_ptt_hot_boards, only=discussion_scraper.PTT_BOARD_ENTRIES,
+    )
+    assert boards[0]["name"] == "C_Chat"
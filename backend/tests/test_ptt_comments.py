@@ -0,0 +1,114 @@
+"""
+ptt_comments.py 測試 — 推文行解析、URL + 推文數快取、並行上限、推噓統計進情緒分析
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from bs4 import BeautifulSoup
+
+import database
+from scrapers import ptt_comments
+from scrapers.sentiment import analyze_ptt_article
+
+ARTICLE_HTML = """
+<div id="main-content">
+<div class="article-metaline"><span class="article-meta-value">[閒聊] 新角色</span></div>
+內文
+<div class="push"><span class="hl push-tag">推 </span><span class="f3 hl push-userid">alice</span><span class="f3 push-content">: 好耶</span><span class="push-ipdatetime"> 10/19 12:00</span></div>
+<div class="push"><span class="f1 hl push-tag">噓 </span><span class="f3 hl push-userid">bob</span><span class="f3 push-content">: 課金</span></div>
+<div class="push"><span class="f1 hl push-tag">→ </span><span class="f3 hl push-userid">carol</span><span class="f3 push-content">: 路過</span></div>
+<div class="push"><span class="hl push-tag">推 </span><span class="f3 hl push-userid">dave</span><span class="f3 push-content">: 抽了</span></div>
+<div class="push center warning-box">檔案過大！部分文章無法顯示</div>
+</div>
+"""
+
+
+def _article(n, nrec, now):
+    return {
+        "article_id": f"M.{now - n}.A.{n:03X}", "posted_at": now - n,
+        "title": f"[閒聊] 第{n}篇", "url": f"https://www.ptt.cc/bbs/C_Chat/M.{now - n}.A.{n:03X}.html",
+        "popularity": nrec, "popularity_value": int(nrec) if nrec.isdigit() else 100,
+    }
+
+
+def _client(delay=0.0):
+    state = {"active": 0, "peak": 0, "urls": []}
+
+    async def mock_get(url, **kwargs):
+        state["urls"].append(url)
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(delay)
+        state["active"] -= 1
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.text = ARTICLE_HTML
+        return resp
+
+    client = AsyncMock()
+    client.get = AsyncMock(side_effect=mock_get)
+    return client, state
+
+
+def test_extract_comments_counts_tags():
+    parsed = ptt_comments._extract_comments(BeautifulSoup(ARTICLE_HTML, "html.parser"))
+    assert (parsed["push"], parsed["boo"], parsed["neutral"]) == (2, 1, 1)
+    assert parsed["comments"][0] == {"tag": "push", "user": "alice", "content": "好耶"}
+    assert [c["tag"] for c in parsed["comments"]] == ["push", "boo", "neutral", "push"]
+
+
+async def test_refresh_skips_articles_without_new_comments():
+    """推文數沒變的文章不重抓，推文數變動的才重抓"""
+    await database.init_db()
+    now = int(time.time())
+    articles = [_article(1, "10", now), _article(2, "5", now)]
+    await database.save_ptt_crawl("C_Chat", 100, None, articles)
+
+    client, state = _client()
+    first = await ptt_comments.refresh_top_comments(client)
+    assert first == {"candidates": 2, "fetched": 2, "cached": 0}
+
+    second = await ptt_comments.refresh_top_comments(client)
+    assert second["fetched"] == 0
+    assert len(state["urls"]) == 2
+
+    articles[0]["popularity"], articles[0]["popularity_value"] = "12", 12
+    await database.save_ptt_crawl("C_Chat", 100, None, articles)
+    third = await ptt_comments.refresh_top_comments(client)
+    assert third["fetched"] == 1
+    assert state["urls"][-1] == articles[0]["url"]
+
+    stats = await ptt_comments.comment_stats([articles[0]["url"]])
+    assert stats[articles[0]["url"]] == {"push": 2, "boo": 1, "neutral": 1}
+    assert len(await database.get_ptt_comments(articles[0]["url"])) == 4
+
+
+def test_needs_fetch_refreshes_saturated_nrec_after_ttl():
+    """「爆」看不出有沒有新推文，超過 STALE_SECONDS 才重抓"""
+    now = int(time.time())
+    article = {"popularity": "爆"}
+    fresh = {"seen_nrec": "爆", "fetched_at": now - 60}
+    stale = {"seen_nrec": "爆", "fetched_at": now - ptt_comments.STALE_SECONDS}
+    assert not ptt_comments._needs_fetch(article, fresh, now)
+    assert ptt_comments._needs_fetch(article, stale, now)
+    assert ptt_comments._needs_fetch(article, None, now)
+
+
+async def test_refresh_respects_concurrency_limit():
+    await database.init_db()
+    now = int(time.time())
+    await database.save_ptt_crawl("C_Chat", 100, None, [_article(n, str(n), now) for n in range(1, 13)])
+
+    client, state = _client(delay=0.01)
+    result = await ptt_comments.refresh_top_comments(client)
+    assert result["fetched"] == 12
+    assert state["peak"] <= ptt_comments.CONCURRENCY
+
+
+def test_comment_stats_drive_ptt_sentiment():
+    """有推文統計時以推噓行數判斷，票數不足則沿用 index 推文數"""
+    assert analyze_ptt_article("[閒聊] 新角色", 30, {"push": 20, "boo": 15, "neutral": 5})["label"] == "negative"
+    assert analyze_ptt_article("[閒聊] 新角色", 30, {"push": 40, "boo": 2, "neutral": 5})["label"] == "positive"
+    assert analyze_ptt_article("[閒聊] 新角色", 100, {"push": 2, "boo": 1, "neutral": 0})["label"] == "positive"
+    assert analyze_ptt_article("[閒聊] 新角色", 30)["label"] == "neutral"
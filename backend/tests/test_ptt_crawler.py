@@ -0,0 +1,182 @@
+"""
+ptt_crawler.py 測試 — index 頁解析、游標增量往回走、24 小時滾動排行、每主機並行上限
+"""
+import asyncio
+import os
+import re
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from bs4 import BeautifulSoup
+
+import database
+from scrapers import ptt_crawler
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _page_html(board, page, posted_at, pushes=("10",)):
+    """產生一頁 index：page > 1 時有「上頁」連結，文章 ID 內含發文時間"""
+    rows = "".join(
+        f'<div class="r-ent"><div class="nrec"><span>{p}</span></div>'
+        f'<div class="title"><a href="/bbs/{board}/M.{posted_at + i}.A.{page:03X}.html">[閒聊] 第{page}頁 第{i}篇</a></div></div>'
+        for i, p in enumerate(pushes)
+    )
+    prev = f'<a class="btn wide" href="/bbs/{board}/index{page - 1}.html">&lsaquo; 上頁</a>' if page > 1 else ""
+    return f'<div class="btn-group btn-group-paging">{prev}</div>{rows}'
+
+
+def _client(pages: dict, latest: int):
+    """pages: 頁碼 → html；index.html 對應 latest 頁，記錄每次請求的 URL"""
+    client = MagicMock()
+    client.requested = []
+
+    async def mock_get(url, **kwargs):
+        client.requested.append(url)
+        match = re.search(r'index(\d*)\.html', url)
+        page = int(match.group(1)) if match.group(1) else latest
+        resp = MagicMock()
+        resp.status_code = 200 if page in pages else 404
+        resp.text = pages.get(page, "")
+        return resp
+
+    client.get = AsyncMock(side_effect=mock_get)
+    return client
+
+
+def _requested_pages(client):
+    return sorted(
+        int(m.group(1)) if m.group(1) else 0
+        for m in (re.search(r'index(\d*)\.html', u) for u in client.requested)
+    )
+
+
+# ── index 頁解析 ─────────────────────────────────────
+
+
+def test_extract_index_page_fixture():
+    """上頁頁碼、文章 ID / 發文時間，置底分隔線之後的置底文不算"""
+    with open(os.path.join(FIXTURES, "ptt_C_Chat_index.html"), encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), "html.parser")
+    page = ptt_crawler._extract_index_page(soup)
+    assert page["prev_page"] == 17819
+    assert len(page["articles"]) == 20
+    first = page["articles"][0]
+    assert first["article_id"].startswith("M.")
+    assert first["posted_at"] == int(first["article_id"].split(".")[1])
+    assert first["url"].startswith("https://www.ptt.cc/bbs/C_Chat/")
+    assert not any(a["title"].startswith("[公告] 版規") for a in page["articles"])
+
+
+def test_nrec_value():
+    assert ptt_crawler.nrec_value("爆") == 100
+    assert ptt_crawler.nrec_value("X5") == -1
+    assert ptt_crawler.nrec_value("42") == 42
+    assert ptt_crawler.nrec_value("") == 0
+
+
+# ── crawl_board ──────────────────────────────────────
+
+
+async def test_first_crawl_walks_back_until_window():
+    """第一次爬取往回走到超出 24 小時視窗的頁面為止，並記錄游標"""
+    await database.init_db()
+    now = int(time.time())
+    pages = {n: _page_html("C_Chat", n, now - (10 - n) * 3600) for n in range(7, 11)}
+    pages.update({n: _page_html("C_Chat", n, now - 30 * 3600 - (6 - n) * 3600) for n in range(1, 7)})
+    client = _client(pages, latest=10)
+
+    stats = await ptt_crawler.crawl_board(client, "C_Chat")
+
+    requested = _requested_pages(client)
+    assert requested[0] == 0 and 6 in requested  # index.html … 第 6 頁（第一個超出視窗的頁）
+    assert 1 not in requested
+    cursor = await database.get_ptt_cursor("C_Chat")
+    assert cursor["last_page"] == 10
+    assert cursor["last_article_id"].startswith("M.")
+    assert stats["pages"] == len(requested)
+
+
+async def test_incremental_crawl_stops_at_cursor_page(monkeypatch):
+    """之後只抓新頁 + 上次最新頁 + REFRESH_PAGES 頁"""
+    await database.init_db()
+    monkeypatch.setattr(ptt_crawler, "REFRESH_PAGES", 1)
+    now = int(time.time())
+    pages = {n: _page_html("Steam", n, now - (20 - n) * 60) for n in range(1, 21)}
+    await database.save_ptt_crawl("Steam", 17, "M.1.A.000", [])
+    client = _client(pages, latest=20)
+
+    await ptt_crawler.crawl_board(client, "Steam")
+
+    assert _requested_pages(client) == [0, 16, 17, 18, 19]
+
+
+async def test_crawl_stops_after_cursor_article(monkeypatch):
+    """記錄的頁碼過舊（頁碼位移）時，以上次的最新文章定位：找到後只再抓 REFRESH_PAGES 頁"""
+    await database.init_db()
+    monkeypatch.setattr(ptt_crawler, "REFRESH_PAGES", 1)
+    monkeypatch.setattr(ptt_crawler, "BATCH", 1)
+    now = int(time.time())
+    pages = {n: _page_html("Steam", n, now - (20 - n) * 60) for n in range(1, 21)}
+    await database.save_ptt_crawl("Steam", 5, f"M.{now - 2 * 60}.A.012", [])  # 第 18 頁的文章
+    client = _client(pages, latest=20)
+
+    await ptt_crawler.crawl_board(client, "Steam")
+
+    assert _requested_pages(client) == [0, 17, 18, 19]
+
+
+async def test_push_counts_updated_on_recrawl():
+    await database.init_db()
+    now = int(time.time())
+    await ptt_crawler.crawl_board(_client({1: _page_html("LoL", 1, now, ("5",))}, latest=1), "LoL")
+    await ptt_crawler.crawl_board(_client({1: _page_html("LoL", 1, now, ("爆",))}, latest=1), "LoL")
+
+    hot = await ptt_crawler.hot_articles(["LoL"])
+    assert len(hot) == 1
+    assert hot[0]["popularity"] == "爆"
+    assert hot[0]["popularity_value"] == 100
+
+
+async def test_hot_articles_rolling_window_and_order():
+    """超過 24 小時的文章不進排行，依推文數排序"""
+    await database.init_db()
+    now = int(time.time())
+    await database.save_ptt_crawl("C_Chat", 1, None, [
+        {"url": "u1", "article_id": "a1", "title": "舊文", "popularity": "爆", "popularity_value": 100,
+         "posted_at": now - 25 * 3600},
+        {"url": "u2", "article_id": "a2", "title": "新文少推", "popularity": "3", "popularity_value": 3,
+         "posted_at": now - 3600},
+        {"url": "u3", "article_id": "a3", "title": "新文多推", "popularity": "50", "popularity_value": 50,
+         "posted_at": now - 7200},
+    ])
+    hot = await ptt_crawler.hot_articles(["C_Chat"])
+    assert [a["title"] for a in hot] == ["新文多推", "新文少推"]
+    assert hot[0]["source"] == "PTT C_Chat"
+
+
+async def test_crawl_boards_respects_per_host_limit(monkeypatch):
+    """多版並行時，同時進行的請求數不超過 PER_HOST"""
+    await database.init_db()
+    monkeypatch.setattr(ptt_crawler, "PER_HOST", 2)
+    now = int(time.time())
+    in_flight = peak = 0
+
+    async def slow_get(url, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        page = int(re.search(r'index(\d*)\.html', url).group(1) or 5)
+        resp = MagicMock()
+        resp.status_code = 200
+        resp.text = _page_html("X", page, now)
+        return resp
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=slow_get)
+    stats = await ptt_crawler.crawl_boards(client, ["A", "B", "C"])
+
+    assert len(stats) == 3
+    assert peak <= 2
@@ -3,7 +3,7 @@ scheduler.py 測試 — Scheduler resilience
 覆蓋：_run_with_timeout 正常/超時/例外 + update_* cascade failure 防護
 """
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -145,6 +145,58 @@ async def test_update_twitch_handles_fetch_failure():
     assert result == []
 
 
+@pytest.mark.parametrize("after, published", [
+    ({"games": [], "updated_at": 200}, True),    # 重新抓取：快取 updated_at 前進
+    ({"games": [], "updated_at": 100}, False),   # 上游失敗：回傳的是舊快取
+    ({}, False),                                 # 沒有快取：回傳 demo 資料
+])
+async def test_update_twitch_publishes_only_fresh_data(after, published):
+    import database
+    await database.init_db()
+
+    before = {"games": [{"id": "1", "name": "Game", "viewer_count": 10}], "updated_at": 100}
+    mock_games = [{"id": "1", "name": "Game", "viewer_count": 1000}]
+    publish = MagicMock()
+    with patch("scheduler.twitch_scraper.fetch_top_games", new_callable=AsyncMock, return_value=mock_games), \
+            patch("scheduler.twitch_scraper.load_cache", side_effect=[before, after]), \
+            patch("scheduler.broadcaster.publish", publish):
+        await scheduler.update_twitch()
+
+    assert publish.called is published
+
+
+async def test_update_steam_skips_publish_on_cached_fallback():
+    import database
+    await database.init_db()
+
+    cached = {"games": [{"appid": 730, "name": "CS2", "current_players": 1}], "updated_at": 100}
+    publish = MagicMock()
+    with patch("scheduler.steam_scraper.fetch_top_games", new_callable=AsyncMock, return_value=cached["games"]), \
+            patch("scheduler.steam_scraper.load_cache", return_value=cached), \
+            patch("scheduler.broadcaster.publish", publish):
+        await scheduler.update_steam()
+
+    publish.assert_not_called()
+
+
+async def test_update_news_publishes_diff(tmp_path, monkeypatch):
+    """走真實的 news_scraper（只替換上游抓取）：讀舊快取 → 聚合 → 推播新增項目"""
+    import database
+    await database.init_db()
+    monkeypatch.setattr(scheduler.news_scraper, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(scheduler.news_scraper, "CACHE_FILE", str(tmp_path / "news_data.json"))
+
+    item = {"id": "n1", "title": "原神 新版本上線", "url": "https://n/1", "summary": "", "source": "GNN",
+            "source_icon": "", "published_at": "2026-10-19T00:00:00Z", "fetched_at": 0}
+    publish = MagicMock()
+    with patch("scrapers.news_sources.fetch_all", new_callable=AsyncMock, return_value=[item]), \
+            patch("scheduler.broadcaster.publish", publish):
+        await scheduler.update_news()
+
+    publish.assert_called_once()
+    assert publish.call_args.kwargs["diff"]["added"] == ["n1"]
+
+
 # ── cascade failure 防護（整合） ──────────────────────
 
 
@@ -0,0 +1,56 @@
+"""
+sentiment.py 測試 — 批次判斷、正規化標題 LRU memo（命中 / 未命中計數、容量上限）
+"""
+import pytest
+
+from scrapers import sentiment
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    sentiment.clear_memo()
+    yield
+    sentiment.clear_memo()
+
+
+def test_analyze_many_matches_single_calls():
+    titles = ["原神 新版本 好玩推薦", "糞作 退坑", "", "普通標題", "推薦 但 退坑"]
+    expected = [sentiment.analyze_title(t) for t in titles]
+    sentiment.clear_memo()
+    assert sentiment.analyze_many(titles) == expected
+
+
+def test_memo_hits_on_repeated_and_normalized_titles():
+    sentiment.analyze_many(["【情報】 好玩 推薦", "退坑了"])
+    assert sentiment.memo_stats()["misses"] == 2
+
+    # 全形空白 / 連續空白正規化後是同一個 key
+    sentiment.analyze_many(["【情報】　好玩   推薦", "退坑了", "退坑了"])
+    stats = sentiment.memo_stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["size"] == 2
+    assert stats["hit_rate"] == 0.6
+
+
+def test_memo_is_bounded_lru(monkeypatch):
+    monkeypatch.setattr(sentiment, "MEMO_SIZE", 3)
+    sentiment.analyze_many(["a1", "a2", "a3"])
+    sentiment.analyze_title("a1")          # a1 變成最近使用
+    sentiment.analyze_title("a4")          # 擠掉最久未用的 a2
+    assert sentiment.memo_stats()["size"] == 3
+    assert "a2" not in sentiment._memo
+    assert "a1" in sentiment._memo
+
+
+def test_ptt_article_uses_memo_only_when_push_signal_neutral():
+    assert sentiment.analyze_ptt_article("糞作", 100)["label"] == "positive"
+    assert sentiment.memo_stats()["misses"] == 0
+    assert sentiment.analyze_ptt_article("糞作", 10)["label"] == "negative"
+    assert sentiment.memo_stats()["misses"] == 1
+
+
+def test_returned_labels_are_independent_dicts():
+    first = sentiment.analyze_many(["好玩"])[0]
+    first["label"] = "mutated"
+    assert sentiment.analyze_many(["好玩"])[0] == {"label": "positive"}
@@ -0,0 +1,101 @@
+"""
+sentiment_model.py 測試 — 訓練 / 二進位格式 / mmap 載入、預測、格式檢查、sentiment 引擎切換
+"""
+import pytest
+
+from scrapers import sentiment, sentiment_model
+from scrapers.sentiment_model import NaiveBayesModel
+
+SAMPLES = [
+    ("positive", "好玩 推薦 神作"), ("positive", "超好玩 大推"), ("positive", "良心 好評"),
+    ("negative", "爛透了 退坑"), ("negative", "超爛 坑錢"), ("negative", "無聊 浪費錢"), ("negative", "超無聊"),
+    ("neutral", "請問 怎麼過"), ("neutral", "維護 公告"), ("neutral", "請問 配備"),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    sentiment.clear_memo()
+    yield
+    sentiment.clear_memo()
+
+
+def test_features_are_stable_and_bounded():
+    feats = sentiment_model.features("好玩 PV", bits=10, ngram_min=1, ngram_max=2)
+    assert feats == sentiment_model.features("好玩 ＰＶ", bits=10, ngram_min=1, ngram_max=2)  # NFKC + 小寫
+    assert all(0 <= h < 1024 for h in feats)
+    assert len(feats) == 4 + 4  # 4 個 1-gram（單一空白不算）+ 4 個 2-gram（含空白的 2-gram 仍保留）
+
+
+def test_train_and_predict_roundtrip(tmp_path):
+    data = sentiment_model.train(SAMPLES, bits=10)
+    assert len(data) == sentiment_model._HEADER.size + 3 * 16 + 3 * 4 + 1024 * 3 * 4
+
+    path = tmp_path / "nb.bin"
+    path.write_bytes(data)
+    model = NaiveBayesModel.load(str(path))
+    assert model.labels == ["negative", "neutral", "positive"]
+    assert model.bits == 10 and (model.ngram_min, model.ngram_max) == (1, 3)
+    assert model.predict("好玩推薦")["label"] == "positive"
+    assert model.predict("退坑 坑錢")["label"] == "negative"
+    assert model.predict("請問公告")["label"] == "neutral"
+    assert 0 < model.predict("好玩")["confidence"] <= 1
+
+    # bytes 與 mmap 載入結果一致
+    assert NaiveBayesModel(data).scores("好玩") == model.scores("好玩")
+
+
+def test_rejects_bad_files():
+    data = sentiment_model.train(SAMPLES, bits=8)
+    with pytest.raises(ValueError):
+        NaiveBayesModel(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        NaiveBayesModel(data[:-4])
+
+
+def test_read_samples_skips_comments(tmp_path):
+    path = tmp_path / "train.tsv"
+    path.write_text("# label\ttitle\npositive\t好玩\n\nnegative\t爛\nbroken line\n", encoding="utf-8")
+    assert sentiment_model.read_samples(str(path)) == [("positive", "好玩"), ("negative", "爛")]
+
+
+def test_cli_trains_model_file(tmp_path, capsys):
+    data = tmp_path / "train.tsv"
+    data.write_text("".join(f"{label}\t{title}\n" for label, title in SAMPLES), encoding="utf-8")
+    out = tmp_path / "out.bin"
+    sentiment_model.main(["train", str(data), "-o", str(out), "--bits", "8", "--holdout", "0.3"])
+    assert "holdout accuracy" in capsys.readouterr().out
+    assert NaiveBayesModel.load(str(out)).bits == 8
+
+
+def test_default_model_optional(tmp_path, monkeypatch):
+    """模型檔不存在時為 None（sentiment 退回 rules）；訓練後即可載入"""
+    path = tmp_path / "sentiment_nb.bin"
+    monkeypatch.setattr(sentiment_model, "MODEL_FILE", str(path))
+    assert sentiment_model._load_default() is None
+
+    path.write_bytes(sentiment_model.train(SAMPLES, bits=8))
+    assert set(sentiment_model._load_default().labels) == {"positive", "negative", "neutral"}
+
+
+def test_engine_selection(monkeypatch):
+    monkeypatch.setattr(sentiment_model, "model", NaiveBayesModel(sentiment_model.train(SAMPLES, bits=10)))
+
+    monkeypatch.setattr(sentiment, "ENGINE", "nb")
+    assert sentiment.analyze_title("超無聊")["label"] == "negative"
+
+    # hybrid：規則有判斷時用規則；規則中性時採用信心足夠的模型判斷
+    monkeypatch.setattr(sentiment, "ENGINE", "hybrid")
+    monkeypatch.setattr(sentiment, "NB_MIN_CONFIDENCE", 0.0)
+    sentiment.clear_memo()
+    assert sentiment.analyze_title("神作")["label"] == "positive"
+    assert sentiment.analyze_title("好無聊")["label"] == "negative"   # 規則沒有「無聊」，由模型判斷
+    monkeypatch.setattr(sentiment, "NB_MIN_CONFIDENCE", 1.01)
+    sentiment.clear_memo()
+    assert sentiment.analyze_title("好無聊")["label"] == "neutral"
+
+    # 沒有模型時退回規則
+    monkeypatch.setattr(sentiment_model, "model", None)
+    sentiment.clear_memo()
+    assert sentiment.analyze_title("好無聊")["label"] == "neutral"
+    assert sentiment.memo_stats()["engine"] == "rules"
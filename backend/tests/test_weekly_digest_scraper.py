@@ -2,6 +2,7 @@
 weekly_digest_scraper.py 測試 — 分類邏輯、名稱匹配、去重、YouTube API 解析
 聚焦可單元測試的純函式 + YouTube 搜尋的 mock 測試
 """
+import json
 from datetime import datetime, timezone, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -27,6 +28,8 @@ def _mock_response(status_code=200, json_data=None, text=""):
     resp.status_code = status_code
     resp.json.return_value = json_data or {}
     resp.text = text
+    resp.headers = {}
+    resp.content = text.encode() if text else json.dumps(json_data or {}).encode()
     resp.raise_for_status = MagicMock()
     if status_code >= 400:
         resp.raise_for_status.side_effect = Exception(f"HTTP {status_code}")
@@ -321,5 +324,390 @@ def test_get_search_range_returns_14_days():
 
 def test_load_cache_missing_file():
     """cache 不存在時回傳預設結構"""
-    result = weekly_digest_scraper._load_cache()
+    result = weekly_digest_scraper.load_cache()
     assert result == {"digest": [], "game_count": 0, "total_items": 0}
+
+
+# ── fetch_weekly_digest 並行管線 ───────────────────────
+
+async def test_fetch_weekly_digest_runs_games_concurrently_within_host_limits(monkeypatch):
+    """所有遊戲一起排入：每個主機同時進行的查詢達到但不超過 HOST_LIMITS（不同遊戲的查詢重疊進行）"""
+    import asyncio
+
+    import database
+
+    await database.init_db()
+    games = [{"name": f"遊戲{i}", "source": "android_grossing", "rank": i, "bsn": str(i)} for i in range(8)]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(return_value=games))
+    limits = {"google_news": 3, "4gamers": 2, "youtube": 2, "google_cse": 2, "bahamut": 2}
+    monkeypatch.setattr(weekly_digest_scraper, "HOST_LIMITS", limits)
+
+    in_flight = {host: 0 for host in limits}
+    peak = dict(in_flight)
+
+    def fake(host, with_item=False):
+        async def search(client, first, second, run=None):
+            in_flight[host] += 1
+            peak[host] = max(peak[host], in_flight[host])
+            await asyncio.sleep(0.05)
+            in_flight[host] -= 1
+            name = second if host == "bahamut" else first
+            if not with_item:
+                return []
+            return [{"title": f"{name} 限定活動開跑", "url": f"https://x/{name}", "source": "Google News",
+                     "published_at": "", "tags": ["event"]}]
+        return search
+
+    sources = [
+        ("google_news", "google_news", fake("google_news", with_item=True)),
+        ("facebook", "google_cse", fake("google_cse")),
+        ("4gamers", "4gamers", fake("4gamers")),
+        ("youtube", "youtube", fake("youtube")),
+        ("bahamut", "bahamut", fake("bahamut")),
+    ]
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", sources)
+
+    progress = {}
+    data = await weekly_digest_scraper.fetch_weekly_digest(
+        progress=lambda game, source, status, items: progress.__setitem__((game, source), status),
+    )
+
+    assert peak == limits
+    assert len(progress) == 8 * 5 and set(progress.values()) == {"done"}
+    assert data["game_count"] == 8
+    assert data["digest"][0]["sources_used"] == {
+        "google_news": 1, "facebook": 0, "4gamers": 0, "youtube": 0, "bahamut": 0,
+    }
+
+
+async def test_overlapping_runs_keep_their_own_state(monkeypatch):
+    """排程與手動重新整理重疊：各自的別名索引、Google News 批次與配額預算互不覆寫"""
+    import asyncio
+
+    import database
+
+    await database.init_db()
+    lists = [[{"name": "原神", "source": "bahamut_hot", "rank": 1, "bsn": None}],
+             [{"name": "神魔之塔", "source": "bahamut_hot", "rank": 1, "bsn": None}]]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(side_effect=lists))
+    runs = {}
+
+    async def search(client, name, since, run=None):
+        await asyncio.sleep(0.02)  # 讓兩次執行交錯
+        runs[name] = run
+        return []
+
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", [("google_news", "google_news", search)])
+    await asyncio.gather(weekly_digest_scraper.fetch_weekly_digest(), weekly_digest_scraper.fetch_weekly_digest())
+
+    for name, run in runs.items():
+        assert list(run.index.games) == [name] and name in run.news
+    assert runs["原神"] is not runs["神魔之塔"]
+    assert runs["原神"].budget is not runs["神魔之塔"].budget
+
+
+async def test_limited_source_timeout_returns_none(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCE_TIMEOUT", 0.01)
+
+    async def slow(client, name, since):
+        await asyncio.sleep(1)
+        return [{"title": "x"}]
+
+    semaphores = {"youtube": asyncio.Semaphore(1)}
+    assert await weekly_digest_scraper._limited(semaphores, "youtube", slow, None, "原神", None) is None
+
+
+# ── BSN 解析表 ───────────────────────────────────────
+
+async def test_resolve_bsn_uses_table_seeds_and_negative_cache(monkeypatch):
+    """種子模糊比對不需搜尋；搜尋結果（含找不到）寫回解析表，下次不再搜尋；請求失敗不快取"""
+    import database
+
+    await database.init_db()
+    calls = []
+
+    async def fake_search(client, name, run=None):
+        calls.append(name)
+        if name == "壞掉的遊戲":
+            raise RuntimeError("acg down")
+        return {"新遊戲": "99999"}.get(name)
+
+    monkeypatch.setattr(weekly_digest_scraper, "_search_bsn", fake_search)
+
+    def targets():
+        return [{"name": n, "bsn": None} for n in ("明日方舟", "新遊戲", "沒有板的遊戲", "壞掉的遊戲")]
+
+    games = targets()
+    stats = await weekly_digest_scraper._resolve_bsn(games)
+    assert [g["bsn"] for g in games] == ["74604", "99999", None, None]
+    assert stats == {"cached": 0, "seeded": 1, "searched": 3, "found": 1}
+    assert sorted(calls) == ["壞掉的遊戲", "新遊戲", "沒有板的遊戲"]
+
+    calls.clear()
+    games = targets()
+    stats = await weekly_digest_scraper._resolve_bsn(games)
+    assert [g["bsn"] for g in games] == ["74604", "99999", None, None]
+    assert calls == ["壞掉的遊戲"]  # 只有上次失敗的需要重試
+    assert stats == {"cached": 2, "seeded": 1, "searched": 1, "found": 0}  # 新遊戲 + 否定紀錄
+
+    table = await database.get_bsn_resolutions()
+    assert table["沒有板的遊戲"]["bsn"] is None
+    assert table["原神"]["source"] == "seed" and table["原神"]["expires_at"] is None
+
+
+async def test_bsn_negative_entries_expire(monkeypatch):
+    import database
+
+    await database.init_db()
+    await database.save_bsn_resolutions({"冷門遊戲": None, "熱門遊戲": "123"})
+    later = database.time.time() + (database.BSN_NEGATIVE_TTL_DAYS + 1) * 86400
+    monkeypatch.setattr(database.time, "time", lambda: later)
+    table = await database.get_bsn_resolutions()
+    assert "冷門遊戲" not in table
+    assert table["熱門遊戲"]["bsn"] == "123"
+
+
+# ── 增量更新：item store + 來源水位 ──────────────────
+
+async def test_incremental_digest_uses_watermarks_and_item_store(monkeypatch):
+    """第二次只從水位往回 WATERMARK_OVERLAP 查；重複的 URL / 標題不重複寫入；失敗的來源水位不前進"""
+    import database
+
+    await database.init_db()
+    games = [{"name": "原神", "source": "bahamut_hot", "rank": 1, "bsn": None}]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(return_value=games))
+
+    seen_since = {}
+    batches = {
+        "google_news": [
+            [{"title": "原神 聯名活動開跑", "url": "https://n/1", "source": "Google News",
+              "published_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"), "tags": ["collab", "event"]}],
+            [{"title": "原神  聯名活動開跑！", "url": "https://n/1?dup", "source": "Google News",
+              "published_at": "", "tags": ["collab", "event"]},
+             {"title": "原神 新廣告 PV", "url": "https://n/2", "source": "Google News",
+              "published_at": "", "tags": ["ad"]},
+             {"title": "原神 版本更新", "url": "https://n/3", "source": "Google News",
+              "published_at": "", "tags": ["news"]}],
+        ],
+    }
+
+    def source(key, fail_first=False):
+        calls = {"n": 0}
+
+        async def search(client, name, since, run=None):
+            seen_since.setdefault(key, []).append(since)
+            calls["n"] += 1
+            if fail_first and calls["n"] == 1:
+                raise RuntimeError("quota")
+            return batches.get(key, [[], []])[calls["n"] - 1]
+        return search
+
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", [
+        ("google_news", "google_news", source("google_news")),
+        ("youtube", "youtube", source("youtube", fail_first=True)),
+    ])
+
+    first = await weekly_digest_scraper.fetch_weekly_digest()
+    assert first["total_items"] == 1
+    watermarks = await database.get_digest_watermarks()
+    assert ("原神", "google_news") in watermarks and ("原神", "youtube") not in watermarks
+
+    second = await weekly_digest_scraper.fetch_weekly_digest()
+    window_start = seen_since["google_news"][0]
+    assert seen_since["google_news"][1] > window_start  # 從水位開始，不再重查整個視窗
+    # 失敗過的來源沒有水位，仍從 14 天視窗起點查
+    assert seen_since["youtube"][1] - seen_since["youtube"][0] < timedelta(seconds=5)
+
+    titles = [item["title"] for item in second["digest"][0]["items"]]
+    assert sorted(titles) == ["原神 新廣告 PV", "原神 聯名活動開跑"]  # 同標題換 URL 不重複、純 news 不收
+    assert second["digest"][0]["sources_used"]["google_news"] == 2
+    assert "source_key" not in second["digest"][0]["items"][0]
+
+
+def test_title_key_and_published_ts():
+    assert weekly_digest_scraper._title_key("原神  聯名活動開跑！") == weekly_digest_scraper._title_key("原神 聯名活動開跑")
+    assert weekly_digest_scraper._published_ts("2026-03-28T10:00:00") == 1774692000
+    assert weekly_digest_scraper._published_ts("2026-03-28T10:00:00Z") == 1774692000
+    assert weekly_digest_scraper._published_ts("") is None
+
+
+# ── Google News 合併查詢 ─────────────────────────────
+
+def test_google_news_batches_respect_size_and_url_limit(monkeypatch):
+    names = [f"遊戲{i}" for i in range(10)]
+    batches = weekly_digest_scraper._google_news_batches(names)
+    assert [len(b) for b in batches] == [8, 2]
+    assert sum(batches, []) == names
+
+    monkeypatch.setattr(weekly_digest_scraper, "GOOGLE_NEWS_MAX_URL",
+                        len(weekly_digest_scraper._google_news_url(names[:3])))
+    batches = weekly_digest_scraper._google_news_batches(names)
+    assert all(len(weekly_digest_scraper._google_news_url(b)) <= weekly_digest_scraper.GOOGLE_NEWS_MAX_URL
+               for b in batches)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+async def test_google_news_batch_routes_entries_by_alias(monkeypatch):
+    """一個 OR 查詢、feed 只抓一次，依別名分派；feed 飽和時分到太少項目的遊戲改用單一查詢"""
+    import asyncio
+
+    pub = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    feeds = {
+        ("原神", "Fate/Grand Order", "神魔之塔"): [
+            {"title": "Genshin 聯名活動開跑 - 巴哈", "link": "https://n/1", "published": pub},
+            {"title": "FGO × 原神 合作活動 - 4Gamers", "link": "https://n/2", "published": pub},
+            {"title": "原神 限定活動登場", "link": "https://n/3", "published": pub},
+            {"title": "神魔之塔 新活動", "link": "https://n/4", "published": pub},
+            {"title": "FGO 版本更新", "link": "https://n/6", "published": pub},
+        ],
+        ("神魔之塔",): [{"title": "神魔之塔 聯名活動", "link": "https://n/5", "published": pub}],
+    }
+    fetched = []
+
+    async def fake_fetch(client, names):
+        fetched.append(tuple(names))
+        await asyncio.sleep(0)
+        return feeds[tuple(names)]
+
+    monkeypatch.setattr(weekly_digest_scraper, "_fetch_google_news", fake_fetch)
+    monkeypatch.setattr(weekly_digest_scraper, "GOOGLE_NEWS_FEED_CAP", 5)
+    monkeypatch.setattr(weekly_digest_scraper, "GOOGLE_NEWS_MIN_ENTRIES", 2)
+    names = ["原神", "Fate/Grand Order", "神魔之塔"]
+    run = weekly_digest_scraper.DigestRun()
+    run.index = weekly_digest_scraper.GameAliasIndex(names)
+    run.news = batches = weekly_digest_scraper.GoogleNewsBatches(names, run.index)
+
+    since = datetime.now(timezone.utc) - timedelta(days=14)
+    results = await asyncio.gather(*[
+        weekly_digest_scraper._search_google_news(None, name, since, run) for name in names
+    ])
+    urls = {name: [r["url"] for r in items] for name, items in zip(names, results)}
+
+    assert urls == {
+        "原神": ["https://n/1", "https://n/2", "https://n/3"],
+        "Fate/Grand Order": ["https://n/2"],   # 分到 2 則（版本更新非行銷，被過濾）
+        "神魔之塔": ["https://n/5"],            # 飽和且只分到 1 則 → 單一遊戲查詢
+    }
+    assert fetched == [("原神", "Fate/Grand Order", "神魔之塔"), ("神魔之塔",)]
+    assert batches.stats == {"games": 3, "feeds": 1, "fallbacks": 1}
+
+
+async def test_google_news_batch_routes_short_ascii_alias_by_word(monkeypatch):
+    """批次 feed 混有其他遊戲的新聞：短英數別名（RO）只分到完整單字，不會收到 PRO / Roblox 的項目"""
+    pub = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    entries = [
+        {"title": "原神 Project 新角色 PRO 版活動", "link": "https://n/1", "published": pub},
+        {"title": "NIKKE x Roblox 聯名活動", "link": "https://n/2", "published": pub},
+        {"title": "RO 周年慶活動開跑", "link": "https://n/3", "published": pub},
+        {"title": "勝利女神：妮姬 NIKKE 聯名活動", "link": "https://n/4", "published": pub},
+    ]
+
+    async def fake_fetch(client, names):
+        return entries
+
+    monkeypatch.setattr(weekly_digest_scraper, "_fetch_google_news", fake_fetch)
+    names = ["原神", "RO仙境傳説", "勝利女神：妮姬"]
+    run = weekly_digest_scraper.DigestRun()
+    run.index = weekly_digest_scraper.GameAliasIndex(names)
+    run.news = weekly_digest_scraper.GoogleNewsBatches(names, run.index)
+
+    since = datetime.now(timezone.utc) - timedelta(days=14)
+    results = {name: [r["url"] for r in await weekly_digest_scraper._search_google_news(None, name, since, run)]
+               for name in names}
+    assert results["RO仙境傳説"] == ["https://n/3"]
+    assert results["原神"] == ["https://n/1"]
+    assert "https://n/4" in results["勝利女神：妮姬"]
+
+
+# ── 指紋去重 + new / ongoing ─────────────────────────
+
+async def test_digest_fingerprint_dedup_and_new_vs_ongoing(monkeypatch):
+    """轉載（來源前綴 / 追蹤參數）不重複收錄、已看過的不再跑情緒分析；上週第一次看到的項目標記 ongoing"""
+    import database
+
+    await database.init_db()
+    games = [{"name": "原神", "source": "bahamut_hot", "rank": 1, "bsn": None}]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(return_value=games))
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    runs = iter([
+        [{"title": "原神 聯名活動開跑", "url": "https://news.example.com/1", "published_at": now, "tags": ["collab"]}],
+        [{"title": "【情報】原神 聯名活動開跑！ - Yahoo奇摩", "url": "https://x.example.com/a", "published_at": now,
+          "tags": ["collab"]},
+         {"title": "原神 新廣告 PV", "url": "https://www.news.example.com/1/?utm_source=fb", "published_at": now,
+          "tags": ["ad"]},
+         {"title": "原神 限定活動登場", "url": "https://news.example.com/2", "published_at": now, "tags": ["event"]}],
+    ])
+
+    async def search(client, name, since, run=None):
+        return next(runs)
+
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", [("google_news", "google_news", search)])
+    analyzed = []
+    real_analyze = weekly_digest_scraper.sentiment.analyze_many
+
+    def spy(titles):
+        titles = list(titles)
+        analyzed.extend(titles)
+        return real_analyze(titles)
+
+    monkeypatch.setattr(weekly_digest_scraper.sentiment, "analyze_many", spy)
+
+    first = await weekly_digest_scraper.fetch_weekly_digest()
+    assert first["digest"][0]["items"][0]["status"] == "new"
+
+    # 第一個項目改成 8 天前第一次看到（上週的項目）
+    async with database.aiosqlite.connect(database.DB_PATH) as db:
+        await db.execute("UPDATE digest_item SET first_seen = first_seen - ?", (8 * 86400,))
+        await db.commit()
+
+    analyzed.clear()
+    second = await weekly_digest_scraper.fetch_weekly_digest()
+    entry = second["digest"][0]
+    status = {item["title"]: item["status"] for item in entry["items"]}
+    assert status == {"原神 聯名活動開跑": "ongoing", "原神 限定活動登場": "new"}
+    assert entry["new_count"] == 1
+    assert analyzed == ["原神 限定活動登場"]  # 標題 / URL 轉載都被 seen-set 擋下，不再分析
+    assert len(await database.get_digest_seen("原神")) == 6  # 3 個標題指紋 + 3 個 URL 指紋（轉載的標題 / URL 與原項目相同）
+
+
+async def test_republished_item_shows_as_ongoing_after_original_aged_out(monkeypatch):
+    """指紋還在 seen-set、原項目已過視窗或被清理：轉載版本仍列入摘要並標記 ongoing，不會消失"""
+    import database
+
+    await database.init_db()
+    games = [{"name": "原神", "source": "bahamut_hot", "rank": 1, "bsn": None}]
+    monkeypatch.setattr(weekly_digest_scraper, "_get_target_games", AsyncMock(return_value=games))
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    old = (datetime.now(timezone.utc) - timedelta(days=40)).strftime("%Y-%m-%dT%H:%M:%S")
+    runs = iter([
+        [{"title": "原神 聯名活動開跑", "url": "https://news.example.com/1", "published_at": old, "tags": ["collab"]},
+         {"title": "原神 限定活動登場", "url": "https://news.example.com/2", "published_at": old, "tags": ["event"]}],
+        [{"title": "【情報】原神 聯名活動開跑！ - Yahoo奇摩", "url": "https://x.example.com/a", "published_at": now,
+          "tags": ["collab"]},
+         {"title": "原神 限定活動登場", "url": "https://news.example.com/2", "published_at": now, "tags": ["event"]}],
+    ])
+
+    async def search(client, name, since, run=None):
+        return next(runs)
+
+    monkeypatch.setattr(weekly_digest_scraper, "SOURCES", [("google_news", "google_news", search)])
+    first = await weekly_digest_scraper.fetch_weekly_digest()
+    assert first["digest"] == []  # 發佈時間已超出 14 天視窗
+
+    # 40 天前第一次看到：第一個項目已被每日清理刪掉，第二個還在 item store（只是不在視窗內）
+    async with database.aiosqlite.connect(database.DB_PATH) as db:
+        await db.execute("UPDATE digest_seen SET first_seen = first_seen - ?, last_seen = last_seen - ?",
+                         (40 * 86400, 40 * 86400))
+        await db.execute("UPDATE digest_item SET first_seen = first_seen - ?", (40 * 86400,))
+        await db.execute("DELETE FROM digest_item WHERE url = ?", ("https://news.example.com/1",))
+        await db.commit()
+
+    second = await weekly_digest_scraper.fetch_weekly_digest()
+    entry = second["digest"][0]
+    status = {item["title"]: item["status"] for item in entry["items"]}
+    assert status == {"【情報】原神 聯名活動開跑！ - Yahoo奇摩": "ongoing", "原神 限定活動登場": "ongoing"}
+    assert entry["new_count"] == 0
+    assert all("sentiment" in item for item in entry["items"])
+
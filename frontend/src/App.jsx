@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from 'react'
 import { API_BASE } from './config'
+import { onCacheUpdate } from './liveUpdates'
 import Header from './components/Header'
 import ErrorBoundary from './components/ErrorBoundary'
 import SteamPanel from './components/SteamPanel'
@@ -33,10 +34,12 @@ export default function App() {
             }
         }
         fetchSteam()
+        const unsubscribe = onCacheUpdate('steam', fetchSteam)
         const timer = setInterval(fetchSteam, 10 * 60 * 1000)
         return () => {
             controller.abort()
             clearInterval(timer)
+            unsubscribe()
         }
     }, [])
 
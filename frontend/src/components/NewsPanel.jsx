@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { API_BASE } from '../config'
+import { onCacheUpdate } from '../liveUpdates'
 
 const TABS = [
     { key: 'all', label: '全部', source: null },
@@ -39,10 +40,12 @@ export default function NewsPanel() {
             }
         }
         fetchData()
+        const unsubscribe = onCacheUpdate('news', fetchData)
         const timer = setInterval(fetchData, 10 * 60 * 1000)
         return () => {
             controller.abort()
             clearInterval(timer)
+            unsubscribe()
         }
     }, [])
 
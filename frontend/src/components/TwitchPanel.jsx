@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { API_BASE } from '../config'
+import { onCacheUpdate } from '../liveUpdates'
 
 export default function TwitchPanel({ onTrendClick }) {
     const [games, setGames] = useState([])
@@ -27,10 +28,12 @@ export default function TwitchPanel({ onTrendClick }) {
             }
         }
         fetchData()
+        const unsubscribe = onCacheUpdate('twitch', fetchData)
         const timer = setInterval(fetchData, 10 * 60 * 1000)
         return () => {
             controller.abort()
             clearInterval(timer)
+            unsubscribe()
         }
     }, [])
 
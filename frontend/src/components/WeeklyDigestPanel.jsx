@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { API_BASE } from '../config'
+import { onCacheUpdate } from '../liveUpdates'
 
 const TAG_LABELS = {
     ad: { icon: '📢', label: '廣告' },
@@ -43,10 +44,12 @@ export default function WeeklyDigestPanel() {
             }
         }
         fetchData()
+        const unsubscribe = onCacheUpdate('weekly_digest', fetchData)
         const timer = setInterval(fetchData, 30 * 60 * 1000)
         return () => {
             controller.abort()
             clearInterval(timer)
+            unsubscribe()
         }
     }, [])
 
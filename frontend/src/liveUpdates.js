@@ -0,0 +1,37 @@
+import { API_BASE } from './config'
+
+// 所有面板共用一條 SSE 連線：後端排程寫入新資料時推送 {source, version, updated_at}
+const listeners = new Map()
+let eventSource = null
+
+function connect() {
+    if (eventSource || typeof EventSource === 'undefined') return
+    eventSource = new EventSource(`${API_BASE}/api/events`)
+    eventSource.addEventListener('update', (e) => {
+        try {
+            const event = JSON.parse(e.data)
+            listeners.get(event.source)?.forEach(cb => cb(event))
+        } catch (err) {
+            console.error('[Live] Bad event:', err)
+        }
+    })
+}
+
+function disconnect() {
+    if (eventSource && listeners.size === 0) {
+        eventSource.close()
+        eventSource = null
+    }
+}
+
+export function onCacheUpdate(source, callback) {
+    if (!listeners.has(source)) listeners.set(source, new Set())
+    listeners.get(source).add(callback)
+    connect()
+    return () => {
+        const set = listeners.get(source)
+        set?.delete(callback)
+        if (set && set.size === 0) listeners.delete(source)
+        disconnect()
+    }
+}